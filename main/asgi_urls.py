@@ -0,0 +1,11 @@
+"""
+URL configuration for GET and HEAD requests under ASGI - the async read views
+first, everything else as in main.urls.
+"""
+from django.urls import include, path
+
+from main.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include('market.async_urls')),
+] + sync_urlpatterns
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first - its total covers the other middleware
+    'market.middleware.ServerTimingMiddleware',
+    'market.middleware.MetricsMiddleware',
+    'market.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,8 +58,52 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'market.middleware.ReplicaRoutingMiddleware',
+    'market.middleware.AsyncReadRoutesMiddleware',
 ]
 
+# Server-Timing header per request, see market.middleware.ServerTimingMiddleware
+SERVER_TIMING = os.environ.get('DJANGO_SERVER_TIMING') == '1'
+# and a JSON log line per request on the market.timing logger - costs several times the header
+SERVER_TIMING_LOG = os.environ.get('DJANGO_SERVER_TIMING_LOG') == '1'
+
+# Prometheus metrics at /api/metrics/, see market.metrics
+METRICS = os.environ.get('DJANGO_METRICS') == '1'
+# shared by the worker processes of one host - empty it before the server starts
+METRICS_DIR = os.environ.get('DJANGO_METRICS_DIR')
+METRICS_FLUSH_SECONDS = 1
+# the scraper sends "Authorization: Bearer <token>", without a token only admins see the metrics
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN')
+
+# queries slower than this many ms are logged with their plan, see market.slow_queries
+SLOW_QUERY_MS = float(os.environ['DJANGO_SLOW_QUERY_MS']) if os.environ.get('DJANGO_SLOW_QUERY_MS') else None
+SLOW_QUERY_LOG = os.environ.get('DJANGO_SLOW_QUERY_LOG', str(BASE_DIR / 'slow_queries.log'))
+SLOW_QUERY_EXPLAIN_TTL = 3600  # seconds until the plan of a fingerprint is logged again
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'market.timing': {'handlers': ['console'], 'level': 'INFO' if SERVER_TIMING_LOG else 'WARNING', 'propagate': False},
+    },
+}
+if SLOW_QUERY_MS is not None:
+    LOGGING['handlers']['slow_queries'] = {
+        'class': 'logging.handlers.RotatingFileHandler',
+        'filename': SLOW_QUERY_LOG,
+        'maxBytes': 10 * 1024 * 1024,
+        'backupCount': 5,
+        'delay': True,
+    }
+    LOGGING['loggers']['market.slow_queries'] = {'handlers': ['slow_queries'], 'level': 'WARNING', 'propagate': False}
+
+# async read views for GET/HEAD under ASGI, see market.middleware - opt-in, they skip
+# DRF content negotiation and throttling and were slower in benchmark_asgi
+ASYNC_READ_URLCONF = 'main.asgi_urls' if os.environ.get('DJANGO_ASYNC_READS') == '1' else None
+
 ROOT_URLCONF = 'main.urls'
 
 TEMPLATES = [
@@ -86,6 +135,50 @@ DATABASES = {
     }
 }
 
+# SQLite tuned for concurrent requests - select with DJANGO_DATABASE_PROFILE=production
+SQLITE_PRODUCTION = {
+    # keep connections between requests
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        # busy timeout - seconds to wait for a lock before "database is locked"
+        'timeout': 20,
+        # take the write lock at BEGIN - a read lock upgraded later fails at once, without waiting
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': ';'.join([
+            # readers no longer block the writer and the other way round
+            'PRAGMA journal_mode=WAL',
+            # safe with WAL, only the last commits can be lost on power failure
+            'PRAGMA synchronous=NORMAL',
+            # 64 MB page cache per connection
+            'PRAGMA cache_size=-65536',
+            'PRAGMA mmap_size=268435456',
+            'PRAGMA temp_store=MEMORY',
+        ]),
+    },
+}
+
+DATABASE_PROFILE = os.environ.get('DJANGO_DATABASE_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION)
+
+# Read replica - reads of safe requests go there once READ_REPLICA names it, see
+# market.replica. Locally a second SQLite file refreshed by `manage.py sync_replica`,
+# in production e.g. a PostgreSQL streaming replica configured here instead.
+REPLICA_NAME = os.environ.get('DJANGO_REPLICA_NAME')
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': REPLICA_NAME or DATABASES['default']['NAME'],
+    # tests read the test database through the replica alias
+    'TEST': {'MIRROR': 'default'},
+}
+READ_REPLICA = 'replica' if REPLICA_NAME else None
+DATABASE_ROUTERS = ['market.replica.PrimaryReplicaRouter']
+# seconds a client reads from the primary after a write
+READ_REPLICA_PIN_SECONDS = 5
+# the anonymous offer list reads the replica too, stale for the lag plus OFFER_LIST_CACHE_TTL
+OFFER_LIST_REPLICA_LAG_TOLERANT = os.environ.get('DJANGO_OFFER_LIST_LAG_TOLERANT') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -130,19 +223,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'market.authentication.MarketBasicAuthentication',
         # just for test cases
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'market.authentication.MarketSessionAuthentication',
+        'market.authentication.MarketTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# In-process token -> user cache of market.authentication.MarketTokenAuthentication
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 60  # seconds - upper bound for stale entries in other worker processes
+
+# anonymous offer list responses
+OFFER_LIST_CACHE_MAX_SIZE = 1000
+OFFER_LIST_CACHE_TTL = 30  # seconds
+
+# homepage statistics
+BASE_INFO_CACHE_TTL = 60  # seconds
+
 CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5500",
     "http://127.0.0.1:8000"
 ]
 
-import os
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
@@ -6,4 +6,5 @@ admin.site.register(models.MarketUser)
 admin.site.register(models.Offer)
 admin.site.register(models.OfferDetail)
 admin.site.register(models.Order)
-admin.site.register(models.Review)
\ No newline at end of file
+admin.site.register(models.Review)
+admin.site.register(models.BusinessStats)
\ No newline at end of file
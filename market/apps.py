@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
 
 
 class MarketConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'market'
+
+    def ready(self):
+        import market.signals
+        from market.search import restore_search_triggers
+        post_migrate.connect(restore_search_triggers, sender=self)
+        if getattr(settings, 'SLOW_QUERY_MS', None) is not None:
+            # commands and other code outside of requests too
+            from market.slow_queries import install
+            install()
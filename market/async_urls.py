@@ -0,0 +1,15 @@
+from django.urls import path
+
+from market.async_views import (
+    base_info, business_completed_order_count, business_order_count, offer_detail, offer_list, offer_retrieve,
+)
+
+# GET and HEAD under ASGI only - main.asgi_urls puts them in front of market.urls
+urlpatterns = [
+    path('offers/', offer_list, name='offers-list'),
+    path('offers/<int:pk>/', offer_retrieve, name='offers-detail'),
+    path('offerdetails/<int:pk>/', offer_detail, name='offerdetail'),
+    path('order-count/<int:pk>/', business_order_count, name='business-order-count'),
+    path('completed-order-count/<int:pk>/', business_completed_order_count, name='business-completed-order-count'),
+    path('base-info/', base_info, name='base-info'),
+]
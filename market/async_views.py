@@ -0,0 +1,170 @@
+"""
+Async versions of the high volume read endpoints, served under ASGI once
+settings.ASYNC_READ_URLCONF is set (see market.middleware.AsyncReadRoutesMiddleware).
+They answer like the DRF views in market.views - same data, status codes and
+validators - with DRF authentication and permissions, but without the rest of
+APIView:
+- no content negotiation, the answer is always JSON - no browsable API,
+  ?format= or Accept handling
+- no throttling, DEFAULT_THROTTLE_CLASSES and throttle_classes are not applied
+"""
+import functools
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound, PermissionDenied
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+
+from market.authentication import MarketTokenAuthentication, token_cache, token_key
+from market.base_info import aget_base_info
+from market.conditional import aqueryset_validators, check_conditions, query_key, row_validators, set_validators
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import (
+    OFFER_LIST_FIELDS, aoffer_facets, aserialize_offer_list, offer_list_cache, offer_list_cache_key, offer_list_values, wants_facets,
+    with_facets,
+)
+from market.replica import offer_list_reads
+from market.serializers import OfferDetailSerializer
+from market.timing import timed
+from market.views import OfferViewset
+
+renderer = JSONRenderer()
+
+
+def render(data, status=HTTP_200_OK):
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+def exception_response(exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = render(data, exc.status_code)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        # the header of the first authentication class, like APIView
+        response['WWW-Authenticate'] = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]().authenticate_header(None)
+    return response
+
+
+async def authenticate(request):
+    """
+    Wraps `request` in a DRF request and authenticates it with the DRF
+    authentication classes. A token found in token_cache costs no query and no
+    thread, everything else runs the authenticators in a worker thread.
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    key = token_key(request)
+    # session authentication comes first in the DRF order
+    cached = token_cache.get(key) if key and settings.SESSION_COOKIE_NAME not in request.COOKIES else None
+    if cached is not None:
+        with timed('auth'):
+            drf_request.user, drf_request.auth = MarketTokenAuthentication().restore_credentials(cached)
+    else:
+        await sync_to_async(getattr)(drf_request, 'user')
+    return drf_request
+
+
+def async_api_view(*permission_classes):
+    """
+    Turns `view(request, **kwargs)` into an async Django view with DRF
+    authentication, permissions and error responses.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                drf_request = await authenticate(request)
+                with timed('permissions'):
+                    for permission in permission_classes:
+                        if not permission().has_permission(drf_request, None):
+                            raise PermissionDenied() if drf_request.user.is_authenticated else NotAuthenticated()
+                return await view(drf_request, *args, **kwargs)
+            except APIException as exc:
+                return exception_response(exc)
+        return wrapper
+    return decorator
+
+
+@async_api_view(AllowAny)
+async def offer_list(request):
+    cache_key = offer_list_cache_key(request)
+    cached = offer_list_cache.get(cache_key) if cache_key is not None else None
+    if cached is not None:
+        data, etag, last_modified = cached
+        return set_validators(check_conditions(request, etag, last_modified) or render(data), etag, last_modified)
+
+    with offer_list_reads() if cache_key is not None else nullcontext():
+        # filters and pagination of the viewset - they build the query, the async ORM runs it
+        view = OfferViewset(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        etag, last_modified = await aqueryset_validators(queryset, query_key(request))
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        facets = await aoffer_facets(queryset) if wants_facets(request) else None
+        queryset = offer_list_values(queryset)
+        page = await view.paginator.apaginate_queryset(queryset, request, view)
+        if page is not None:
+            data = view.paginator.get_paginated_response(await aserialize_offer_list(page)).data
+        else:
+            data = await aserialize_offer_list([row async for row in queryset])
+        if facets is not None:
+            data = with_facets(data, facets)
+    if cache_key is not None:
+        offer_list_cache.set(cache_key, (data, etag, last_modified))
+    return set_validators(render(data), etag, last_modified)
+
+
+@async_api_view(IsAuthenticated)
+async def offer_retrieve(request, pk):
+    row = await Offer.objects.filter(pk=pk).values(*OFFER_LIST_FIELDS).afirst()
+    if row is None:
+        raise NotFound('No Offer matches the given query.')
+    etag, last_modified = row_validators(Offer, row['id'], row['updated_at'])
+    not_modified = check_conditions(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    data = (await aserialize_offer_list([row], request))[0]
+    return set_validators(render(data), etag, last_modified)
+
+
+@async_api_view(AllowAny)
+async def offer_detail(request, pk):
+    detail = await OfferDetail.objects.filter(pk=pk).afirst()
+    if detail is None:
+        raise NotFound('No OfferDetail matches the given query.')
+    return render(OfferDetailSerializer(detail).data)
+
+
+async def stats_count(pk, field):
+    # None if the user does not exist, like the sync views
+    counts = [count async for count in MarketUser.objects.filter(pk=pk).values_list(f'stats__{field}', flat=True)]
+    if not counts:
+        return None
+    return counts[0] or 0
+
+
+@async_api_view(IsAuthenticated)
+async def business_order_count(request, pk):
+    count = await stats_count(pk, 'orders_in_progress')
+    if count is None:
+        return render({"error": "No user found with this id."}, HTTP_404_NOT_FOUND)
+    return render({"order_count": count})
+
+
+@async_api_view(IsAuthenticated)
+async def business_completed_order_count(request, pk):
+    count = await stats_count(pk, 'orders_completed')
+    if count is None:
+        return render({"error": "No business user found with this id."}, HTTP_404_NOT_FOUND)
+    return render({"completed_order_count": count})
+
+
+@async_api_view(AllowAny)
+async def base_info(request):
+    return render(await aget_base_info())
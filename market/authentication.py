@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication, TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authtoken.models import Token
+
+from market.cache import LRUTTLCache
+from market.models import MarketUser
+
+# token key -> row values of token, user and MarketUser.
+# Process local - other workers only see invalidations after the TTL.
+token_cache = LRUTTLCache(
+    max_size=getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+def load_marketuser(user):
+    """
+    Loads the MarketUser of `user` into the relation cache, user.marketuser
+    then costs no further query for the rest of the request.
+    """
+    try:
+        user.marketuser
+    except MarketUser.DoesNotExist:
+        pass
+
+
+class MarketUserAuthenticationMixin:
+    """
+    Resolves the MarketUser once while authenticating
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            load_marketuser(result[0])
+        return result
+
+
+class MarketBasicAuthentication(MarketUserAuthenticationMixin, BasicAuthentication):
+    pass
+
+
+class MarketSessionAuthentication(MarketUserAuthenticationMixin, SessionAuthentication):
+    pass
+
+
+def token_key(request):
+    """
+    The key of a "Token" Authorization header, None without one.
+    """
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) == 2 and parts[0].lower() == 'token':
+        return parts[1]
+    return None
+
+
+def snapshot(instance):
+    if instance is None:
+        return None
+    fields = instance._meta.concrete_fields
+    return ([f.attname for f in fields], [getattr(instance, f.attname) for f in fields])
+
+
+def restore(model, row, db):
+    return model.from_db(db, *row)
+
+
+class MarketTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication loading token, user and MarketUser in one query.
+    Results are kept in `token_cache`, every request gets fresh instances.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return self.restore_credentials(cached)
+
+        # a token or user change while the rows load invalidates them
+        generation = token_cache.generation()
+        try:
+            token = Token.objects.select_related('user__marketuser').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        try:
+            marketuser = token.user.marketuser
+        except MarketUser.DoesNotExist:
+            marketuser = None
+        token_cache.set(key, {
+            'db': token._state.db,
+            'user_id': token.user_id,
+            'token': snapshot(token),
+            'user': snapshot(token.user),
+            'marketuser': snapshot(marketuser),
+        }, generation=generation)
+        return (token.user, token)
+
+    def restore_credentials(self, cached):
+        db = cached['db']
+        token = restore(Token, cached['token'], db)
+        user = restore(User, cached['user'], db)
+        Token.user.field.set_cached_value(token, user)
+        marketuser = None
+        if cached['marketuser'] is not None:
+            marketuser = restore(MarketUser, cached['marketuser'], db)
+            MarketUser.user.field.set_cached_value(marketuser, user)
+        User.marketuser.related.set_cached_value(user, marketuser)
+        return (user, token)
+
+
+def invalidate_user_tokens(user_id):
+    token_cache.delete_where(lambda cached: cached['user_id'] == user_id)
@@ -0,0 +1,54 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from market.cache import LRUTTLCache
+from market.models import BusinessStats, MarketUser, Offer
+from market.replica import primary
+
+BASE_INFO_KEY = 'base-info'
+
+# Process local - other workers pick up writes after the TTL at the latest.
+base_info_cache = LRUTTLCache(max_size=1, ttl=getattr(settings, 'BASE_INFO_CACHE_TTL', 60))
+
+
+def compute_base_info():
+    # a shared cache that writes invalidate on commit - read it from the primary
+    with primary():
+        return _compute_base_info()
+
+
+def _compute_base_info():
+    review_totals = BusinessStats.objects.aggregate(review_count=Sum('review_count'), rating_sum=Sum('rating_sum'))
+    review_count = review_totals['review_count'] or 0
+    average_rating = review_totals['rating_sum'] / review_count if review_count else None
+    return {
+        "review_count": review_count,
+        "average_rating": average_rating,
+        "business_profile_count": MarketUser.objects.filter(type='business').count(),
+        "offer_count": Offer.objects.count(),
+    }
+
+
+def get_base_info():
+    """
+    Cached base info - concurrent misses wait for one computation.
+    """
+    return base_info_cache.get_or_set(BASE_INFO_KEY, compute_base_info)
+
+
+async def aget_base_info():
+    """
+    get_base_info for async views - a miss is computed in a worker thread.
+    """
+    data = base_info_cache.get(BASE_INFO_KEY)
+    if data is not None:
+        return data
+    return await sync_to_async(get_base_info)()
+
+
+def invalidate_base_info():
+    # again on commit - a computation running before the commit still reads the old rows
+    base_info_cache.delete(BASE_INFO_KEY)
+    transaction.on_commit(lambda: base_info_cache.delete(BASE_INFO_KEY))
@@ -0,0 +1,266 @@
+"""
+In-process benchmark of every route in market/urls.py against a generated
+dataset - see the benchmark_endpoints command. Latencies are measured without
+tracing, allocated memory in one extra traced request per endpoint.
+"""
+import gc
+import itertools
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+
+# `request(i)` returns (path, body) of iteration i, it may prepare rows - that part is not measured
+Endpoint = namedtuple('Endpoint', ['name', 'route', 'method', 'client', 'request', 'slow'], defaults=[False])
+
+# password hashing dominates these, fewer iterations are enough
+SLOW_ITERATIONS = 5
+
+
+def route_names(patterns=None, namespace=None):
+    """
+    Names of all routes in market/urls.py, namespaced like "rest_framework:login".
+    """
+    if patterns is None:
+        from market.urls import urlpatterns as patterns
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            inner = f'{namespace}:{pattern.namespace}' if namespace and pattern.namespace else namespace or pattern.namespace
+            names |= route_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+    return names
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get_or_create(user=user)[0].key}')
+    return client
+
+
+def offer_payload(title):
+    return {
+        'title': title,
+        'description': 'Benchmark Paket',
+        'details': [
+            {'title': offer_type, 'revisions': 1, 'delivery_time_in_days': 10 - i, 'price': 100 * (i + 1), 'features': ['Logo'], 'offer_type': offer_type}
+            for i, offer_type in enumerate(['basic', 'standard', 'premium'])
+        ],
+    }
+
+
+def endpoints():
+    """
+    One or more endpoints per route, built from the generated dataset.
+    """
+    business = MarketUser.objects.filter(type='business', offer__isnull=False, order_business__isnull=False).order_by('pk').first()
+    order = Order.objects.filter(business_user=business).order_by('pk').first()
+    customer = order.customer_user
+    offer = Offer.objects.filter(user=business).order_by('pk').first()
+    detail = OfferDetail.objects.filter(offer=offer).order_by('pk').first()
+    # not the pair the review create and delete endpoints work on
+    review = Review.objects.exclude(business_user=business, reviewer=customer).order_by('pk').first()
+    admin = User.objects.create_superuser(username='benchmark-admin', password='benchmark')
+    business_ids = ','.join(str(pk) for pk in MarketUser.objects.filter(type='business').order_by('pk').values_list('pk', flat=True)[:50])
+    order_ids = list(Order.objects.filter(business_user=business).order_by('pk').values_list('pk', flat=True)[:50])
+
+    anonymous, customer_client, business_client, admin_client = (
+        client_for(), client_for(customer.user), client_for(business.user), client_for(admin),
+    )
+    counter = itertools.count()
+
+    def get(path):
+        return lambda i: (path, None)
+
+    def new_offer(i):
+        offer = Offer.objects.create(user=business, title=f'Benchmark {i}', description='Paket', min_price=10, min_delivery_time=3)
+        return reverse('offers-detail', kwargs={'pk': offer.pk}), None
+
+    def new_order(i):
+        new = Order.objects.create(offerdetail=detail, customer_user=customer, business_user=business, status='in_progress')
+        return reverse('orders-detail', kwargs={'pk': new.pk}), None
+
+    def new_review_target(i):
+        # one review per business and reviewer - remove the one of the last iteration
+        Review.objects.filter(business_user=business, reviewer=customer).delete()
+        return reverse('reviews-list'), {'business_user': business.pk, 'rating': 4, 'description': 'Gut'}
+
+    def new_review(i):
+        Review.objects.filter(business_user=business, reviewer=customer).delete()
+        new = Review.objects.create(business_user=business, reviewer=customer, rating=3, description='Ok')
+        return reverse('reviews-detail', kwargs={'pk': new.pk}), None
+
+    def status(i):
+        return 'completed' if i % 2 else 'in_progress'
+
+    def status_choice(i):
+        # the single order PATCH takes the keys of ORDER_STATUS only
+        return 'completed' if i % 2 else 'inprogress'
+
+    def register(i):
+        username = f'benchmark-new-{next(counter)}'
+        return reverse('register'), {
+            'username': username, 'email': f'{username}@example.com', 'password': 'benchmark',
+            'repeated_password': 'benchmark', 'type': 'customer',
+        }
+
+    return [
+        Endpoint('GET api-root', 'api-root', 'get', anonymous, get(reverse('api-root'))),
+        Endpoint('GET offers-list anonymous (cached)', 'offers-list', 'get', anonymous, get(reverse('offers-list'))),
+        Endpoint('GET offers-list', 'offers-list', 'get', customer_client, get(reverse('offers-list') + '?page_size=19')),
+        Endpoint('GET offers-list search', 'offers-list', 'get', customer_client, get(reverse('offers-list') + '?search=logo&page_size=19')),
+        Endpoint('GET offers-list ordering', 'offers-list', 'get', customer_client, get(reverse('offers-list') + '?ordering=-min_price&page_size=19')),
+        Endpoint('GET offers-list facets', 'offers-list', 'get', customer_client, get(reverse('offers-list') + '?facets=1&page_size=19')),
+        Endpoint('POST offers-list', 'offers-list', 'post', business_client, lambda i: (reverse('offers-list'), offer_payload(f'Benchmark {i}'))),
+        Endpoint(
+            'POST offers-batch', 'offers-batch', 'post', business_client,
+            lambda i: (reverse('offers-batch'), [offer_payload(f'Batch {i} {n}') for n in range(10)]),
+        ),
+        Endpoint('GET offers-detail', 'offers-detail', 'get', customer_client, get(reverse('offers-detail', kwargs={'pk': offer.pk}))),
+        Endpoint(
+            'PATCH offers-detail', 'offers-detail', 'patch', business_client,
+            lambda i: (reverse('offers-detail', kwargs={'pk': offer.pk}), {'title': f'{offer.title} {i % 2}'}),
+        ),
+        Endpoint('DELETE offers-detail', 'offers-detail', 'delete', business_client, new_offer),
+        Endpoint('GET offerdetail', 'offerdetail', 'get', anonymous, get(reverse('offerdetail', kwargs={'pk': detail.pk}))),
+        Endpoint('GET orders-list', 'orders-list', 'get', business_client, get(reverse('orders-list'))),
+        Endpoint('POST orders-list', 'orders-list', 'post', customer_client, lambda i: (reverse('orders-list'), {'offer_detail_id': detail.pk})),
+        Endpoint('GET orders-detail', 'orders-detail', 'get', business_client, get(reverse('orders-detail', kwargs={'pk': order.pk}))),
+        Endpoint(
+            'PATCH orders-detail', 'orders-detail', 'patch', business_client,
+            lambda i: (reverse('orders-detail', kwargs={'pk': order.pk}), {'status': status_choice(i)}),
+        ),
+        Endpoint('DELETE orders-detail', 'orders-detail', 'delete', admin_client, new_order),
+        Endpoint(
+            'PATCH orders-bulk-status', 'orders-bulk-status', 'patch', business_client,
+            lambda i: (reverse('orders-bulk-status'), {'ids': order_ids, 'status': status(i)}),
+        ),
+        Endpoint(
+            'GET business-order-count', 'business-order-count', 'get', customer_client,
+            get(reverse('business-order-count', kwargs={'pk': business.pk})),
+        ),
+        Endpoint(
+            'GET business-completed-order-count', 'business-completed-order-count', 'get', customer_client,
+            get(reverse('business-completed-order-count', kwargs={'pk': business.pk})),
+        ),
+        Endpoint(
+            'GET reviews-list', 'reviews-list', 'get', customer_client,
+            get(reverse('reviews-list') + f'?business_user_id={business.pk}&ordering=rating'),
+        ),
+        Endpoint('POST reviews-list', 'reviews-list', 'post', customer_client, new_review_target),
+        Endpoint('GET reviews-detail', 'reviews-detail', 'get', customer_client, get(reverse('reviews-detail', kwargs={'pk': review.pk}))),
+        Endpoint(
+            'PATCH reviews-detail', 'reviews-detail', 'patch', client_for(review.reviewer.user),
+            lambda i: (reverse('reviews-detail', kwargs={'pk': review.pk}), {'rating': 1 + i % 5}),
+        ),
+        Endpoint('DELETE reviews-detail', 'reviews-detail', 'delete', customer_client, new_review),
+        Endpoint('GET profile-detail', 'profile-detail', 'get', customer_client, get(reverse('profile-detail', kwargs={'pk': business.pk}))),
+        Endpoint(
+            'PATCH profile-detail', 'profile-detail', 'patch', business_client,
+            lambda i: (reverse('profile-detail', kwargs={'pk': business.pk}), {'location': f'Berlin {i % 2}'}),
+        ),
+        Endpoint('GET customer-list', 'customer-list', 'get', business_client, get(reverse('customer-list'))),
+        Endpoint('GET business-list', 'business-list', 'get', customer_client, get(reverse('business-list'))),
+        Endpoint('GET review-stats', 'review-stats', 'get', customer_client, get(reverse('review-stats') + f'?business_user_ids={business_ids}')),
+        Endpoint('GET base-info', 'base-info', 'get', anonymous, get(reverse('base-info'))),
+        Endpoint('GET cache-stats', 'cache-stats', 'get', admin_client, get(reverse('cache-stats'))),
+        Endpoint('GET metrics', 'metrics', 'get', admin_client, get(reverse('metrics'))),
+        Endpoint(
+            'POST login', 'login', 'post', anonymous,
+            lambda i: (reverse('login'), {'username': customer.user.username, 'password': 'synthetic'}), slow=True,
+        ),
+        Endpoint('POST register', 'register', 'post', anonymous, register, slow=True),
+        Endpoint('GET rest_framework:login', 'rest_framework:login', 'get', anonymous, get(reverse('rest_framework:login'))),
+        Endpoint('POST rest_framework:logout', 'rest_framework:logout', 'post', anonymous, get(reverse('rest_framework:logout'))),
+    ]
+
+
+def call(endpoint, i):
+    path, body = endpoint.request(i)
+    method = getattr(endpoint.client, endpoint.method)
+    return lambda: method(path, body, format='json') if body is not None else method(path)
+
+
+def check(endpoint, response):
+    # not only 200 - the browsable API logout redirects
+    if response.status_code >= 400:
+        raise AssertionError(f'{endpoint.name}: {response.status_code} {getattr(response, "data", response.content)!r}')
+
+
+def percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def measure(endpoint, iterations, warmup):
+    """
+    Returns p50/p95/p99 latency in ms, the most queries of one request and
+    the peak memory allocated while handling one request in KiB.
+    """
+    if endpoint.slow:
+        iterations, warmup = min(iterations, SLOW_ITERATIONS), min(warmup, 1)
+    for i in range(warmup):
+        check(endpoint, call(endpoint, i)())
+
+    # garbage of the previous endpoint is not collected on this one's clock
+    gc.collect()
+    latencies, queries = [], 0
+    for i in range(warmup, warmup + iterations):
+        request = call(endpoint, i)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - start) * 1000)
+        check(endpoint, response)
+        queries = max(queries, len(captured.captured_queries))
+
+    request = call(endpoint, warmup + iterations)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        check(endpoint, request())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': queries,
+        'memory_kb': round((peak - before) / 1024, 1),
+    }
+
+
+def compare(baseline, results, threshold, latency_metrics=('p50_ms',), min_ms=2.0, min_kb=64):
+    """
+    Returns (name, metric, baseline value, new value) of every regression:
+    more queries, or latency/memory above the baseline by more than
+    `threshold` (a fraction) and the noise floor. In-process tail latencies
+    are noisy, only the median is compared by default.
+    """
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if new['queries'] > old['queries']:
+            regressions.append((name, 'queries', old['queries'], new['queries']))
+        for metric in latency_metrics:
+            if new[metric] > old[metric] * (1 + threshold) and new[metric] - old[metric] > min_ms:
+                regressions.append((name, metric, old[metric], new[metric]))
+        if new['memory_kb'] > old['memory_kb'] * (1 + threshold) and new['memory_kb'] - old['memory_kb'] > min_kb:
+            regressions.append((name, 'memory_kb', old['memory_kb'], new['memory_kb']))
+    return regressions
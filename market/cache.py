@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class _Flight:
+    """
+    One running computation of a key, the other callers wait for its result.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LRUTTLCache:
+    """
+    Small thread safe in-process cache - least recently used entries are evicted
+    once `max_size` is reached, entries expire `ttl` seconds after they were set.
+    """
+
+    def __init__(self, max_size=1000, ttl=60, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = {}
+        # bumped by every invalidation - a value computed across one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    def get(self, key, default=None):
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation=None):
+        """
+        Stores `value`. With a `generation` from generation() taken before the
+        value was loaded, a value that an invalidation made stale is dropped.
+        """
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._store(key, value)
+
+    def generation(self):
+        return self._generation
+
+    def _store(self, key, value):
+        # caller holds the lock
+        self._data[key] = (self.clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_set(self, key, compute):
+        """
+        Returns the cached value of `key` or stores and returns compute().
+        Concurrent misses of one key are coalesced - the first caller computes,
+        the others wait for its result.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            # a flight may have finished since the miss above
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self.clock():
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, flight.value)
+            return flight.value
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self.loads += 1
+            flight.done.set()
+
+    def delete(self, key):
+        with self._lock:
+            self._generation += 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def delete_where(self, predicate):
+        """
+        Removes every entry whose value matches `predicate`.
+        """
+        with self._lock:
+            self._generation += 1
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'loads': self.loads,
+            'coalesced': self.coalesced,
+        }
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Strong ETag over the values a representation is built from.
+    """
+    return quote_etag(hashlib.sha1(repr(parts).encode('utf-8')).hexdigest())
+
+
+def instance_validators(instance, *parts):
+    """
+    Returns (etag, last_modified) of a single object from its updated_at.
+    """
+    return row_validators(type(instance), instance.pk, instance.updated_at, *parts)
+
+
+def row_validators(model, pk, updated_at, *parts):
+    return make_etag(model._meta.label, pk, updated_at, *parts), updated_at
+
+
+def queryset_validators(queryset, *parts):
+    """
+    Returns (etag, None) of a list, the ETag from max(updated_at) and the row
+    count - one aggregate query, the rows themselves are not loaded.
+
+    Lists send no Last-Modified: a delete leaves max(updated_at) as it was, so
+    If-Modified-Since would answer 304 with a stale list. The count in the ETag
+    changes with it.
+    """
+    values = queryset.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+    return aggregate_validators(queryset, values, parts)
+
+
+async def aqueryset_validators(queryset, *parts):
+    values = await queryset.order_by().aaggregate(count=Count('pk'), last_modified=Max('updated_at'))
+    return aggregate_validators(queryset, values, parts)
+
+
+def aggregate_validators(queryset, values, parts):
+    etag = make_etag(queryset.model._meta.label, values['count'], values['last_modified'], *parts)
+    return etag, None
+
+
+def query_key(request):
+    # the same list in any parameter order
+    return tuple(sorted(request.query_params.lists()))
+
+
+def check_conditions(request, etag, last_modified):
+    """
+    Evaluates If-Match, If-None-Match, If-Modified-Since and If-Unmodified-Since.
+    Returns the 304 or 412 response, None if the request should be processed.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
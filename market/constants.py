@@ -6,4 +6,12 @@ CUSTOMER_TYPE = {
 ORDER_STATUS = {
     'inprogress': 'in_progress',
     'completed' : 'completed'
-}
\ No newline at end of file
+}
+# lower bounds of the offer list facet ranges, each range ends before the next bound
+OFFER_PRICE_FACETS = [0, 50, 100, 250, 500, 1000]
+OFFER_DELIVERY_FACETS = [0, 3, 7, 14, 30]
+# creators with the most offers in the facets
+OFFER_CREATOR_FACETS = 20
+
+# business users per review stats request
+REVIEW_STATS_MAX_IDS = 100
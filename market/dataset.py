@@ -0,0 +1,197 @@
+"""
+Synthetic marketplace data for scale tests, written with batched inserts.
+The same seed on the same starting database gives the same rows.
+"""
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from market.base_info import invalidate_base_info
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+from market.offer_list import invalidate_offer_list
+from market.offers import min_values
+from market.stats import rebuild_stats
+
+FIRST_NAMES = ['Anna', 'Ben', 'Clara', 'David', 'Elena', 'Felix', 'Greta', 'Hannes', 'Ida', 'Jonas', 'Lena', 'Max', 'Nora', 'Paul']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Hoffmann', 'Koch']
+LOCATIONS = ['Berlin', 'Hamburg', 'München', 'Köln', 'Frankfurt', 'Stuttgart', 'Leipzig', 'Dresden']
+SUBJECTS = ['Logo', 'Webseite', 'Flyer', 'Visitenkarten', 'Animation', 'Illustration', 'Social Media Paket', 'App Design', 'Fotografie', 'Texte']
+STYLES = ['minimalistisch', 'modern', 'verspielt', 'klassisch', 'professionell', 'kreativ']
+FEATURES = ['Quelldateien', 'Druckfertig', 'Responsive', 'Mehrere Entwürfe', 'Express', 'Kommerzielle Nutzung']
+
+# offer_type, revisions, price factor, delivery factor - exactly three tiers like the API requires
+TIERS = [
+    ('basic', 1, 1, 1.0),
+    ('standard', 3, 2, 0.7),
+    ('premium', 5, 4, 0.5),
+]
+RATING_WEIGHTS = [5, 5, 15, 35, 40]
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def around(rng, mean):
+    # per user counts vary, the total stays close to count * mean
+    return rng.randint(0, 2 * mean) if mean > 0 else 0
+
+
+def create_users(rng, count, business_ratio, prefix, password, batch_size):
+    """
+    Returns (business_ids, customer_ids). The password is hashed once for all users.
+    """
+    password_hash = make_password(password)
+    types = ['business'] * round(count * business_ratio)
+    types += ['customer'] * (count - len(types))
+    rng.shuffle(types)
+
+    business_ids, customer_ids = [], []
+    for batch in chunks(list(enumerate(types)), batch_size):
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password_hash)
+            for i, _ in batch
+        ])
+        MarketUser.objects.bulk_create([
+            MarketUser(
+                user_id=user.pk, type=user_type,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), location=rng.choice(LOCATIONS),
+            )
+            for user, (_, user_type) in zip(users, batch)
+        ])
+        for user, (_, user_type) in zip(users, batch):
+            (business_ids if user_type == 'business' else customer_ids).append(user.pk)
+    return business_ids, customer_ids
+
+
+def create_offers(rng, business_ids, offers_per_business, batch_size):
+    """
+    Creates the offers of every business user, each with its three details.
+    Returns (detail id, business id, terms) of every detail for the orders.
+    """
+    owners = [business_id for business_id in business_ids for _ in range(around(rng, offers_per_business))]
+    details = []
+    for batch in chunks(owners, batch_size):
+        items = []
+        for business_id in batch:
+            subject, style = rng.choice(SUBJECTS), rng.choice(STYLES)
+            base_price, base_delivery = rng.randint(20, 800), rng.randint(2, 30)
+            tiers = [
+                {
+                    'title': f'{subject} {offer_type}', 'revisions': revisions,
+                    'delivery_time_in_days': max(1, round(base_delivery * delivery_factor)),
+                    'price': base_price * price_factor,
+                    'features': rng.sample(FEATURES, revisions // 2 + 1), 'offer_type': offer_type,
+                }
+                for offer_type, revisions, price_factor, delivery_factor in TIERS
+            ]
+            min_price, min_delivery_time = min_values(tiers)
+            offer = Offer(
+                user_id=business_id, title=f'{subject} {style}', min_price=min_price, min_delivery_time=min_delivery_time,
+                description=f'{style.capitalize()}es {subject} für Ihr Unternehmen, in {tiers[0]["delivery_time_in_days"]} Tagen geliefert.',
+            )
+            items.append((offer, tiers))
+        Offer.objects.bulk_create([offer for offer, _ in items])
+        batch_details = [
+            (OfferDetail(offer_id=offer.pk, **tier), offer.user_id) for offer, tiers in items for tier in tiers
+        ]
+        OfferDetail.objects.bulk_create([detail for detail, _ in batch_details])
+        details += [
+            (detail.pk, business_id, tuple(getattr(detail, field) for field in Order.OFFER_TERMS))
+            for detail, business_id in batch_details
+        ]
+    return details
+
+
+def create_orders(rng, customer_ids, details, orders_per_customer, completed_ratio, batch_size):
+    if not details:
+        return 0
+
+    def orders():
+        for customer_id in customer_ids:
+            for _ in range(around(rng, orders_per_customer)):
+                detail_id, business_id, terms = rng.choice(details)
+                yield Order(
+                    offerdetail_id=detail_id, customer_user_id=customer_id, business_user_id=business_id,
+                    status='completed' if rng.random() < completed_ratio else 'in_progress',
+                    # bulk_create skips Order.save - the terms are copied here
+                    **dict(zip(Order.OFFER_TERMS, terms)),
+                )
+
+    return bulk_create_batches(Order, orders(), batch_size)
+
+
+def create_reviews(rng, customer_ids, business_ids, reviews_per_customer, batch_size):
+    def reviews():
+        for customer_id in customer_ids:
+            # distinct business users - one review per business and reviewer
+            count = min(around(rng, reviews_per_customer), len(business_ids))
+            for business_id in rng.sample(business_ids, count):
+                yield Review(
+                    business_user_id=business_id, reviewer_id=customer_id,
+                    rating=rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+                    description=f'{rng.choice(STYLES).capitalize()} und zuverlässig.',
+                )
+
+    return bulk_create_batches(Review, reviews(), batch_size)
+
+
+def bulk_create_batches(model, objects, batch_size):
+    created = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def generate_dataset(
+    users=1000, business_ratio=0.2, offers_per_business=5, orders_per_customer=5, reviews_per_customer=2,
+    completed_ratio=0.5, seed=42, batch_size=5000, prefix='synthetic', password='synthetic', log=None,
+):
+    """
+    Creates `users` users with their market profiles, offers with three
+    details per business user, orders in both counted states and reviews,
+    in one transaction. The business stats are rebuilt at the end - bulk
+    inserts send no signals. Returns the number of rows per model.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    start = time.perf_counter()
+
+    def step(message):
+        log(f'{time.perf_counter() - start:8.1f}s  {message}')
+
+    with transaction.atomic():
+        business_ids, customer_ids = create_users(rng, users, business_ratio, prefix, password, batch_size)
+        step(f'{len(business_ids)} business and {len(customer_ids)} customer users')
+        details = create_offers(rng, business_ids, offers_per_business, batch_size)
+        step(f'{len(details) // len(TIERS)} offers, {len(details)} details')
+        orders = create_orders(rng, customer_ids, details, orders_per_customer, completed_ratio, batch_size)
+        step(f'{orders} orders')
+        reviews = create_reviews(rng, customer_ids, business_ids, reviews_per_customer, batch_size)
+        step(f'{reviews} reviews')
+        rebuild_stats()
+        step('business stats rebuilt')
+        invalidate_offer_list()
+        invalidate_base_info()
+
+    return {
+        'users': len(business_ids) + len(customer_ids),
+        'business_users': len(business_ids),
+        'customer_users': len(customer_ids),
+        'offers': len(details) // len(TIERS),
+        'offer_details': len(details),
+        'orders': orders,
+        'reviews': reviews,
+    }
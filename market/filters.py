@@ -1,6 +1,8 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from market.models import Offer
+from market.search import search_offers
 
 class OfferFilter(filters.FilterSet):
     min_price = filters.NumberFilter(field_name="min_price", lookup_expr='gte')
@@ -13,4 +15,36 @@ class OfferFilter(filters.FilterSet):
             'creator_id',
             'min_price',
             'max_delivery_time',
-            ]
\ No newline at end of file
+            ]
+
+class OfferSearchFilter(SearchFilter):
+    """
+    SearchFilter backed by the offer full text index, results ranked by relevance
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return search_offers(queryset, self.get_search_terms(request))
+
+
+class OfferOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter with `id` as tiebreaker in the direction of the last field,
+    so every order is total and one index on (field, id) serves both directions.
+    Without ?ordering= search results keep their relevance order.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            fields = [param.strip() for param in params.split(',')]
+            ordering = self.remove_invalid_fields(queryset, fields, view, request)
+            if ordering:
+                return self.with_tiebreaker(ordering)
+        if queryset.query.order_by:
+            return None
+        return self.with_tiebreaker(self.get_default_ordering(view))
+
+    def with_tiebreaker(self, ordering):
+        ordering = [field for field in ordering if field.lstrip('-') not in ('id', 'pk')]
+        descending = bool(ordering) and ordering[-1].startswith('-')
+        return [*ordering, '-id' if descending else 'id']
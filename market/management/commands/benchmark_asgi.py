@@ -0,0 +1,164 @@
+import asyncio
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.paginator import UnorderedObjectListWarning
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from market.models import MarketUser, Offer, OfferDetail
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the throughput of the read endpoints under WSGI (DRF views, thread pool) '
+        'and ASGI (async views, one event loop) on a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=20, help='requests per client')
+        parser.add_argument('--threads', type=int, default=32, help='WSGI worker threads')
+        parser.add_argument('--offers', type=int, default=500)
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='anonymous landing page mix - offer list and base-info come from the in-process caches',
+        )
+
+    def handle(self, *args, **options):
+        # the DRF offer list paginates the unordered default queryset
+        warnings.simplefilter('ignore', UnorderedObjectListWarning)
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            token = self.seed(options['offers'])
+            if options['anonymous']:
+                paths, headers = self.anonymous_paths(), {}
+            else:
+                paths, headers = self.paths(), {'Authorization': f'Token {token}'}
+            total = options['clients'] * options['requests']
+
+            self.stdout.write(f'{options["clients"]} clients, {total} requests per run')
+            self.stdout.write(f'{"":<8}{"seconds":>10}{"req/s":>10}')
+            wsgi = self.run_wsgi(paths, headers, options)
+            self.stdout.write(f'{"wsgi":<8}{wsgi:>10.2f}{total / wsgi:>10.0f}')
+            with override_settings(ASYNC_READ_URLCONF='main.asgi_urls'):
+                asgi = asyncio.run(self.run_asgi(paths, headers, options))
+            self.stdout.write(f'{"asgi":<8}{asgi:>10.2f}{total / asgi:>10.0f}')
+            self.stdout.write(f'asgi/wsgi throughput {wsgi / asgi:.2f}x')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, count):
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business'), type='business')
+        customer = MarketUser.objects.create(user=User.objects.create_user(username='customer'), type='customer')
+        offers = Offer.objects.bulk_create([
+            Offer(user=business, title=f'Angebot {i}', description='Beschreibung', min_price=i % 500, min_delivery_time=i % 30)
+            for i in range(count)
+        ])
+        OfferDetail.objects.bulk_create([
+            OfferDetail(
+                offer=offer, title=offer_type, revisions=1, delivery_time_in_days=3,
+                price=100, features=['Logo'], offer_type=offer_type,
+            )
+            for offer in offers
+            for offer_type in ['basic', 'standard', 'premium']
+        ])
+        self.business, self.offer, self.detail = business, offers[0], OfferDetail.objects.first()
+        return Token.objects.create(user=customer.user).key
+
+    def paths(self):
+        """
+        The mix of one client - authenticated, so the offer list is not served from the response cache.
+        """
+        return [
+            (reverse('offers-list'), 'page_size=19'),
+            (reverse('offers-list'), 'min_price=100&page_size=19'),
+            (reverse('offers-detail', kwargs={'pk': self.offer.pk}), ''),
+            (reverse('offerdetail', kwargs={'pk': self.detail.pk}), ''),
+            (reverse('business-order-count', kwargs={'pk': self.business.pk}), ''),
+            (reverse('base-info'), ''),
+        ]
+
+    def anonymous_paths(self):
+        return [
+            (reverse('offers-list'), ''),
+            (reverse('offers-list'), 'page=2'),
+            (reverse('offers-list'), 'search=angebot'),
+            (reverse('offerdetail', kwargs={'pk': self.detail.pk}), ''),
+            (reverse('base-info'), ''),
+        ]
+
+    def run_wsgi(self, paths, headers, options):
+        application = get_wsgi_application()
+        factory = RequestFactory()
+        meta = {f'HTTP_{name.upper()}': value for name, value in headers.items()}
+
+        def call(path, query):
+            environ = factory._base_environ(PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD='GET', **meta)
+            statuses = []
+            body = application(environ, lambda status, response_headers: statuses.append(status))
+            b''.join(body)
+            body.close()
+            if not statuses[0].startswith('200'):
+                raise RuntimeError(f'{path}?{query}: {statuses[0]}')
+
+        def client(number):
+            for i in range(options['requests']):
+                call(*paths[(number + i) % len(paths)])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(client, range(options['clients'])))
+        return time.perf_counter() - start
+
+    async def run_asgi(self, paths, headers, options):
+        application = get_asgi_application()
+        raw_headers = [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ]
+
+        async def call(path, query):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+                'query_string': query.encode(), 'headers': raw_headers,
+                'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            }
+            disconnect = asyncio.Event()
+            messages = []
+
+            async def receive():
+                if not messages:
+                    messages.append(None)
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            await application(scope, receive, send)
+            disconnect.set()
+            status = sent[0]['status']
+            if status != 200:
+                raise RuntimeError(f'{path}?{query}: {status}')
+
+        async def client(number):
+            for i in range(options['requests']):
+                await call(*paths[(number + i) % len(paths)])
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client(number) for number in range(options['clients'])])
+        return time.perf_counter() - start
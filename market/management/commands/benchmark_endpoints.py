@@ -0,0 +1,110 @@
+import json
+import platform
+import warnings
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from market.benchmarks.endpoints import compare, endpoints, measure, route_names
+from market.dataset import generate_dataset
+
+BASELINE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks every route of market/urls.py in-process on a generated throwaway dataset - '
+        'p50/p95/p99 latency, queries and allocated memory per request. '
+        'Saves the results as baseline or compares them with it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='size of the generated dataset')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', help='only endpoints whose name contains this text')
+        parser.add_argument('--baseline', type=Path, default=BASELINE)
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--save', action='store_true', help='write the results as the new baseline')
+        mode.add_argument('--compare', action='store_true', help='fail on regressions against the baseline')
+        parser.add_argument('--threshold', type=float, default=0.25, help='allowed latency and memory growth, 0.25 = 25%%')
+        parser.add_argument('--tail', action='store_true', help='compare p95 and p99 too, not only p50')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            if not options['baseline'].exists():
+                raise CommandError(f'No baseline at {options["baseline"]}, run with --save first.')
+            baseline = json.loads(options['baseline'].read_text())
+            if baseline['meta']['users'] != options['users']:
+                self.stdout.write(self.style.WARNING(f'Baseline was measured with {baseline["meta"]["users"]} users.'))
+
+        warnings.simplefilter('ignore', UnorderedObjectListWarning)
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            generate_dataset(users=options['users'])
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['save']:
+            self.save(options, results)
+        if baseline is not None:
+            self.compare(baseline['endpoints'], results, options)
+
+    def run(self, options):
+        cases = endpoints()
+        missing = route_names() - {endpoint.route for endpoint in cases}
+        if missing:
+            raise CommandError(f'Routes without benchmark: {", ".join(sorted(missing))}')
+        if options['only']:
+            cases = [endpoint for endpoint in cases if options['only'] in endpoint.name]
+
+        self.stdout.write(f'{"endpoint":<42}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}{"KiB":>9}')
+        results = {}
+        for endpoint in cases:
+            try:
+                result = measure(endpoint, options['iterations'], options['warmup'])
+            except AssertionError as error:
+                raise CommandError(str(error))
+            results[endpoint.name] = result
+            self.stdout.write(
+                f'{endpoint.name:<42}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                f'{result["queries"]:>9}{result["memory_kb"]:>9.1f}'
+            )
+        return results
+
+    def save(self, options, results):
+        if options['only'] and options['baseline'].exists():
+            # keep the endpoints that were not run
+            results = {**json.loads(options['baseline'].read_text())['endpoints'], **results}
+        data = {
+            'meta': {
+                'users': options['users'],
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'machine': platform.machine(),
+            },
+            'endpoints': results,
+        }
+        options['baseline'].parent.mkdir(parents=True, exist_ok=True)
+        options['baseline'].write_text(json.dumps(data, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Saved the baseline to {options["baseline"]}.'))
+
+    def compare(self, baseline, results, options):
+        for name in sorted(results.keys() - baseline.keys()):
+            self.stdout.write(f'{name}: not in the baseline')
+        latency_metrics = ['p50_ms', 'p95_ms', 'p99_ms'] if options['tail'] else ['p50_ms']
+        regressions = compare(baseline, results, options['threshold'], latency_metrics)
+        for name, metric, old, new in regressions:
+            self.stdout.write(self.style.ERROR(f'{name}: {metric} {old} -> {new}'))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regressions against the baseline.')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import offer_list_values, serialize_offer_list
+from market.serializers import OfferListSerializer
+
+PAGE_SIZES = [19, 100, 1000]
+
+
+class Command(BaseCommand):
+    help = 'Compares OfferListSerializer with the values based offer list on a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=5000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options['offers'], options['seed'])
+            self.run_pages(options['runs'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, count, seed):
+        rng = random.Random(seed)
+        user = User.objects.create_user(username='benchmark')
+        marketuser = MarketUser.objects.create(user=user, type='business')
+        offers = Offer.objects.bulk_create([
+            Offer(
+                user=marketuser,
+                title=f'Angebot {i}',
+                description='Beschreibung ' * rng.randint(5, 50),
+                image=f'offer-images/{i}.png' if rng.random() < 0.5 else None,
+                min_price=rng.randint(10, 1000),
+                min_delivery_time=rng.randint(1, 30),
+            )
+            for i in range(count)
+        ], batch_size=5000)
+        OfferDetail.objects.bulk_create([
+            OfferDetail(
+                offer=offer, title=offer_type, revisions=rng.randint(1, 5), delivery_time_in_days=rng.randint(1, 30),
+                price=rng.randint(10, 1000), features=['Logo', 'Visitenkarte'], offer_type=offer_type,
+            )
+            for offer in offers
+            for offer_type in ['basic', 'standard', 'premium']
+        ], batch_size=5000)
+        self.stdout.write(f'Seeded {count} offers.')
+
+    def timed(self, render, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def run_pages(self, runs):
+        renderer = JSONRenderer()
+        base = Offer.objects.select_related('user__user').prefetch_related('details').order_by('-updated_at', '-id')
+
+        def serializer_page(page_size):
+            data = OfferListSerializer(base[:page_size], many=True, context={'request': None}).data
+            return renderer.render(data)
+
+        def fast_page(page_size):
+            return renderer.render(serialize_offer_list(offer_list_values(base[:page_size])))
+
+        self.stdout.write(f'{"page size":<12}{"serializer ms":>15}{"values ms":>12}{"speedup":>10}')
+        for page_size in PAGE_SIZES:
+            if serializer_page(page_size) != fast_page(page_size):
+                self.stderr.write(f'Output differs at page size {page_size}.')
+                continue
+            old_ms = self.timed(lambda: serializer_page(page_size), runs)
+            new_ms = self.timed(lambda: fast_page(page_size), runs)
+            self.stdout.write(f'{page_size:<12}{old_ms:>15.2f}{new_ms:>12.2f}{old_ms / new_ms:>9.1f}x')
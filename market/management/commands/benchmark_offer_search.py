@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from market.models import MarketUser, Offer
+from market.search import icontains_query, search_offers
+
+WORDS = [
+    'logo', 'design', 'website', 'grafik', 'branding', 'video', 'schnitt', 'animation', 'texte', 'übersetzung',
+    'social', 'media', 'marketing', 'seo', 'wordpress', 'shop', 'app', 'python', 'django', 'datenbank',
+    'illustration', 'flyer', 'visitenkarte', 'podcast', 'audio', 'mixing', 'fotografie', 'retusche', 'beratung', 'coaching',
+]
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'ber', 'dan', 'fel', 'gor', 'hin', 'ost', 'wei', 'zu', 'sch']
+
+QUERIES = ['logo', 'wordpress shop', 'retusche', 'anim', 'python django datenbank', 'nichtvorhanden']
+
+
+def build_vocabulary(rng, size=5000):
+    # a few common service words and a long tail of filler words, like a real catalogue
+    filler = {''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size)}
+    return WORDS + sorted(filler)
+
+
+class Command(BaseCommand):
+    help = 'Compares the full text offer search with the icontains search on a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=100000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=19)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.seed(options['offers'], options['seed'])
+            self.run_queries(options['runs'], options['page_size'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, count, seed):
+        rng = random.Random(seed)
+        user = User.objects.create_user(username='benchmark')
+        marketuser = MarketUser.objects.create(user=user, type='business')
+        vocabulary = build_vocabulary(rng)
+        # zipf like weights - the first words are the most frequent
+        weights = [1 / (rank + 10) for rank in range(len(vocabulary))]
+        batch = []
+        for i in range(count):
+            batch.append(Offer(
+                user=marketuser,
+                title=' '.join(rng.choices(vocabulary, weights, k=3)).title(),
+                description=' '.join(rng.choices(vocabulary, weights, k=30)),
+                min_price=rng.randint(10, 1000),
+                min_delivery_time=rng.randint(1, 30),
+            ))
+            if len(batch) == 5000:
+                Offer.objects.bulk_create(batch)
+                batch = []
+        Offer.objects.bulk_create(batch)
+        self.stdout.write(f'Seeded {count} offers.')
+
+    def timed(self, queryset, runs, page_size):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def run_queries(self, runs, page_size):
+        self.stdout.write(f'{"query":<28}{"hits":>8}{"icontains ms":>15}{"fts ms":>10}{"speedup":>10}')
+        base = Offer.objects.all()
+        for query in QUERIES:
+            terms = query.split()
+            old = base.filter(icontains_query(terms)).order_by('id')
+            new = search_offers(base, terms)
+            old_ms = self.timed(old, runs, page_size)
+            new_ms = self.timed(new, runs, page_size)
+            self.stdout.write(f'{query:<28}{new.count():>8}{old_ms:>15.2f}{new_ms:>10.2f}{old_ms / new_ms:>9.1f}x')
@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from market.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a synthetic dataset for scale tests - users with market profiles, offers with '
+        'three details, orders and reviews. Counts per user vary around the given means.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--business-ratio', type=float, default=0.2, help='share of business users')
+        parser.add_argument('--offers-per-business', type=int, default=5)
+        parser.add_argument('--orders-per-customer', type=int, default=5)
+        parser.add_argument('--reviews-per-customer', type=int, default=2)
+        parser.add_argument('--completed-ratio', type=float, default=0.5, help='share of completed orders')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='synthetic', help='username prefix')
+        parser.add_argument('--password', default='synthetic', help='password of every generated user')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['business_ratio'] <= 1 or not 0 <= options['completed_ratio'] <= 1:
+            raise CommandError('Ratios must be between 0 and 1.')
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f'Users with the prefix {options["prefix"]!r} exist, choose another --prefix.')
+
+        counts = generate_dataset(
+            users=options['users'],
+            business_ratio=options['business_ratio'],
+            offers_per_business=options['offers_per_business'],
+            orders_per_customer=options['orders_per_customer'],
+            reviews_per_customer=options['reviews_per_customer'],
+            completed_ratio=options['completed_ratio'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Generated {summary}.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from market.stats import find_drift, rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per business stats table from orders and reviews or checks it for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, do not rebuild.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = find_drift()
+            for business_user_id, (stored, expected) in sorted(drift.items()):
+                self.stdout.write(f'Marketuser {business_user_id}: stored {stored}, expected {expected}')
+            if drift:
+                raise CommandError(f'{len(drift)} business stats rows drifted.')
+            self.stdout.write(self.style.SUCCESS('Business stats are in sync.'))
+            return
+
+        rows = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} business stats rows.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from market.search import check_search_index, is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the offer full text search index or checks it against the offer table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only run the integrity check, do not rebuild.')
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError('The offer search index needs SQLite with FTS5.')
+
+        if options['check']:
+            try:
+                check_search_index()
+            except DatabaseError as error:
+                raise CommandError(f'Offer search index is out of sync: {error}')
+            self.stdout.write(self.style.SUCCESS('Offer search index is in sync.'))
+            return
+
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the offer search index.'))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from market.models import Review
+
+
+def duplicate_reviews():
+    """
+    (business_user_id, reviewer_id, ids) of every pair with more than one
+    review, the newest id last.
+    """
+    pairs = (
+        Review.objects.values('business_user', 'reviewer')
+        .annotate(count=Count('pk'))
+        .filter(count__gt=1)
+        .order_by('business_user', 'reviewer')
+    )
+    return [
+        (
+            pair['business_user'],
+            pair['reviewer'],
+            list(Review.objects.filter(business_user=pair['business_user'], reviewer=pair['reviewer']).order_by('pk').values_list('pk', flat=True)),
+        )
+        for pair in pairs
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Lists the business users reviewed more than once by the same reviewer. With --delete keeps '
+        'the newest review of each pair and deletes the others. Run it before migrating to '
+        'market 0008, whose unique constraint fails on such duplicates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Delete all but the newest review of each pair.')
+
+    def handle(self, *args, **options):
+        duplicates = duplicate_reviews()
+        if not duplicates:
+            self.stdout.write(self.style.SUCCESS('No duplicate reviews.'))
+            return
+
+        extra = []
+        for business_user_id, reviewer_id, ids in duplicates:
+            self.stdout.write(f'Marketuser {business_user_id} reviewed by {reviewer_id}: reviews {ids}, keeping {ids[-1]}')
+            extra += ids[:-1]
+        if not options['delete']:
+            self.stdout.write(f'{len(extra)} reviews would be deleted, run again with --delete.')
+            return
+
+        with transaction.atomic():
+            for review in Review.objects.filter(pk__in=extra).values('pk', 'business_user', 'reviewer', 'rating', 'description'):
+                self.stdout.write(f'Deleting {review}')
+            # without the delete signals - the stats table may not exist before the migrations ran,
+            # rebuild_business_stats recounts it afterwards
+            table, column = connection.ops.quote_name(Review._meta.db_table), connection.ops.quote_name(Review._meta.pk.column)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(extra))})', extra)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {len(extra)} reviews. Run rebuild_business_stats once all migrations are applied.'
+        ))
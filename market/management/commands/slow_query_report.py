@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from market.slow_queries import log_files, summarize
+
+
+class Command(BaseCommand):
+    help = 'Summarises the slow query log - the query fingerprints with the most total time first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG, help='the log, its rotated backups are read too')
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--plans', action='store_true', help='print SQL, parameters and plan of every offender')
+
+    def handle(self, *args, **options):
+        paths = log_files(options['log'])
+        if not paths:
+            raise CommandError(f'No slow query log at {options["log"]}.')
+        offenders = summarize(paths)[:options['top']]
+        if not offenders:
+            self.stdout.write(self.style.SUCCESS('No slow queries logged.'))
+            return
+
+        self.stdout.write(f'{"total ms":>10}{"count":>7}{"mean ms":>9}{"max ms":>9}  {"fingerprint":<18}views')
+        for offender in offenders:
+            self.stdout.write(
+                f'{offender["total_ms"]:>10.1f}{offender["count"]:>7}{offender["mean_ms"]:>9.1f}{offender["max_ms"]:>9.1f}'
+                f'  {offender["fingerprint"]:<18}{", ".join(sorted(offender["views"]))}'
+            )
+            self.stdout.write(f'    {offender["statement"] or "(statement rotated out of the log)"}')
+            if options['plans'] and offender['sql']:
+                self.stdout.write(f'    sql: {offender["sql"]}')
+                self.stdout.write(f'    params: {offender["params"]}')
+                for step in offender['plan'] or []:
+                    self.stdout.write(f'    plan: {step}')
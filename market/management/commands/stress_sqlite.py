@@ -0,0 +1,140 @@
+import copy
+import os
+import tempfile
+import threading
+import time
+import warnings
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import OperationalError, connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from market.models import MarketUser, Offer, OfferDetail
+
+PROFILES = {
+    'development': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}},
+    'production': settings.SQLITE_PRODUCTION,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates orders and reads lists from many threads through the API on a throwaway '
+        'SQLite file, once per database profile. Reports lock errors and throughput.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--profile', choices=sorted(PROFILES), action='append', help='default: all profiles')
+
+    def handle(self, *args, **options):
+        warnings.simplefilter('ignore', UnorderedObjectListWarning)
+        setup_test_environment(debug=False)
+        database = settings.DATABASES['default']
+        saved = {key: copy.deepcopy(database.get(key)) for key in ['CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS', 'TEST']}
+        try:
+            self.stdout.write(f'{"profile":<14}{"writes":>8}{"reads":>8}{"errors":>8}{"writes/s":>10}{"reads/s":>10}')
+            for profile in options['profile'] or sorted(PROFILES):
+                with tempfile.TemporaryDirectory() as directory:
+                    result = self.run_profile(profile, os.path.join(directory, 'stress.sqlite3'), options)
+                writes, reads, errors = result
+                seconds = options['seconds']
+                self.stdout.write(
+                    f'{profile:<14}{writes:>8}{reads:>8}{errors:>8}{writes / seconds:>10.1f}{reads / seconds:>10.1f}'
+                )
+        finally:
+            database.update(saved)
+            teardown_test_environment()
+
+    def run_profile(self, profile, path, options):
+        database = settings.DATABASES['default']
+        connections.close_all()
+        # every thread opens its connection from this settings dict
+        database.update(copy.deepcopy(PROFILES[profile]))
+        database['TEST']['NAME'] = path
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            return self.run_threads(*self.seed(), options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self):
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business'), type='business')
+        customer = MarketUser.objects.create(user=User.objects.create_user(username='customer'), type='customer')
+        offers = Offer.objects.bulk_create([
+            Offer(user=business, title=f'Angebot {i}', description='Beschreibung', min_price=10, min_delivery_time=3)
+            for i in range(50)
+        ])
+        details = OfferDetail.objects.bulk_create([
+            OfferDetail(offer=offer, title='basic', revisions=1, delivery_time_in_days=3, price=10, features=[], offer_type='basic')
+            for offer in offers
+        ])
+        return (
+            Token.objects.create(user=customer.user).key,
+            Token.objects.create(user=business.user).key,
+            business.pk,
+            [detail.pk for detail in details],
+        )
+
+    def run_threads(self, customer_token, business_token, business_id, detail_ids, options):
+        deadline = time.perf_counter() + options['seconds']
+        counts = {'writes': 0, 'reads': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def writer(number):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {customer_token}')
+            i = number
+            while time.perf_counter() < deadline:
+                i += 1
+                try:
+                    response = client.post(reverse('orders-list'), {'offer_detail_id': detail_ids[i % len(detail_ids)]}, format='json')
+                    count('writes' if response.status_code == 201 else 'errors')
+                except OperationalError:
+                    # "database is locked"
+                    count('errors')
+
+        def reader(number):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {business_token}')
+            # reads of a fixed size - the full order list grows with every write
+            urls = [
+                reverse('orders-list') + '?cursor=',
+                reverse('offers-list'),
+                reverse('business-order-count', kwargs={'pk': business_id}),
+            ]
+            i = number
+            while time.perf_counter() < deadline:
+                i += 1
+                try:
+                    response = client.get(urls[i % len(urls)])
+                    count('reads' if response.status_code < 400 else 'errors')
+                except OperationalError:
+                    count('errors')
+
+        def run(target, number):
+            try:
+                target(number)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(writer, n)) for n in range(options['writers'])]
+        threads += [threading.Thread(target=run, args=(reader, n)) for n in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts['writes'], counts['reads'], counts['errors']
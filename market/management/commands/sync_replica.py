@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Copies the primary SQLite database into the replica file (DJANGO_REPLICA_NAME) '
+        'with the SQLite backup API. With --interval it repeats, the interval is the replica lag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='seconds between copies, default: copy once')
+
+    def handle(self, *args, **options):
+        primary, replica = settings.DATABASES['default'], settings.DATABASES['replica']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3' or replica['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Only SQLite is copied - other databases replicate themselves.')
+        if str(primary['NAME']) == str(replica['NAME']):
+            raise CommandError('The replica is the primary file, set DJANGO_REPLICA_NAME.')
+
+        while True:
+            start = time.perf_counter()
+            self.copy(primary['NAME'], replica['NAME'])
+            self.stdout.write(f'copied in {(time.perf_counter() - start) * 1000:.0f} ms')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source_name, target_name):
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name, timeout=20)
+        try:
+            # a consistent snapshot, the primary stays writable while it is read
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,257 @@
+"""
+Request metrics of MetricsMiddleware in the Prometheus text format, served by
+MetricsView - latency histograms, request and query counts per route name,
+requests in flight and the counters of the in-process caches.
+
+Every thread counts into its own store, so recording a request takes no lock;
+a scrape sums the stores of all threads. With settings.METRICS_DIR every worker
+process writes its totals to <pid>.json in that directory, at most every
+METRICS_FLUSH_SECONDS, and a scrape adds the files of the other processes.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# upper bounds in seconds, a last bucket counts the slower requests
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+CACHE_COUNTERS = ['hits', 'misses', 'evictions', 'invalidations', 'loads', 'coalesced']
+
+
+class Series:
+    __slots__ = ('buckets', 'sum', 'queries')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.queries = 0
+
+
+class ThreadStore:
+    """
+    The metrics one thread recorded - only that thread writes them.
+    """
+
+    def __init__(self):
+        self.series = {}
+        self.in_flight = 0
+
+
+_local = threading.local()
+_stores = []
+_stores_lock = threading.Lock()
+
+
+def thread_store():
+    store = getattr(_local, 'store', None)
+    if store is None:
+        store = _local.store = ThreadStore()
+        # once per thread
+        with _stores_lock:
+            _stores.append(store)
+    return store
+
+
+def observe(route, method, status, seconds, queries):
+    store = thread_store()
+    key = (route or 'unmatched', method if method in METHODS else 'other', f'{status // 100}xx')
+    series = store.series.get(key)
+    if series is None:
+        series = store.series[key] = Series()
+    series.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+    series.sum += seconds
+    series.queries += queries
+
+
+def caches():
+    from market.authentication import token_cache
+    from market.base_info import base_info_cache
+    from market.offer_list import offer_list_cache
+    from market.replica import pinned_clients
+
+    return {
+        'token': token_cache,
+        'offer_list': offer_list_cache,
+        'base_info': base_info_cache,
+        'replica_pins': pinned_clients,
+    }
+
+
+def add_series(totals, key, buckets, seconds, queries):
+    row = totals['requests'].get(key)
+    if row is None:
+        totals['requests'][key] = [list(buckets), seconds, queries]
+        return
+    row[0] = [total + count for total, count in zip(row[0], buckets)]
+    row[1] += seconds
+    row[2] += queries
+
+
+def process_totals():
+    """
+    The metrics of all threads of this process.
+    """
+    totals = {'requests': {}, 'in_flight': 0, 'caches': {}}
+    with _stores_lock:
+        stores = list(_stores)
+    for store in stores:
+        totals['in_flight'] += store.in_flight
+        # copying the items is atomic, the owning thread may add series meanwhile
+        for key, series in list(store.series.items()):
+            add_series(totals, key, series.buckets, series.sum, series.queries)
+    for name, cache in caches().items():
+        stats = cache.stats()
+        totals['caches'][name] = {counter: stats[counter] for counter in [*CACHE_COUNTERS, 'size']}
+    return totals
+
+
+def add_process(totals, data, alive):
+    """
+    Adds the file of another process. Gauges only count while it runs, its
+    counters stay after it exited.
+    """
+    for *key, buckets, seconds, queries in data['requests']:
+        if len(buckets) == len(BUCKETS) + 1:
+            add_series(totals, tuple(key), buckets, seconds, queries)
+    if alive:
+        totals['in_flight'] += data['in_flight']
+    for name, counters in data['caches'].items():
+        merged = totals['caches'].setdefault(name, dict.fromkeys([*CACHE_COUNTERS, 'size'], 0))
+        for counter in CACHE_COUNTERS:
+            merged[counter] += counters.get(counter, 0)
+        if alive:
+            merged['size'] += counters.get('size', 0)
+
+
+def is_alive(pid):
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_flush_lock = threading.Lock()
+_last_flush = None
+
+
+def flush(directory):
+    global _last_flush
+    if _last_flush is None:
+        # the last requests of a stopping worker
+        atexit.register(maybe_flush, force=True)
+    _last_flush = time.monotonic()
+    totals = process_totals()
+    data = {
+        'requests': [[*key, *row] for key, row in totals['requests'].items()],
+        'in_flight': totals['in_flight'],
+        'caches': totals['caches'],
+    }
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(data, file)
+    os.replace(f'{path}.tmp', path)
+
+
+def maybe_flush(force=False):
+    """
+    Writes the file of this process when METRICS_FLUSH_SECONDS have passed,
+    unless another thread is writing it right now.
+    """
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return
+    if not force and _last_flush is not None and time.monotonic() - _last_flush < settings.METRICS_FLUSH_SECONDS:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        flush(directory)
+    finally:
+        _flush_lock.release()
+
+
+def totals():
+    """
+    The metrics of this process and of the other processes in
+    settings.METRICS_DIR.
+    """
+    result = process_totals()
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return result
+    maybe_flush(force=True)
+    for name in os.listdir(directory):
+        pid, _, extension = name.partition('.')
+        if extension != 'json' or not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        add_process(result, data, is_alive(int(pid)))
+    return result
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**values):
+    return '{' + ','.join(f'{name}="{label_value(value)}"' for name, value in values.items()) + '}'
+
+
+def render(totals):
+    lines = []
+
+    def family(name, kind, description):
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    requests = sorted(totals['requests'].items())
+    family('market_http_request_duration_seconds', 'histogram', 'Request latency by route name, method and status class.')
+    for (route, method, status), (buckets, seconds, _) in requests:
+        cumulative = 0
+        for bound, count in zip([*BUCKETS, '+Inf'], buckets):
+            cumulative += count
+            lines.append(
+                f'market_http_request_duration_seconds_bucket{labels(route=route, method=method, status=status, le=bound)} {cumulative}'
+            )
+        series = labels(route=route, method=method, status=status)
+        lines.append(f'market_http_request_duration_seconds_sum{series} {seconds}')
+        lines.append(f'market_http_request_duration_seconds_count{series} {cumulative}')
+
+    family('market_http_requests_total', 'counter', 'Requests by route name, method and status class.')
+    for (route, method, status), (buckets, _, _) in requests:
+        lines.append(f'market_http_requests_total{labels(route=route, method=method, status=status)} {sum(buckets)}')
+
+    family('market_db_queries_total', 'counter', 'Database queries by route name, method and status class.')
+    for (route, method, status), (_, _, queries) in requests:
+        lines.append(f'market_db_queries_total{labels(route=route, method=method, status=status)} {queries}')
+
+    family('market_http_requests_in_flight', 'gauge', 'Requests being handled right now.')
+    lines.append(f'market_http_requests_in_flight {totals["in_flight"]}')
+
+    cache_totals = sorted(totals['caches'].items())
+    for counter in CACHE_COUNTERS:
+        family(f'market_cache_{counter}_total', 'counter', f'In-process cache {counter}.')
+        for name, counters in cache_totals:
+            lines.append(f'market_cache_{counter}_total{labels(cache=name)} {counters[counter]}')
+    family('market_cache_entries', 'gauge', 'Entries in the in-process caches.')
+    for name, counters in cache_totals:
+        lines.append(f'market_cache_entries{labels(cache=name)} {counters["size"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,241 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+
+from market.authentication import token_key
+from market.metrics import maybe_flush, observe, thread_store
+from market.replica import PIN_COOKIE, PIN_SECONDS, is_pinned, pin_client, replica_alias, replica_reads
+from market.slow_queries import current_request, install as install_slow_query_log
+from market.timing import SECTIONS, collect, install, install_query_timing
+from market.utils import view_name
+
+READ_METHODS = ('GET', 'HEAD')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+timing_logger = logging.getLogger('market.timing')
+
+# filled in with % in one go, the view name is added when the request resolved
+SERVER_TIMING_HEADER = 'db;dur=%.2f;desc="%d queries"' + ''.join(f', {section};dur=%.2f' for section in SECTIONS[1:]) + ', total;dur=%.2f'
+
+
+class AsyncReadRoutesMiddleware:
+    """
+    Opt-in with settings.ASYNC_READ_URLCONF. Resolves GET and HEAD requests
+    under ASGI with that URLconf, which serves the high volume reads with async
+    views. WSGI requests and writes keep the DRF views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.urlconf = getattr(settings, 'ASYNC_READ_URLCONF', None)
+        if not self.urlconf:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if isinstance(request, ASGIRequest) and request.method in READ_METHODS:
+            request.urlconf = self.urlconf
+        return await self.get_response(request)
+
+
+def client_keys(request):
+    keys = []
+    token = token_key(request)
+    if token:
+        keys.append(('token', token))
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        keys.append(('session', session))
+    return keys
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets safe requests read from settings.READ_REPLICA (see market.replica).
+    A successful write pins its client to the primary for
+    READ_REPLICA_PIN_SECONDS, so the client reads its own writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.replica_allowed(request)):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        with replica_reads(self.replica_allowed(request)):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def replica_allowed(self, request):
+        return (
+            replica_alias() is not None
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and not any(is_pinned(key) for key in client_keys(request))
+        )
+
+    def process_response(self, request, response):
+        if replica_alias() is None or request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        keys = client_keys(request)
+        # login and registration hand out the token the client continues with
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict) and isinstance(data.get('token'), str):
+            keys.append(('token', data['token']))
+        for key in keys:
+            pin_client(key)
+        # other workers only see the pin through the cookie
+        response.set_cookie(PIN_COOKIE, '1', max_age=PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Opt-in with settings.SERVER_TIMING. Reports the database, serializer,
+    authentication and permission time of every request in a Server-Timing
+    header, tagged with the resolved view name. With settings.SERVER_TIMING_LOG
+    also as one JSON log line on the market.timing logger.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed()
+        install()
+        self.get_response = get_response
+        # once - the check is not free and this runs on every request
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with collect() as timings:
+            response = self.get_response(request)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        with collect() as timings:
+            response = await self.get_response(request)
+        return self.report(request, response, timings)
+
+    def report(self, request, response, timings):
+        total = timings.total() * 1000
+        durations = [timings.durations[section] * 1000 for section in SECTIONS]
+        name = view_name(request)
+        header = SERVER_TIMING_HEADER % (durations[0], timings.queries, *durations[1:], total)
+        response['Server-Timing'] = f'{header}, view;desc="{name}"' if name else header
+        if timing_logger.isEnabledFor(logging.INFO):
+            line = {
+                'view': name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'total_ms': round(total, 2),
+            }
+            for section, duration in zip(SECTIONS, durations):
+                line[f'{section}_ms'] = round(duration, 2)
+            timing_logger.info(json.dumps(line))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Opt-in with settings.METRICS. Records the latency, status class and query
+    count of every request under its view name for market.metrics, and the
+    requests in flight.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS', False):
+            raise MiddlewareNotUsed()
+        install_query_timing()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        store = thread_store()
+        store.in_flight += 1
+        start = time.perf_counter()
+        try:
+            with collect() as timings:
+                response = self.get_response(request)
+        finally:
+            store.in_flight -= 1
+        return self.record(request, response, time.perf_counter() - start, timings)
+
+    async def __acall__(self, request):
+        # the event loop thread - worker threads of the view report through the timings
+        store = thread_store()
+        store.in_flight += 1
+        start = time.perf_counter()
+        try:
+            with collect() as timings:
+                response = await self.get_response(request)
+        finally:
+            store.in_flight -= 1
+        return self.record(request, response, time.perf_counter() - start, timings)
+
+    def record(self, request, response, seconds, timings):
+        observe(view_name(request), request.method, response.status_code, seconds, timings.queries)
+        maybe_flush()
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Opt-in with settings.SLOW_QUERY_MS. Tags the slow queries of a request with
+    its view name, see market.slow_queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if getattr(settings, 'SLOW_QUERY_MS', None) is None:
+            raise MiddlewareNotUsed()
+        install_slow_query_log()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with current_request(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with current_request(request):
+            return await self.get_response(request)
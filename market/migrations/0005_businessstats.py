@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_business_stats(apps, schema_editor):
+    BusinessStats = apps.get_model('market', 'BusinessStats')
+    Order = apps.get_model('market', 'Order')
+    Review = apps.get_model('market', 'Review')
+
+    stats = {}
+    orders = Order.objects.values('business_user').annotate(
+        orders_in_progress=Count('pk', filter=Q(status='in_progress')),
+        orders_completed=Count('pk', filter=Q(status='completed')),
+    )
+    for item in orders:
+        stats.setdefault(item.pop('business_user'), {}).update(item)
+    reviews = Review.objects.values('business_user').annotate(review_count=Count('pk'), rating_sum=Sum('rating'))
+    for item in reviews:
+        stats.setdefault(item.pop('business_user'), {}).update(item)
+
+    BusinessStats.objects.bulk_create(
+        BusinessStats(business_user_id=business_user_id, **counters)
+        for business_user_id, counters in stats.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0004_alter_marketuser_working_hours_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessStats',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='market.marketuser')),
+                ('orders_in_progress', models.IntegerField(default=0)),
+                ('orders_completed', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_business_stats, migrations.RunPython.noop),
+    ]
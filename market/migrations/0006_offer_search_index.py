@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# The index as of this migration - market.search keeps the current SQL for the
+# post_migrate hook and rebuild_offer_search, later changes get their own migration.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS market_offer_fts USING fts5(
+        title, description, content='market_offer', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS market_offer_fts_ai AFTER INSERT ON market_offer BEGIN
+        INSERT INTO market_offer_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS market_offer_fts_ad AFTER DELETE ON market_offer BEGIN
+        INSERT INTO market_offer_fts(market_offer_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS market_offer_fts_au AFTER UPDATE OF title, description ON market_offer BEGIN
+        INSERT INTO market_offer_fts(market_offer_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO market_offer_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO market_offer_fts(market_offer_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS market_offer_fts_ai',
+    'DROP TRIGGER IF EXISTS market_offer_fts_ad',
+    'DROP TRIGGER IF EXISTS market_offer_fts_au',
+    'DROP TABLE IF EXISTS market_offer_fts',
+]
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite only, other databases search with icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0005_businessstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
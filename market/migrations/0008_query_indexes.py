@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:51
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_reviews(apps, schema_editor):
+    """
+    The unique constraint below needs one review per business user and
+    reviewer. Stops with the offending pairs instead of deleting reviews -
+    `manage.py remove_duplicate_reviews` lists and removes them.
+    """
+    Review = apps.get_model('market', 'Review')
+    duplicates = list(
+        Review.objects.values_list('business_user', 'reviewer')
+        .annotate(count=Count('pk'))
+        .filter(count__gt=1)
+        .order_by('business_user', 'reviewer')
+    )
+    if duplicates:
+        report = '\n'.join(
+            f'  business user {business_user}, reviewer {reviewer}: {count} reviews'
+            for business_user, reviewer, count in duplicates
+        )
+        raise CommandError(
+            f'{len(duplicates)} business user and reviewer pairs have more than one review:\n{report}\n'
+            'Run `manage.py remove_duplicate_reviews` to review them and '
+            '`manage.py remove_duplicate_reviews --delete` to keep only the newest, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0007_offer_updated_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['min_price'], name='offer_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['min_delivery_time'], name='offer_min_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['business_user', 'status'], name='order_business_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['business_user', 'updated_at'], name='review_business_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['business_user', 'rating'], name='review_business_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'updated_at'], name='review_reviewer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'rating'], name='review_reviewer_rating_idx'),
+        ),
+        migrations.RunPython(check_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('business_user', 'reviewer'), name='unique_review_per_business_user'),
+        ),
+    ]
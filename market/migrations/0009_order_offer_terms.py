@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+OFFER_TERMS = ['title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
+
+
+def copy_offer_terms(apps, schema_editor):
+    Order = apps.get_model('market', 'Order')
+    OfferDetail = apps.get_model('market', 'OfferDetail')
+    detail = OfferDetail.objects.filter(pk=OuterRef('offerdetail_id'))
+    Order.objects.update(**{
+        field: Subquery(detail.values(field)[:1])
+        for field in OFFER_TERMS
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0008_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='title',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='revisions',
+            field=models.IntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_time_in_days',
+            field=models.IntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='features',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='offer_type',
+            field=models.CharField(default='', max_length=30),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_offer_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0009_order_offer_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marketuser',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
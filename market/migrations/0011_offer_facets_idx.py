@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0010_marketuser_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['user', 'min_price', 'min_delivery_time'], name='offer_facets_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_rating_counters(apps, schema_editor):
+    """
+    Counts the existing reviews per business user and star rating.
+    """
+    Review = apps.get_model('market', 'Review')
+    BusinessStats = apps.get_model('market', 'BusinessStats')
+
+    counts = Review.objects.values('business_user').annotate(
+        **{f'rating_{rating}': Count('pk', filter=Q(rating=rating)) for rating in range(1, 6)}
+    )
+    for item in counts:
+        business_user_id = item.pop('business_user')
+        BusinessStats.objects.get_or_create(business_user_id=business_user_id)
+        BusinessStats.objects.filter(pk=business_user_id).update(**item)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0011_offer_facets_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessstats',
+            name='rating_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='businessstats',
+            name='rating_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='businessstats',
+            name='rating_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='businessstats',
+            name='rating_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='businessstats',
+            name='rating_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_rating_counters, migrations.RunPython.noop),
+    ]
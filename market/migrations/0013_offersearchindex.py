@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0012_businessstats_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSearchIndex',
+            fields=[
+                ('offer', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='market.offer')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('document', models.TextField(db_column='market_offer_fts')),
+            ],
+            options={
+                'db_table': 'market_offer_fts',
+                'managed': False,
+            },
+        ),
+    ]
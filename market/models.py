@@ -2,12 +2,14 @@ import random
 from django.db import models
 from django.contrib.auth.models import User
 from market.constants import CUSTOMER_TYPE, ORDER_STATUS
+from market.search import Match
 
 class MarketUser(models.Model):
     #registration fields
     user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
     #autoadded fields
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     #patch fields
     first_name = models.CharField(max_length=30, blank=True, null=True)
     last_name = models.CharField(max_length=30, blank=True, null=True)
@@ -32,9 +34,37 @@ class Offer(models.Model):
     min_price = models.IntegerField(blank=True, null=True, default=int(random.random()*100))
     min_delivery_time = models.IntegerField(blank=True, null=True, default=int(random.random()*100))
 
+    class Meta:
+        indexes = [
+            # keyset pagination key of the offer list
+            models.Index(fields=['updated_at', 'id'], name='offer_updated_id_idx'),
+            # price and delivery filters of OfferFilter
+            models.Index(fields=['min_price'], name='offer_min_price_idx'),
+            models.Index(fields=['min_delivery_time'], name='offer_min_delivery_idx'),
+            # covers the facet counts of the offer list
+            models.Index(fields=['user', 'min_price', 'min_delivery_time'], name='offer_facets_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} [{self.pk}]"
 
+#Volltextindex der Angebote - FTS5 table and triggers are created in raw SQL by market.search (SQLite only)
+class OfferSearchIndex(models.Model):
+    # rowid of the index is the offer id - joining it lets a query use MATCH and bm25()
+    offer = models.OneToOneField(
+        Offer, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', db_constraint=False, related_name='search_index'
+    )
+    title = models.TextField()
+    description = models.TextField()
+    # the hidden column named like the table, the left side of MATCH
+    document = models.TextField(db_column='market_offer_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'market_offer_fts'
+
+OfferSearchIndex._meta.get_field('document').register_lookup(Match)
+
 #DL wie Basic Design
 class OfferDetail(models.Model):
     offer = models.ForeignKey(Offer, related_name='details', on_delete=models.CASCADE)
@@ -54,14 +84,39 @@ class Order(models.Model):
     #additional
     customer_user = models.ForeignKey(MarketUser, on_delete=models.PROTECT, related_name='order_customer')
     business_user = models.ForeignKey(MarketUser, on_delete=models.PROTECT, related_name='order_business')
-    # get title, revisions, delivery_time, price, features and type from offerdetail here too
+    # terms of the offerdetail at order time - later edits of the offer do not change the order
+    title = models.CharField(max_length=100)
+    revisions = models.IntegerField()
+    delivery_time_in_days = models.IntegerField()
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    features = models.JSONField(default=list)
+    offer_type = models.CharField(max_length=30)
     status = models.CharField(choices=ORDER_STATUS, default='inprogress' ,max_length=30)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # fields copied from the offerdetail
+    OFFER_TERMS = ['title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
+
+    class Meta:
+        indexes = [
+            # order counts per business user and status
+            models.Index(fields=['business_user', 'status'], name='order_business_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.id} - Order from: {self.customer_user.first_name}"
 
+    def copy_offer_terms(self):
+        for field in self.OFFER_TERMS:
+            setattr(self, field, getattr(self.offerdetail, field))
+
+    def save(self, *args, **kwargs):
+        # the terms are fixed when the order is created
+        if self._state.adding:
+            self.copy_offer_terms()
+        super().save(*args, **kwargs)
+
 
 class Review(models.Model):
     business_user = models.ForeignKey(MarketUser, on_delete=models.PROTECT, related_name='review_business_user')
@@ -71,6 +126,36 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_user', 'reviewer'], name='unique_review_per_business_user'),
+        ]
+        indexes = [
+            # review list filters with their ordering options
+            models.Index(fields=['business_user', 'updated_at'], name='review_business_updated_idx'),
+            models.Index(fields=['business_user', 'rating'], name='review_business_rating_idx'),
+            models.Index(fields=['reviewer', 'updated_at'], name='review_reviewer_updated_idx'),
+            models.Index(fields=['reviewer', 'rating'], name='review_reviewer_rating_idx'),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.reviewer.first_name} rated {self.business_user.first_name} | Rating: {self.rating}"
 
+
+
+#Denormalized counters per business user - maintained by market.signals
+class BusinessStats(models.Model):
+    business_user = models.OneToOneField(MarketUser, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    orders_in_progress = models.IntegerField(default=0)
+    orders_completed = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    # reviews per star rating
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for Marketuser PK: {self.pk}"
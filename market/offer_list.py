@@ -0,0 +1,211 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.urls import reverse
+from rest_framework import serializers
+
+from market.cache import LRUTTLCache
+from market.constants import OFFER_CREATOR_FACETS, OFFER_DELIVERY_FACETS, OFFER_PRICE_FACETS
+from market.models import Offer, OfferDetail
+from market.timing import timed
+
+# same keys and order as OfferListSerializer
+OFFER_LIST_FIELDS = [
+    'id', 'title', 'image', 'description', 'created_at', 'updated_at', 'min_price', 'min_delivery_time', 'user',
+]
+
+# reverse() runs once per response, the detail id is put in afterwards
+URL_MARKER = 987654321
+
+
+def detail_url_template(request=None):
+    url = reverse('offerdetail', kwargs={'pk': URL_MARKER})
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    prefix, _, suffix = url.partition(str(URL_MARKER))
+    return prefix, suffix
+
+
+def offer_list_values(queryset):
+    """
+    Turns an offer queryset into the rows needed by serialize_offer_list.
+    """
+    return queryset.prefetch_related(None).values(*OFFER_LIST_FIELDS)
+
+
+def detail_ids(rows):
+    return OfferDetail.objects.filter(offer_id__in=[row['id'] for row in rows]).order_by('id').values_list('offer_id', 'id')
+
+
+def serialize_offer_list(rows, request=None):
+    """
+    Builds the OfferListSerializer output from offer_list_values rows. Details
+    are loaded with one query, no model instances and no serializer fields per
+    row. Urls are absolute if `request` is given, like with a serializer context.
+    """
+    rows = list(rows)
+    return build_offer_list(rows, list(detail_ids(rows)) if rows else [], request)
+
+
+async def aserialize_offer_list(rows, request=None):
+    """
+    serialize_offer_list for async views.
+    """
+    rows = list(rows)
+    details = [detail async for detail in detail_ids(rows)] if rows else []
+    return build_offer_list(rows, details, request)
+
+
+def build_offer_list(rows, detail_rows, request=None):
+    # stands in for the serializer
+    with timed('serializer'):
+        return _build_offer_list(rows, detail_rows, request)
+
+
+def _build_offer_list(rows, detail_rows, request):
+    details = {row['id']: [] for row in rows}
+    if details:
+        prefix, suffix = detail_url_template(request)
+        for offer_id, detail_id in detail_rows:
+            details[offer_id].append({'id': detail_id, 'url': f'{prefix}{detail_id}{suffix}'})
+
+    datetime_field = serializers.DateTimeField()
+    storage = Offer._meta.get_field('image').storage
+    data = []
+    for row in rows:
+        image = row['image']
+        if image:
+            image = storage.url(image)
+            if request is not None:
+                image = request.build_absolute_uri(image)
+        data.append({
+            'id': row['id'],
+            'details': details[row['id']],
+            'title': row['title'],
+            'image': image or None,
+            'description': row['description'],
+            'created_at': datetime_field.to_representation(row['created_at']),
+            'updated_at': datetime_field.to_representation(row['updated_at']),
+            'min_price': row['min_price'],
+            'min_delivery_time': row['min_delivery_time'],
+            'user': row['user'],
+        })
+    return data
+
+
+FACET_FIELDS = {'min_price': OFFER_PRICE_FACETS, 'min_delivery_time': OFFER_DELIVERY_FACETS}
+
+
+def wants_facets(request):
+    return request.query_params.get('facets') in ('1', 'true')
+
+
+def facet_ranges(bounds):
+    return list(zip(bounds, [*bounds[1:], None]))
+
+
+def in_range(field, low, high):
+    condition = Q(**{f'{field}__gte': low})
+    if high is not None:
+        condition &= Q(**{f'{field}__lt': high})
+    return condition
+
+
+def offer_facets_query(queryset):
+    """
+    One row per creator of the filtered offers - its offer count and the counts
+    per facet range as conditional aggregates, all in one query on the
+    offer_facets_idx covering index.
+    """
+    aggregates = {'count': Count('id')}
+    for field, bounds in FACET_FIELDS.items():
+        for i, (low, high) in enumerate(facet_ranges(bounds)):
+            aggregates[f'{field}_{i}'] = Count('id', filter=in_range(field, low, high))
+    return queryset.prefetch_related(None).order_by().values('user_id').annotate(**aggregates)
+
+
+def build_offer_facets(rows):
+    """
+    Sums the creator rows of offer_facets_query into the counts per range,
+    plus the creators with the most offers.
+    """
+    rows = list(rows)
+    facets = {
+        field: [
+            {'from': low, 'to': high, 'count': sum(row[f'{field}_{i}'] for row in rows)}
+            for i, (low, high) in enumerate(facet_ranges(bounds))
+        ]
+        for field, bounds in FACET_FIELDS.items()
+    }
+    creators = sorted(rows, key=lambda row: (-row['count'], row['user_id']))[:OFFER_CREATOR_FACETS]
+    facets['creator_id'] = [{'creator_id': row['user_id'], 'count': row['count']} for row in creators]
+    return facets
+
+
+def offer_facets(queryset):
+    return build_offer_facets(offer_facets_query(queryset))
+
+
+async def aoffer_facets(queryset):
+    return build_offer_facets([row async for row in offer_facets_query(queryset)])
+
+
+def with_facets(data, facets):
+    # a page or, without pagination, the plain list
+    if isinstance(data, dict):
+        return {**data, 'facets': facets}
+    return {'results': data, 'facets': facets}
+
+
+# Anonymous list responses, keyed by the list version and the query parameters
+# that change the result. Process local like the token cache - other workers
+# see writes after the TTL at the latest.
+offer_list_cache = LRUTTLCache(
+    max_size=getattr(settings, 'OFFER_LIST_CACHE_MAX_SIZE', 1000),
+    ttl=getattr(settings, 'OFFER_LIST_CACHE_TTL', 30),
+)
+CACHE_KEY_PARAMS = ['search', 'creator_id', 'min_price', 'max_delivery_time', 'ordering', 'page', 'page_size', 'cursor', 'facets']
+
+_version_lock = threading.Lock()
+_version = 0
+
+
+def offer_list_version():
+    return _version
+
+
+def bump_offer_list_version():
+    """
+    Makes every cached list response unreachable, LRU and TTL drop them later.
+    """
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+def invalidate_offer_list():
+    # bump now and again on commit - a request running in between
+    # may have cached the old rows under the first new version
+    bump_offer_list_version()
+    transaction.on_commit(bump_offer_list_version)
+
+
+def offer_list_cache_key(request):
+    """
+    Returns the cache key of an anonymous list request, None if it must not be cached.
+    """
+    if request.user.is_authenticated:
+        return None
+    params = tuple(
+        (name, value)
+        for name in CACHE_KEY_PARAMS
+        for value in sorted(request.query_params.getlist(name))
+    )
+    # the pagination links are absolute
+    return (offer_list_version(), request.scheme, request.get_host(), params)
+
+
+def offer_list_cache_stats():
+    return {**offer_list_cache.stats(), 'version': offer_list_version()}
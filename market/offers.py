@@ -0,0 +1,173 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from market.models import Offer, OfferDetail
+from market.base_info import invalidate_base_info
+from market.offer_list import invalidate_offer_list
+from market.serializers import OfferDetailSerializer, OfferWriteSerializer
+
+DETAIL_COUNT = 3
+# upper bound for one batch request
+MAX_BATCH_SIZE = 5000
+
+
+def min_values(details):
+    """
+    Returns min_price and min_delivery_time of an offer from its details.
+    """
+    min_price = int(min(detail['price'] for detail in details))
+    min_delivery_time = int(min(detail['delivery_time_in_days'] for detail in details))
+    return min_price, min_delivery_time
+
+
+def validate_offer_data(data, instance=None):
+    serializer = OfferWriteSerializer(instance, data=data, partial=instance is not None)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def validate_new_details(details):
+    if not isinstance(details, list) or len(details) != DETAIL_COUNT:
+        raise ValidationError({'details': [f'Details must be a list with {DETAIL_COUNT} items.']})
+    serializer = OfferDetailSerializer(data=details, many=True)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def build_offer(marketuser, offer_data, details_data):
+    """
+    Returns an unsaved offer and its unsaved details.
+    """
+    min_price, min_delivery_time = min_values(details_data)
+    offer = Offer(**{**offer_data, 'user': marketuser, 'min_price': min_price, 'min_delivery_time': min_delivery_time})
+    details = [OfferDetail(offer=offer, **detail) for detail in details_data]
+    return offer, details
+
+
+@transaction.atomic(savepoint=False)
+def create_offers(items):
+    """
+    Inserts offers and their details with one batched insert each.
+    `items` is a list of (offer, details) pairs from build_offer.
+    """
+    offers = Offer.objects.bulk_create([offer for offer, _ in items])
+    details = []
+    for offer, offer_details in items:
+        for detail in offer_details:
+            # bulk_create set the pk - re-assign to fill offer_id
+            detail.offer = offer
+            details.append(detail)
+    OfferDetail.objects.bulk_create(details)
+    # bulk_create sends no signals
+    invalidate_offer_list()
+    invalidate_base_info()
+    return offers
+
+
+def prepare_update(offer, data):
+    """
+    Validates a partial update of an offer and applies it to the instances.
+    Details are matched by offer_type. Returns the changed details.
+    """
+    data = dict(data)
+    details = data.pop('details', None) or []
+    data.pop('id', None)
+    offer_data = validate_offer_data(data, instance=offer)
+
+    type_map = {detail.offer_type: detail for detail in offer.details.all()}
+    validated = []
+    for patch in details:
+        offer_type = patch.get('offer_type') if isinstance(patch, dict) else None
+        instance = type_map.get(offer_type)
+        if instance is None:
+            raise ValidationError({'details': [f'No detail with offer_type {offer_type!r}.']})
+        serializer = OfferDetailSerializer(instance, data=patch, partial=True)
+        serializer.is_valid(raise_exception=True)
+        validated.append((instance, serializer.validated_data))
+
+    # nothing is applied before the whole item is valid
+    changed = []
+    for instance, validated_data in validated:
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        changed.append(instance)
+    for attr, value in offer_data.items():
+        setattr(offer, attr, value)
+    if changed:
+        all_details = [{'price': d.price, 'delivery_time_in_days': d.delivery_time_in_days} for d in type_map.values()]
+        offer.min_price, offer.min_delivery_time = min_values(all_details)
+    # bulk_update skips auto_now
+    offer.updated_at = timezone.now()
+    return changed
+
+
+@transaction.atomic(savepoint=False)
+def update_offers(offers, details):
+    if offers:
+        fields = ['title', 'image', 'description', 'min_price', 'min_delivery_time', 'updated_at']
+        Offer.objects.bulk_update(offers, fields)
+    if details:
+        fields = ['title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
+        OfferDetail.objects.bulk_update(details, fields)
+    if offers or details:
+        invalidate_offer_list()
+
+
+def is_offer_id(value):
+    # JSON true would pass as 1
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def import_offers(marketuser, items):
+    """
+    Creates or updates (items with an id) many offers of one business user.
+    Valid items are written in one transaction with batched statements,
+    invalid ones are skipped. Returns one result dict per item.
+    """
+    results = [None] * len(items)
+    creates = []
+    updates = []
+
+    ids = [item.get('id') for item in items if isinstance(item, dict) and is_offer_id(item.get('id'))]
+    existing = {offer.pk: offer for offer in Offer.objects.filter(user=marketuser, pk__in=ids).prefetch_related('details')}
+
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise ValidationError({'non_field_errors': ['Expected an object.']})
+            offer_id = item.get('id')
+            if offer_id is None:
+                data = dict(item)
+                details_data = validate_new_details(data.pop('details', None))
+                offer_data = validate_offer_data(data)
+                creates.append((index, build_offer(marketuser, offer_data, details_data)))
+            else:
+                if not is_offer_id(offer_id):
+                    raise ValidationError({'id': ['A valid integer is required.']})
+                offer = existing.get(offer_id)
+                if offer is None:
+                    raise ValidationError({'id': ['Offer not found.']})
+                # only accepted items count - a rejected one may be sent again, fixed
+                if offer.pk in seen:
+                    raise ValidationError({'id': ['Offer appears more than once in this batch.']})
+                updates.append((index, offer, prepare_update(offer, item)))
+                seen.add(offer.pk)
+        except ValidationError as error:
+            results[index] = {'index': index, 'status': 'error', 'errors': error.detail}
+
+    with transaction.atomic():
+        if creates:
+            create_offers([pair for _, pair in creates])
+        if updates:
+            update_offers(
+                [offer for _, offer, _ in updates],
+                [detail for _, _, details in updates for detail in details],
+            )
+
+    for index, (offer, _) in creates:
+        results[index] = {'index': index, 'status': 'created', 'id': offer.pk}
+    for index, offer, _ in updates:
+        results[index] = {'index': index, 'status': 'updated', 'id': offer.pk}
+    return results
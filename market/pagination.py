@@ -1,6 +1,298 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+class CountedQuerySet:
+    """
+    A queryset with a known count - lets the Django paginator slice it without counting again.
+    """
+
+    def __init__(self, queryset, count):
+        self.queryset = queryset
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def __getitem__(self, key):
+        return self.queryset[key]
+
 
 class CustomPagination(PageNumberPagination):
     page_size = 19
     page_size_query_param = 'page_size'
-    max_page_size = 1000
\ No newline at end of file
+    max_page_size = 1000
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for async views - count and page run on the async ORM.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(CountedQuerySet(queryset, await queryset.acount()), page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [row async for row in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks to the last seen row instead of counting and
+    offsetting, so every page costs the same.
+
+    The queryset ordering is used when it only names plain model fields, `ordering`
+    when the queryset is unordered. Other orderings, like the relevance of search
+    results, have no keyset and are rejected. `id` is always added as the
+    tiebreaker. NULLs sort first, like SQLite.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    invalid_ordering_message = 'This ordering cannot be paginated with a cursor, use ordering or page numbers instead.'
+    page_size = 19
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        Orders and seeks `queryset`, returns the slice holding the page and one more row.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.key = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor.reverse if self.cursor else False
+        order = [(field, descending != reverse) for field, descending in self.key]
+        queryset = queryset.order_by(*[self.order_expression(field, descending) for field, descending in order])
+        if self.cursor:
+            queryset = queryset.filter(self.seek(order, self.cursor.position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        cursor = self.cursor
+        reverse = cursor.reverse if cursor else False
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """
+        Returns the key as a list of (field name, descending) pairs.
+        """
+        if queryset.query.order_by:
+            key = self.parse_ordering(queryset.query.order_by)
+            if not key:
+                raise ParseError(self.invalid_ordering_message)
+        else:
+            key = self.parse_ordering(self.ordering)
+        if 'id' not in [field for field, _ in key]:
+            key.append(('id', key[-1][1] if key else True))
+        return key
+
+    def parse_ordering(self, ordering):
+        key = []
+        for item in ordering:
+            if not isinstance(item, str):
+                return []
+            name = item.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return []
+            if field.is_relation:
+                return []
+            key.append((name, item.startswith('-')))
+        return key
+
+    def is_nullable(self, field):
+        return self.model._meta.get_field(field).null
+
+    def order_expression(self, field, descending):
+        if not self.is_nullable(field):
+            return f'-{field}' if descending else field
+        if descending:
+            return F(field).desc(nulls_last=True)
+        return F(field).asc(nulls_first=True)
+
+    def seek(self, order, position):
+        """
+        Builds the filter for every row after `position` in `order`.
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(order, position):
+            condition |= equal & self.beyond(field, descending, value)
+            equal &= Q(**{f'{field}__isnull': True}) if value is None else Q(**{field: value})
+
+        # redundant bound on the leading column - lets the database start an index range scan
+        field, descending = order[0]
+        value = position[0]
+        if value is not None and not self.is_nullable(field):
+            condition &= Q(**{f'{field}__lte' if descending else f'{field}__gte': value})
+        return condition
+
+    def beyond(self, field, descending, value):
+        if value is None:
+            # NULL sorts first - nothing comes before it in descending order
+            return Q(pk__in=[]) if descending else Q(**{f'{field}__isnull': False})
+        if descending:
+            after = Q(**{f'{field}__lt': value})
+            if self.is_nullable(field):
+                after |= Q(**{f'{field}__isnull': True})
+            return after
+        return Q(**{f'{field}__gt': value})
+
+    def get_position(self, row):
+        position = []
+        for field, _ in self.key:
+            value = row[field] if isinstance(row, dict) else getattr(row, field)
+            # full precision - the cursor has to hit the exact stored value
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(self.get_position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(self.get_position(self.page[0]), True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = data['p']
+            if len(position) != len(self.key):
+                raise ValueError
+            position = [
+                None if value is None else self.model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(self.key, position)
+            ]
+            return Cursor(position, bool(data.get('r')))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        data = json.dumps({'p': cursor.position, 'r': int(cursor.reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+class CursorOptInPagination(KeysetPagination):
+    """
+    Keyset pagination for clients sending ?cursor= (empty for the first page).
+    Other clients keep the `fallback_class` contract, no pagination if it is None.
+    """
+    fallback_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.cursor_query_param in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        if self.fallback_class is None:
+            return None
+        self.fallback = self.fallback_class()
+        return self.fallback.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.cursor_query_param in request.query_params:
+            return await super().apaginate_queryset(queryset, request, view)
+        if self.fallback_class is None:
+            return None
+        self.fallback = self.fallback_class()
+        return await self.fallback.apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class OfferPagination(CursorOptInPagination):
+    fallback_class = CustomPagination
+    ordering = ('-updated_at', '-id')
+
+
+class OrderPagination(CursorOptInPagination):
+    ordering = ('-id',)
+
+
+class ReviewPagination(CursorOptInPagination):
+    ordering = ('-id',)
@@ -1,19 +1,20 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.status import HTTP_403_FORBIDDEN
-from market.models import Offer
 
-from market.models import MarketUser
+from market.utils import get_marketuser
 
 class isOwnerOr405(BasePermission):
     """
     Checking if the request user is the owner
     """
     def has_object_permission(self, request, view, obj):
-        request_marketuser = MarketUser.objects.get(user = request.user)
-        obj_marketuser = MarketUser.objects.get(pk=obj.user.pk)
+        request_marketuser = get_marketuser(request)
 
-        if obj_marketuser != request_marketuser:
+        if request_marketuser is None or obj.pk != request_marketuser.pk:
             raise PermissionDenied('You are not allowed to patch this profile', code=HTTP_403_FORBIDDEN)
         return True
 
@@ -24,13 +25,11 @@ class IsBusiness(BasePermission):
     message = "Restricted to Business Users"
 
     def has_permission(self, request, view):
-        user = request.user
-        try:
-            marketuser = MarketUser.objects.get(user=user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(request)
+        if marketuser is None:
             self.message = "No Marketuser connected to this user"
             return False
-        return bool(marketuser and marketuser.type == 'business')
+        return marketuser.type == 'business'
 
 class IsCustomer(BasePermission):
     """
@@ -39,13 +38,11 @@ class IsCustomer(BasePermission):
     message = "Restricted to Customer Users"
 
     def has_permission(self, request, view):
-        user = request.user
-        try:
-            marketuser = MarketUser.objects.get(user=user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(request)
+        if marketuser is None:
             self.message = "No Marketuser connected to this user"
             return False
-        return bool(marketuser and marketuser.type == 'customer')
+        return marketuser.type == 'customer'
 
 class isOfferOwner(BasePermission):
     """
@@ -53,8 +50,19 @@ class isOfferOwner(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        try:
-            marketuser = MarketUser.objects.get(user=request.user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(request)
+        if marketuser is None:
             return False
-        return obj.user == marketuser
+        return obj.user_id == marketuser.pk
+
+
+class IsMetricsScraper(BasePermission):
+    """
+    Allows admins and the scraper with settings.METRICS_TOKEN as bearer token.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        return bool(token) and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
@@ -0,0 +1,94 @@
+"""
+Read/write splitting. Reads of market models go to settings.READ_REPLICA while
+ReplicaRoutingMiddleware allows it for the current request, everything else
+goes to the primary.
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from market.cache import LRUTTLCache
+
+# set per request by the middleware - a ContextVar follows the request into
+# sync_to_async threads, a thread local would not
+_replica_reads = ContextVar('replica_reads', default=False)
+
+# Clients that wrote in the last seconds read from the primary until the
+# replica has caught up. Process local - the PIN_COOKIE carries the pin to
+# other workers for clients that keep cookies.
+PIN_SECONDS = getattr(settings, 'READ_REPLICA_PIN_SECONDS', 5)
+PIN_COOKIE = 'primary_pin'
+pinned_clients = LRUTTLCache(max_size=getattr(settings, 'READ_REPLICA_PIN_MAX_SIZE', 10000), ttl=PIN_SECONDS)
+
+
+def replica_alias():
+    return getattr(settings, 'READ_REPLICA', None)
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary():
+    """
+    Reads in this block go to the primary.
+    """
+    return replica_reads(False)
+
+
+def offer_list_reads():
+    """
+    The shared offer list cache is filled from the primary - its versions are
+    bumped on commit, rows read from a lagging replica would be cached under
+    the new version. With OFFER_LIST_REPLICA_LAG_TOLERANT the anonymous list
+    reads the replica anyway and may be stale for the lag plus the cache TTL.
+    """
+    if getattr(settings, 'OFFER_LIST_REPLICA_LAG_TOLERANT', False):
+        return nullcontext()
+    return primary()
+
+
+def pin_client(key):
+    if key:
+        pinned_clients.set(key, True)
+
+
+def is_pinned(key):
+    return bool(key) and pinned_clients.get(key) is not None
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes, reads inside a transaction and reads of other apps (tokens,
+    sessions, users) always use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if (
+            alias
+            and _replica_reads.get()
+            and model._meta.app_label == 'market'
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return alias
+        # not None - Django would fall back to the database of the hinted instance
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # same data on both
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # the replica gets its schema from the primary
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,149 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Lookup, Q
+from django.db.models.expressions import RawSQL
+
+# FTS5 index over Offer.title and Offer.description (SQLite only).
+# External content table - the triggers keep it in sync with every write on
+# market_offer, including bulk inserts and queryset updates.
+# Terms match word prefixes ("anim" finds "Animation"), prefix indexes keep short terms cheap.
+FTS_TABLE = 'market_offer_fts'
+
+# bm25 column weights - a hit in the title counts more than in the description
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+CREATE_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title, description, content='market_offer', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+)
+"""
+
+CREATE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON market_offer BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON market_offer BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON market_offer BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def is_supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Creates the index table and the sync triggers if they are missing.
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def restore_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate hook - SQLite drops the triggers whenever a migration remakes
+    market_offer, put them back if the index table exists.
+    """
+    if not is_supported(using):
+        return
+    if FTS_TABLE not in connections[using].introspection.table_names():
+        return
+    with connections[using].cursor() as cursor:
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(using=DEFAULT_DB_ALIAS):
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Recreates the triggers and rebuilds the index from market_offer.
+    """
+    if not is_supported(using):
+        return
+    create_search_index(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def check_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Runs the FTS5 integrity check against the content table.
+    Raises DatabaseError if the index is out of sync.
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+
+class Match(Lookup):
+    """
+    `document__match` on the hidden column named like the FTS5 table - filtering
+    on it joins the index and matches in one WHERE clause.
+    """
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+def prefix_term(term):
+    # a quoted FTS5 string is matched literally - operators in user input are ignored
+    return '"' + term.replace('"', '""') + '"*'
+
+
+def icontains_query(terms):
+    q = Q()
+    for term in terms:
+        q &= Q(title__icontains=term) | Q(description__icontains=term)
+    return q
+
+
+def search_offers(queryset, terms):
+    """
+    Filters an Offer queryset to offers whose title or description has a word
+    starting with every term. Results are ordered by relevance (bm25), ties by id.
+    """
+    terms = [term for term in terms if term]
+    if not terms:
+        return queryset
+    if not is_supported(queryset.db):
+        return queryset.filter(icontains_query(terms))
+
+    return (
+        queryset
+        # joins the index table under its own name
+        .filter(search_index__document__match=' AND '.join(prefix_term(term) for term in terms))
+        .annotate(search_rank=RawSQL(RANK_SQL, []))
+        .order_by('search_rank', 'id')
+    )
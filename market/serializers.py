@@ -1,6 +1,7 @@
 import pdb
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from market.constants import ORDER_STATUS
 from market.models import MarketUser, Offer, OfferDetail, Order, Review
 
 class UserSerializer(serializers.ModelSerializer):
@@ -180,13 +181,6 @@ class OfferListSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    title = serializers.CharField(source='offerdetail.title', max_length=100)
-    revisions = serializers.IntegerField(source='offerdetail.revisions')
-    delivery_time_in_days = serializers.IntegerField(source='offerdetail.delivery_time_in_days')
-    price = serializers.DecimalField(source='offerdetail.price', max_digits=6, decimal_places=2)
-    features = serializers.JSONField(source='offerdetail.features', default=list)
-    offer_type = serializers.CharField(source='offerdetail.offer_type', max_length=30)
-
     class Meta:
         model = Order
         fields = [
@@ -203,6 +197,24 @@ class OrderSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at"
         ]
+        # copied from the offerdetail when the order is created
+        read_only_fields = [
+            "title",
+            "revisions",
+            "delivery_time_in_days",
+            "price",
+            "features",
+            "offer_type"
+        ]
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    # the stored values, the keys of ORDER_STATUS map onto them
+    status = serializers.ChoiceField(choices=list(dict.fromkeys([*ORDER_STATUS.values(), *ORDER_STATUS])))
+
+    def validate_status(self, value):
+        return ORDER_STATUS.get(value, value)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
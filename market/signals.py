@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from market.authentication import invalidate_user_tokens
+from market.base_info import invalidate_base_info
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+from market.offer_list import invalidate_offer_list
+from market.stats import apply_delta, move_deltas, order_deltas, review_deltas
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_state(sender, instance, **kwargs):
+    instance._stats_previous = None
+    if instance.pk is not None:
+        instance._stats_previous = Order.objects.filter(pk=instance.pk).values('status', 'business_user_id').first()
+
+
+@receiver(post_save, sender=Order)
+def update_order_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None:
+        move_deltas(
+            previous['business_user_id'], order_deltas(previous['status'], -1),
+            instance.business_user_id, order_deltas(instance.status, 1),
+        )
+        return
+    apply_delta(instance.business_user_id, **order_deltas(instance.status, 1))
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_stats(sender, instance, **kwargs):
+    apply_delta(instance.business_user_id, **order_deltas(instance.status, -1))
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_state(sender, instance, **kwargs):
+    instance._stats_previous = None
+    if instance.pk is not None:
+        instance._stats_previous = Review.objects.filter(pk=instance.pk).values('rating', 'business_user_id').first()
+
+
+@receiver(post_save, sender=Review)
+def update_review_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None:
+        move_deltas(
+            previous['business_user_id'], review_deltas(previous['rating'], -1),
+            instance.business_user_id, review_deltas(instance.rating, 1),
+        )
+        return
+    apply_delta(instance.business_user_id, **review_deltas(instance.rating, 1))
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_stats(sender, instance, **kwargs):
+    apply_delta(instance.business_user_id, **review_deltas(instance.rating, -1))
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def invalidate_offer_list_cache(sender, instance, **kwargs):
+    invalidate_offer_list()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=MarketUser)
+@receiver(post_delete, sender=MarketUser)
+def invalidate_base_info_cache(sender, instance, **kwargs):
+    # any MarketUser write - a profile can change its type
+    invalidate_base_info()
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token_cache(sender, instance, **kwargs):
+    # a new key for the user is a rotation - drop the old ones too
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_token_cache(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=MarketUser)
+@receiver(post_delete, sender=MarketUser)
+def invalidate_marketuser_token_cache(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
@@ -0,0 +1,191 @@
+"""
+Opt-in slow query log - every query slower than settings.SLOW_QUERY_MS is
+written as one JSON line to the market.slow_queries logger, a rotating file
+(see settings.SLOW_QUERY_LOG), with its duration and the view it ran for.
+
+Queries are grouped by fingerprint, their SQL with the literals replaced.
+The first record of a fingerprint carries the SQL, the parameters and the
+EXPLAIN QUERY PLAN output, repeats within SLOW_QUERY_EXPLAIN_TTL seconds only
+the fingerprint - see the slow_query_report command.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from market.cache import LRUTTLCache
+from market.utils import view_name
+
+logger = logging.getLogger('market.slow_queries')
+
+_request = ContextVar('slow_query_request', default=None)
+
+# fingerprints whose plan was written recently
+explained = LRUTTLCache(max_size=1000, ttl=getattr(settings, 'SLOW_QUERY_EXPLAIN_TTL', 3600))
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+MAX_PARAM_LENGTH = 200
+
+# password hashes, token keys and sessions stay out of the log
+SENSITIVE_TABLES = ('"auth_user"', '"authtoken_token"', '"django_session"')
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\s+'), ' '),
+    # IN lists and bulk inserts of any length
+    (re.compile(r'\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))+'), '(...)'),
+    (re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE), 'IN (...)'),
+]
+
+
+def normalize(sql):
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(statement):
+    return hashlib.sha1(statement.encode()).hexdigest()[:16]
+
+
+@contextmanager
+def current_request(request):
+    """
+    Queries of this block are logged with the view of `request`.
+    """
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def query_plan(connection, sql, params):
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    # a cursor without the execute wrappers - the plan is not logged itself
+    cursor = connection.create_cursor()
+    try:
+        with connection.wrap_database_errors:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    except DatabaseError as error:
+        return [f'EXPLAIN failed: {error}']
+    finally:
+        cursor.close()
+
+
+def loggable(sql, params):
+    if params is None:
+        return None
+    if any(table in sql for table in SENSITIVE_TABLES):
+        return '[redacted]'
+    values = params.values() if isinstance(params, dict) else params
+    return [value if isinstance(value, (int, float, bool, type(None))) else str(value)[:MAX_PARAM_LENGTH] for value in values]
+
+
+def record_slow_query(execute, sql, params, many, context):
+    threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+    if threshold is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= threshold:
+            log_slow_query(context['connection'], sql, params, many, duration)
+
+
+def log_slow_query(connection, sql, params, many, duration):
+    statement = normalize(sql)
+    key = fingerprint(statement)
+    record = {
+        'time': timezone.now().isoformat(),
+        'fingerprint': key,
+        'duration_ms': round(duration, 2),
+        'view': view_name(_request.get()),
+        'database': connection.alias,
+    }
+    if explained.get(key) is None:
+        explained.set(key, True)
+        record['statement'] = statement
+        record['sql'] = sql
+        record['params'] = None if many else loggable(sql, params)
+        record['plan'] = None if many else query_plan(connection, sql, params)
+    logger.warning(json.dumps(record))
+
+
+def add_slow_query_wrapper(connection, **kwargs):
+    if record_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow_query)
+
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def install():
+    """
+    Hooks the slow query log into every database connection - the open ones of
+    this thread and all opened later. Idempotent, called on startup once
+    settings.SLOW_QUERY_MS is set.
+    """
+    global _installed
+    for connection in connections.all(initialized_only=True):
+        add_slow_query_wrapper(connection)
+    with _install_lock:
+        if not _installed:
+            connection_created.connect(add_slow_query_wrapper, dispatch_uid='market.slow_queries')
+            _installed = True
+
+
+def log_files(path):
+    """
+    The log and its rotated backups, oldest first.
+    """
+    backups = sorted(glob.glob(f'{glob.escape(path)}.[0-9]*'), key=lambda name: int(name.rsplit('.', 1)[1]))
+    return [*reversed(backups), path] if os.path.exists(path) else list(reversed(backups))
+
+
+def summarize(paths):
+    """
+    Slow queries per fingerprint, the most total time first - count, total,
+    mean and max ms, the views and the latest SQL and plan.
+    """
+    offenders = {}
+    for path in paths:
+        with open(path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                offender = offenders.setdefault(record['fingerprint'], {
+                    'fingerprint': record['fingerprint'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'views': set(), 'statement': None, 'sql': None, 'params': None, 'plan': None,
+                })
+                offender['count'] += 1
+                offender['total_ms'] += record['duration_ms']
+                offender['max_ms'] = max(offender['max_ms'], record['duration_ms'])
+                offender['views'].add(record['view'] or '-')
+                if 'statement' in record:
+                    for field in ['statement', 'sql', 'params', 'plan']:
+                        offender[field] = record[field]
+    for offender in offenders.values():
+        offender['mean_ms'] = offender['total_ms'] / offender['count']
+    return sorted(offenders.values(), key=lambda offender: offender['total_ms'], reverse=True)
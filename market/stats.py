@@ -0,0 +1,154 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from market.models import BusinessStats, MarketUser, Order, Review
+
+# the star ratings with a histogram counter, other ratings only count in review_count and rating_sum
+RATINGS = range(1, 6)
+RATING_FIELDS = [f'rating_{rating}' for rating in RATINGS]
+
+STATS_FIELDS = ['orders_in_progress', 'orders_completed', 'review_count', 'rating_sum', *RATING_FIELDS]
+
+# order status -> counter field, other status values are not counted
+ORDER_STATUS_FIELDS = {
+    'in_progress': 'orders_in_progress',
+    'completed': 'orders_completed',
+}
+
+
+def apply_delta(business_user_id, **deltas):
+    """
+    Adds the given deltas to the counters of one business user.
+    The row is created on first use.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if business_user_id is None or not deltas:
+        return
+    update = {field: F(field) + delta for field, delta in deltas.items()}
+    if BusinessStats.objects.filter(pk=business_user_id).update(**update):
+        return
+    BusinessStats.objects.get_or_create(business_user_id=business_user_id)
+    BusinessStats.objects.filter(pk=business_user_id).update(**update)
+
+
+def merge_deltas(*deltas):
+    merged = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            merged[field] = merged.get(field, 0) + value
+    return merged
+
+
+def move_deltas(previous_user_id, previous_deltas, user_id, deltas):
+    """
+    Applies the removal of the previous state and the addition of the new one,
+    as a single update if both belong to the same business user.
+    """
+    if previous_user_id == user_id:
+        apply_delta(user_id, **merge_deltas(previous_deltas, deltas))
+        return
+    apply_delta(previous_user_id, **previous_deltas)
+    apply_delta(user_id, **deltas)
+
+
+def order_deltas(status, sign):
+    field = ORDER_STATUS_FIELDS.get(status)
+    return {field: sign} if field else {}
+
+
+def review_deltas(rating, sign):
+    deltas = {'review_count': sign, 'rating_sum': sign * rating}
+    if rating in RATINGS:
+        deltas[f'rating_{rating}'] = sign
+    return deltas
+
+
+def compute_stats():
+    """
+    Computes the counters from the Order and Review tables.
+    Returns a dict of business_user_id -> counter dict.
+    """
+    stats = {}
+
+    def row(business_user_id):
+        return stats.setdefault(business_user_id, dict.fromkeys(STATS_FIELDS, 0))
+
+    orders = Order.objects.values('business_user').annotate(
+        orders_in_progress=Count('pk', filter=Q(status='in_progress')),
+        orders_completed=Count('pk', filter=Q(status='completed')),
+    )
+    for item in orders:
+        row(item['business_user']).update(
+            orders_in_progress=item['orders_in_progress'],
+            orders_completed=item['orders_completed'],
+        )
+
+    reviews = Review.objects.values('business_user').annotate(
+        review_count=Count('pk'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{rating}': Count('pk', filter=Q(rating=rating)) for rating in RATINGS},
+    )
+    for item in reviews:
+        row(item['business_user']).update(
+            review_count=item['review_count'],
+            rating_sum=item['rating_sum'] or 0,
+            **{field: item[field] for field in RATING_FIELDS},
+        )
+    return stats
+
+
+def rating_summaries(business_user_ids):
+    """
+    Review count, average rating and star histogram of the given business
+    users, read from their stats rows with one query. Unknown ids and other
+    user types are left out, the order of `business_user_ids` is kept.
+    """
+    rows = MarketUser.objects.filter(pk__in=business_user_ids, type='business').values(
+        'pk', 'stats__review_count', 'stats__rating_sum', *[f'stats__{field}' for field in RATING_FIELDS],
+    )
+    summaries = {}
+    for row in rows:
+        # no stats row before the first order or review
+        count = row['stats__review_count'] or 0
+        summaries[row['pk']] = {
+            'business_user': row['pk'],
+            'review_count': count,
+            'average_rating': row['stats__rating_sum'] / count if count else None,
+            'ratings': {str(rating): row[f'stats__rating_{rating}'] or 0 for rating in RATINGS},
+        }
+    return [summaries[pk] for pk in dict.fromkeys(business_user_ids) if pk in summaries]
+
+
+def find_drift():
+    """
+    Compares the stats table with freshly computed counters.
+    Returns a dict of business_user_id -> (stored, expected) for every mismatch.
+    """
+    expected = compute_stats()
+    stored = {
+        item.pop('business_user'): item
+        for item in BusinessStats.objects.values('business_user', *STATS_FIELDS)
+    }
+    empty = dict.fromkeys(STATS_FIELDS, 0)
+    drift = {}
+    for business_user_id in expected.keys() | stored.keys():
+        stored_row = stored.get(business_user_id, empty)
+        expected_row = expected.get(business_user_id, empty)
+        if stored_row != expected_row:
+            drift[business_user_id] = (stored_row, expected_row)
+    return drift
+
+
+@transaction.atomic
+def rebuild_stats():
+    """
+    Replaces the stats table with freshly computed counters.
+    Returns the number of rows written.
+    """
+    stats = compute_stats()
+    BusinessStats.objects.all().delete()
+    BusinessStats.objects.bulk_create(
+        BusinessStats(business_user_id=business_user_id, **counters)
+        for business_user_id, counters in stats.items()
+    )
+    return len(stats)
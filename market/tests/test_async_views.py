@@ -0,0 +1,102 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from market.async_views import offer_list
+from market.base_info import base_info_cache
+from market.models import MarketUser, Offer, OfferDetail, Order
+from market.offer_list import offer_list_cache
+
+
+@override_settings(ASYNC_READ_URLCONF='main.asgi_urls')
+class AsyncReadViewTest(TestCase):
+    """
+    The async views answer GET under ASGI (AsyncClient), the DRF views under WSGI (APIClient).
+    """
+
+    def setUp(self):
+        offer_list_cache.clear()
+        base_info_cache.clear()
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        for i in range(4):
+            offer = Offer.objects.create(
+                user=self.business, title=f'Logo Paket {i}', description='Beschreibung',
+                image='offer-images/bild.png' if i % 2 else None, min_price=10 * i, min_delivery_time=i,
+            )
+            for offer_type in ['basic', 'standard', 'premium']:
+                OfferDetail.objects.create(
+                    offer=offer, title=offer_type, revisions=1, delivery_time_in_days=3,
+                    price='19.90', features=['Logo'], offer_type=offer_type
+                )
+        self.offer = offer
+        Order.objects.create(
+            offerdetail=offer.details.first(), customer_user=self.customer, business_user=self.business, status='in_progress'
+        )
+        self.token = Token.objects.create(user=self.customer.user)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+    def sync_get(self, url, params=None, headers=None):
+        return APIClient().get(url, params, headers=headers)
+
+    async def assertSameResponse(self, url, params=None, headers=None):
+        expected = await sync_to_async(self.sync_get)(url, params, headers)
+        response = await AsyncClient().get(url, params or {}, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.content, expected.content, url)
+        if 'ETag' in expected:
+            self.assertEqual(response['ETag'], expected['ETag'])
+        return response
+
+    async def test_async_view_is_routed(self):
+        response = await AsyncClient().get(reverse('offers-list'))
+        self.assertIs(response.resolver_match.func, offer_list)
+        # WSGI keeps the viewset
+        response = await sync_to_async(self.sync_get)(reverse('offers-list'))
+        self.assertIsNot(response.resolver_match.func, offer_list)
+
+    @override_settings(ASYNC_READ_URLCONF=None)
+    async def test_opt_in(self):
+        response = await AsyncClient().get(reverse('offers-list'))
+        self.assertIsNot(response.resolver_match.func, offer_list)
+
+    async def test_offer_list(self):
+        url = reverse('offers-list')
+        for params in [{}, {'page_size': 2, 'page': 2}, {'search': 'logo'}, {'min_price': 15}, {'cursor': '', 'page_size': 3}]:
+            offer_list_cache.clear()
+            await self.assertSameResponse(url, params)
+            await self.assertSameResponse(url, params, self.headers)
+        await self.assertSameResponse(url, {'page': 9})
+        await self.assertSameResponse(url, {'min_price': 'abc'})
+        await self.assertSameResponse(url, {'cursor': 'kaputt'})
+
+    async def test_offer_retrieve(self):
+        url = reverse('offers-detail', kwargs={'pk': self.offer.pk})
+        response = await self.assertSameResponse(url, headers=self.headers)
+        not_modified = await AsyncClient().get(url, headers={**self.headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+        await self.assertSameResponse(url)
+        await self.assertSameResponse(reverse('offers-detail', kwargs={'pk': 9999}), headers=self.headers)
+
+    async def test_offer_detail(self):
+        detail = await OfferDetail.objects.afirst()
+        await self.assertSameResponse(reverse('offerdetail', kwargs={'pk': detail.pk}))
+        await self.assertSameResponse(reverse('offerdetail', kwargs={'pk': 9999}))
+
+    async def test_order_counts(self):
+        for name in ['business-order-count', 'business-completed-order-count']:
+            await self.assertSameResponse(reverse(name, kwargs={'pk': self.business.pk}), headers=self.headers)
+            await self.assertSameResponse(reverse(name, kwargs={'pk': 9999}), headers=self.headers)
+            await self.assertSameResponse(reverse(name, kwargs={'pk': self.business.pk}))
+            await self.assertSameResponse(reverse(name, kwargs={'pk': self.business.pk}), headers={'Authorization': 'Token falsch'})
+
+    async def test_base_info(self):
+        await self.assertSameResponse(reverse('base-info'))
+
+    async def test_writes_keep_the_drf_views(self):
+        response = await AsyncClient().post(reverse('offers-list'), {}, headers=self.headers, content_type='application/json')
+        # DRF viewset - customers may not create offers
+        self.assertEqual(response.status_code, 403)
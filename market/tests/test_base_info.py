@@ -0,0 +1,133 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient, APITestCase
+from rest_framework.status import HTTP_200_OK
+
+from market.base_info import base_info_cache
+from market.cache import LRUTTLCache
+from market.models import MarketUser, Offer, Review
+
+
+class BaseInfoCacheTest(APITestCase):
+    url = reverse('base-info')
+
+    def setUp(self):
+        base_info_cache.clear()
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+
+    def test_cached(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.client.get(self.url).data['offer_count'], 0)
+        Offer.objects.create(user=self.business, title='Logo', description='Paket')
+        self.assertEqual(self.client.get(self.url).data['offer_count'], 1)
+
+        Review.objects.create(business_user=self.business, reviewer=self.customer, rating=3, description='ok')
+        data = self.client.get(self.url).data
+        self.assertEqual((data['review_count'], data['average_rating']), (1, 3.0))
+
+        MarketUser.objects.create(user=User.objects.create_user(username='second', password='pass'), type='business')
+        self.assertEqual(self.client.get(self.url).data['business_profile_count'], 2)
+
+        self.customer.type = 'business'
+        self.customer.save()
+        self.assertEqual(self.client.get(self.url).data['business_profile_count'], 3)
+
+
+class SingleFlightTest(APITestCase):
+
+    def test_concurrent_misses_compute_once(self):
+        cache = LRUTTLCache(max_size=1, ttl=60)
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'value': len(calls)}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('key', compute))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        # let the followers queue up behind the first computation
+        for _ in range(500):
+            if cache.coalesced + len(calls) == 8:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 8)
+        self.assertEqual(cache.stats()['loads'], 1)
+
+    def test_error_reaches_every_caller(self):
+        cache = LRUTTLCache()
+
+        def compute():
+            raise ValueError('broken')
+
+        with self.assertRaises(ValueError):
+            cache.get_or_set('key', compute)
+        # nothing cached - the next caller computes again
+        self.assertEqual(cache.get_or_set('key', lambda: 1), 1)
+
+    def test_invalidation_during_compute_is_not_stored(self):
+        cache = LRUTTLCache()
+
+        def compute():
+            cache.delete('key')
+            return 'stale'
+
+        self.assertEqual(cache.get_or_set('key', compute), 'stale')
+        self.assertIsNone(cache.get('key'))
+
+
+class ConcurrentBaseInfoTest(TransactionTestCase):
+    """
+    Parallel requests against a cold cache - every thread has its own connection.
+    """
+
+    def setUp(self):
+        base_info_cache.clear()
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        for i in range(3):
+            Offer.objects.create(user=business, title=f'Paket {i}', description='Paket')
+
+    def request_base_info(self, barrier, results):
+        try:
+            barrier.wait(5)
+            results.append(APIClient().get(reverse('base-info')).data)
+        finally:
+            connection.close()
+
+    def test_concurrent_requests(self):
+        loads = base_info_cache.loads
+        barrier = threading.Barrier(8)
+        results = []
+        threads = [threading.Thread(target=self.request_base_info, args=(barrier, results)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        for data in results:
+            self.assertEqual(data['offer_count'], 3)
+            self.assertEqual(data['business_profile_count'], 1)
+        self.assertEqual(base_info_cache.loads - loads, 1)
+
+        Offer.objects.create(user=MarketUser.objects.get(), title='Neu', description='Paket')
+        self.assertEqual(APIClient().get(reverse('base-info')).data['offer_count'], 4)
@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from market.benchmarks.endpoints import compare, endpoints, measure, route_names
+from market.dataset import generate_dataset
+
+
+class EndpointBenchmarkTest(TestCase):
+    def test_every_route_has_an_endpoint(self):
+        generate_dataset(users=40)
+        cases = endpoints()
+        self.assertIn('rest_framework:login', route_names())
+        self.assertEqual(route_names() - {endpoint.route for endpoint in cases}, set())
+
+        result = measure(next(endpoint for endpoint in cases if endpoint.name == 'GET orders-list'), iterations=3, warmup=1)
+        self.assertEqual(set(result), {'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'memory_kb'})
+        self.assertEqual(result['queries'], 2)
+
+    def test_compare(self):
+        baseline = {'GET base-info': {'p50_ms': 10.0, 'p95_ms': 12.0, 'p99_ms': 20.0, 'queries': 2, 'memory_kb': 100.0}}
+        same = {'GET base-info': {'p50_ms': 11.0, 'p95_ms': 30.0, 'p99_ms': 40.0, 'queries': 2, 'memory_kb': 110.0}}
+        self.assertEqual(compare(baseline, same, 0.25), [])
+
+        worse = {'GET base-info': {'p50_ms': 15.0, 'p95_ms': 12.0, 'p99_ms': 20.0, 'queries': 3, 'memory_kb': 400.0}}
+        self.assertEqual(
+            {metric for _, metric, _, _ in compare(baseline, worse, 0.25)},
+            {'p50_ms', 'queries', 'memory_kb'},
+        )
+        # new endpoints are not regressions
+        self.assertEqual(compare({}, worse, 0.25), [])
@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from market.models import BusinessStats, MarketUser, Offer, OfferDetail, Order, Review
+from market.stats import find_drift
+
+
+class BusinessStatsTest(APITestCase):
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        offer = Offer.objects.create(user=self.business, title='Paket', description='Paket')
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=1, delivery_time_in_days=3, price=50, features=[], offer_type='basic'
+        )
+        self.client.force_authenticate(user=self.customer.user)
+
+    def create_order(self, status='in_progress'):
+        return Order.objects.create(offerdetail=self.detail, customer_user=self.customer, business_user=self.business, status=status)
+
+    def counts(self):
+        in_progress = self.client.get(reverse('business-order-count', kwargs={'pk': self.business.pk}))
+        completed = self.client.get(reverse('business-completed-order-count', kwargs={'pk': self.business.pk}))
+        return in_progress.data['order_count'], completed.data['completed_order_count']
+
+    def test_counts_without_stats_row(self):
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_unknown_user(self):
+        response = self.client.get(reverse('business-order-count', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
+    def test_order_lifecycle(self):
+        first = self.create_order()
+        self.create_order()
+        self.create_order(status='completed')
+        self.assertEqual(self.counts(), (2, 1))
+
+        first.status = 'completed'
+        first.save()
+        self.assertEqual(self.counts(), (1, 2))
+
+        first.delete()
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertEqual(find_drift(), {})
+
+    def test_single_row_read(self):
+        self.create_order()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('business-order-count', kwargs={'pk': self.business.pk}))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_reviews_in_base_info(self):
+        review = Review.objects.create(business_user=self.business, reviewer=self.customer, rating=4, description='gut')
+        other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='customer')
+        Review.objects.create(business_user=self.business, reviewer=other, rating=5, description='super')
+        response = self.client.get(reverse('base-info'))
+        self.assertEqual(response.data['review_count'], 2)
+        self.assertEqual(response.data['average_rating'], 4.5)
+
+        review.rating = 1
+        review.save()
+        response = self.client.get(reverse('base-info'))
+        self.assertEqual(response.data['average_rating'], 3.0)
+
+        review.delete()
+        stats = BusinessStats.objects.get(pk=self.business.pk)
+        self.assertEqual((stats.review_count, stats.rating_sum), (1, 5))
+
+    def test_rebuild_command(self):
+        self.create_order()
+        Review.objects.create(business_user=self.business, reviewer=self.customer, rating=3, description='ok')
+        BusinessStats.objects.filter(pk=self.business.pk).update(orders_in_progress=10)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_business_stats', '--check', stdout=StringIO())
+
+        call_command('rebuild_business_stats', stdout=StringIO())
+        call_command('rebuild_business_stats', '--check', stdout=StringIO())
+        self.assertEqual(self.counts(), (1, 0))
+
+    def review_stats(self, *ids):
+        return self.client.get(reverse('review-stats'), {'business_user_ids': ','.join(str(pk) for pk in ids)})
+
+    def test_review_stats(self):
+        reviewers = [self.customer] + [
+            MarketUser.objects.create(user=User.objects.create_user(username=f'reviewer{i}', password='pass'), type='customer')
+            for i in range(3)
+        ]
+        reviews = [
+            Review.objects.create(business_user=self.business, reviewer=reviewer, rating=rating, description='ok')
+            for reviewer, rating in zip(reviewers, [5, 5, 4, 1])
+        ]
+        reviews[3].rating = 2
+        reviews[3].save()
+        reviews[2].delete()
+        other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='business')
+
+        # the stats rows only, no review is read
+        with self.assertNumQueries(1):
+            response = self.review_stats(other.pk, self.business.pk, 999, self.customer.pk, self.business.pk)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'business_user': other.pk, 'review_count': 0, 'average_rating': None, 'ratings': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0}},
+            {'business_user': self.business.pk, 'review_count': 3, 'average_rating': 4.0, 'ratings': {'1': 0, '2': 1, '3': 0, '4': 0, '5': 2}},
+        ])
+        self.assertEqual(find_drift(), {})
+
+        BusinessStats.objects.filter(pk=self.business.pk).update(rating_5=0)
+        self.assertIn(self.business.pk, find_drift())
+        call_command('rebuild_business_stats', stdout=StringIO())
+        self.assertEqual(self.review_stats(self.business.pk).data[0]['ratings']['5'], 2)
+
+    def test_review_stats_invalid_ids(self):
+        for ids in ['', 'a,b', ','.join(str(pk) for pk in range(1, 102))]:
+            response = self.client.get(reverse('review-stats'), {'business_user_ids': ids})
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST, ids)
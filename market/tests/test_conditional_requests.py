@@ -0,0 +1,137 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED, HTTP_412_PRECONDITION_FAILED
+
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+from market.offer_list import offer_list_cache
+
+
+class ConditionalRequestTest(APITestCase):
+
+    def setUp(self):
+        offer_list_cache.clear()
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        self.offer = Offer.objects.create(user=self.business, title='Logo', description='Paket', min_price=100, min_delivery_time=5)
+        self.details = [
+            OfferDetail.objects.create(
+                offer=self.offer, title=t, revisions=1, delivery_time_in_days=5, price=100, features=[], offer_type=t
+            )
+            for t in ['basic', 'standard', 'premium']
+        ]
+        self.order = Order.objects.create(
+            offerdetail=self.details[0], customer_user=self.customer, business_user=self.business, status='in_progress'
+        )
+        self.review = Review.objects.create(business_user=self.business, reviewer=self.customer, rating=4, description='Gut')
+        self.client.force_authenticate(user=self.business.user)
+
+    def assertNotModified(self, url, params=None, queries=None, last_modified=True):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        # lists only have an ETag
+        self.assertEqual('Last-Modified' in response, last_modified)
+        etag = response['ETag']
+        if queries is None:
+            repeated = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        else:
+            with self.assertNumQueries(queries):
+                repeated = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeated.status_code, HTTP_304_NOT_MODIFIED)
+        self.assertEqual(repeated['ETag'], etag)
+        self.assertEqual(repeated.content, b'')
+        return etag
+
+    def test_offer_retrieve(self):
+        url = reverse('offers-detail', kwargs={'pk': self.offer.pk})
+        # the offer only - details are not loaded
+        etag = self.assertNotModified(url, queries=1)
+        self.client.patch(url, {'title': 'Neu'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_offer_list(self):
+        url = reverse('offers-list')
+        # validators only
+        etag = self.assertNotModified(url, {'min_price': 50}, queries=1, last_modified=False)
+        self.assertNotEqual(self.client.get(url, {'min_price': 500})['ETag'], etag)
+
+        self.client.force_authenticate(user=None)
+        # anonymous - validators come from the response cache
+        self.assertNotModified(url, {'search': 'logo'}, queries=0, last_modified=False)
+
+    def test_offer_list_changes_with_writes(self):
+        url = reverse('offers-list')
+        etag = self.client.get(url)['ETag']
+        Offer.objects.create(user=self.business, title='Zweites', description='Paket')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, HTTP_200_OK)
+
+    def test_offer_if_match(self):
+        url = reverse('offers-detail', kwargs={'pk': self.offer.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {'title': 'Erste'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # second writer with the old validator
+        response = self.client.patch(url, {'title': 'Zweite'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_412_PRECONDITION_FAILED)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.title, 'Erste')
+
+    def test_profile(self):
+        url = reverse('profile-detail', kwargs={'pk': self.business.pk})
+        etag = self.assertNotModified(url)
+        self.client.patch(url, {'location': 'Wien'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, HTTP_200_OK)
+
+    def test_orders(self):
+        self.assertNotModified(reverse('orders-list'), queries=1, last_modified=False)
+        url = reverse('orders-detail', kwargs={'pk': self.order.pk})
+        etag = self.assertNotModified(url)
+
+        response = self.client.patch(url, {'status': 'completed'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        response = self.client.patch(url, {'status': 'inprogress'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_412_PRECONDITION_FAILED)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'completed')
+
+    def test_orders_depend_on_user(self):
+        url = reverse('orders-list')
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(user=self.customer.user)
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_reviews(self):
+        url = reverse('reviews-list')
+        etag = self.assertNotModified(url, {'business_user_id': self.business.pk}, queries=1, last_modified=False)
+        self.assertNotModified(reverse('reviews-detail', kwargs={'pk': self.review.pk}))
+
+        self.client.force_authenticate(user=self.customer.user)
+        self.client.patch(reverse('reviews-detail', kwargs={'pk': self.review.pk}), {'rating': 5}, format='json')
+        response = self.client.get(url, {'business_user_id': self.business.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        url = reverse('reviews-detail', kwargs={'pk': self.review.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+    def test_list_after_delete(self):
+        url = reverse('reviews-list')
+        other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='customer')
+        Review.objects.create(business_user=self.business, reviewer=other, rating=1, description='Schlecht')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        # max(updated_at) stays the same, the list does not
+        self.review.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
@@ -0,0 +1,114 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+from market.pagination import KeysetPagination
+
+
+class CursorPaginationTest(APITestCase):
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        self.offers = [
+            Offer.objects.create(user=self.business, title=f'Offer {i}', description='Paket', min_price=i % 3 or None)
+            for i in range(7)
+        ]
+        # same updated_at for a few offers - the id tiebreaker has to keep the order stable
+        Offer.objects.filter(pk__in=[o.pk for o in self.offers[:4]]).update(updated_at=self.offers[0].updated_at)
+
+    def walk(self, url, params):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, HTTP_200_OK)
+            ids += [item['id'] for item in response.data['results']]
+            if response.data['next'] is None:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_offer_page_number_contract_kept(self):
+        response = self.client.get(reverse('offers-list'), {'page_size': 2})
+        self.assertEqual(response.data['count'], 7)
+        self.assertIn('results', response.data)
+
+    def test_offer_cursor_walk(self):
+        ids, last = self.walk(reverse('offers-list'), {'cursor': '', 'page_size': 2})
+        expected = list(Offer.objects.order_by('-updated_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertNotIn('count', last.data)
+
+        previous = self.client.get(last.data['previous'])
+        self.assertEqual([item['id'] for item in previous.data['results']], expected[4:6])
+        self.assertIsNotNone(previous.data['next'])
+
+    def test_offer_ordering(self):
+        # NULLs first like SQLite, ties broken by id in the same direction
+        for ordering in ['updated_at', '-updated_at', 'min_price', '-min_price', 'min_delivery_time', '-min_delivery_time']:
+            descending = ordering.startswith('-')
+            expected = list(Offer.objects.order_by(ordering, '-id' if descending else 'id').values_list('id', flat=True))
+            response = self.client.get(reverse('offers-list'), {'ordering': ordering, 'page_size': 20})
+            self.assertEqual([item['id'] for item in response.data['results']], expected, ordering)
+            ids, _ = self.walk(reverse('offers-list'), {'ordering': ordering, 'cursor': '', 'page_size': 2})
+            self.assertEqual(ids, expected, ordering)
+
+    def test_offer_default_ordering(self):
+        response = self.client.get(reverse('offers-list'), {'ordering': 'title', 'page_size': 20})
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            list(Offer.objects.order_by('-updated_at', '-id').values_list('id', flat=True)),
+        )
+
+    def test_offer_cursor_page_cost(self):
+        first = self.client.get(reverse('offers-list'), {'cursor': '', 'page_size': 2})
+        # validators, offers, details - no pagination COUNT
+        with self.assertNumQueries(3):
+            response = self.client.get(first.data['next'])
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('offers-list'), {'cursor': 'nonsense'})
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
+    def test_orders(self):
+        detail = OfferDetail.objects.create(
+            offer=self.offers[0], title='basic', revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        orders = [
+            Order.objects.create(offerdetail=detail, customer_user=self.customer, business_user=self.business, status='in_progress')
+            for _ in range(5)
+        ]
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.get(reverse('orders-list'))
+        self.assertEqual(len(response.data), 5)
+
+        ids, _ = self.walk(reverse('orders-list'), {'cursor': '', 'page_size': 2})
+        self.assertEqual(ids, [o.pk for o in reversed(orders)])
+
+    def test_reviews_keep_ordering(self):
+        reviews = []
+        for i, rating in enumerate([3, 1, 3, 5, 1]):
+            reviewer = MarketUser.objects.create(user=User.objects.create_user(username=f'reviewer{i}', password='pass'), type='customer')
+            reviews.append(Review.objects.create(business_user=self.business, reviewer=reviewer, rating=rating, description='ok'))
+        self.client.force_authenticate(user=self.customer.user)
+
+        ids, _ = self.walk(reverse('reviews-list'), {'cursor': '', 'page_size': 2, 'ordering': 'rating'})
+        expected = [r.pk for r in sorted(reviews, key=lambda r: (r.rating, r.pk))]
+        self.assertEqual(ids, expected)
+
+    def test_nullable_key(self):
+        paginator = KeysetPagination()
+        paginator.page_size = 2
+        queryset = Offer.objects.order_by('min_price')
+        url = '/api/offers/'
+        ids = []
+        while url:
+            request = Request(APIRequestFactory().get(url))
+            ids += [offer.pk for offer in paginator.paginate_queryset(queryset, request)]
+            url = paginator.get_next_link()
+        # NULLs first, then ascending, id breaks ties
+        expected = sorted(self.offers, key=lambda o: (o.min_price is not None, o.min_price or 0, o.pk))
+        self.assertEqual(ids, [o.pk for o in expected])
@@ -0,0 +1,47 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+
+from market.dataset import generate_dataset
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+from market.stats import find_drift
+
+
+class GenerateDatasetTest(TestCase):
+    def test_counts_and_relations(self):
+        counts = generate_dataset(users=50, business_ratio=0.2, offers_per_business=3, batch_size=7)
+        self.assertEqual(MarketUser.objects.filter(type='business').count(), 10)
+        self.assertEqual(counts['customer_users'], 40)
+        self.assertEqual(Offer.objects.count(), counts['offers'])
+        self.assertEqual(Order.objects.count(), counts['orders'])
+        self.assertEqual(Review.objects.count(), counts['reviews'])
+
+        tiers = Offer.objects.annotate(n=Count('details')).values_list('n', flat=True).distinct()
+        self.assertEqual(list(tiers), [3])
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'in_progress', 'completed'})
+        # orders belong to the business of their offer and carry its terms
+        for order in Order.objects.select_related('offerdetail__offer')[:20]:
+            self.assertEqual(order.business_user_id, order.offerdetail.offer.user_id)
+            self.assertEqual(order.price, order.offerdetail.price)
+        self.assertFalse(Review.objects.exclude(business_user__type='business').exists())
+        self.assertEqual(find_drift(), {})
+
+    def test_same_seed_same_data(self):
+        def details(prefix):
+            return list(
+                OfferDetail.objects.filter(offer__user__user__username__startswith=prefix)
+                .order_by('pk').values_list('title', 'price', 'delivery_time_in_days')
+            )
+
+        generate_dataset(users=30, seed=7, prefix='first')
+        generate_dataset(users=30, seed=7, prefix='second')
+        self.assertTrue(details('first'))
+        self.assertEqual(details('first'), details('second'))
+
+    def test_command_refuses_existing_prefix(self):
+        call_command('generate_dataset', users=5, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', users=5, stdout=StringIO())
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class DuplicateReviewsTest(TransactionTestCase):
+    """
+    Reviews written before migration 0008 added the unique constraint.
+    """
+    before = [('market', '0007_offer_updated_id_idx')]
+    after = [('market', '0008_query_indexes')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.addCleanup(self.migrate_forward)
+        self.apps = executor.loader.project_state(self.before).apps
+        User = self.apps.get_model('auth', 'User')
+        MarketUser = self.apps.get_model('market', 'MarketUser')
+        Review = self.apps.get_model('market', 'Review')
+
+        self.business = MarketUser.objects.create(user=User.objects.create(username='business'), type='business')
+        customer = MarketUser.objects.create(user=User.objects.create(username='customer'), type='customer')
+        other = MarketUser.objects.create(user=User.objects.create(username='other'), type='customer')
+        self.pair = (self.business.pk, customer.pk)
+        self.reviews = [
+            Review.objects.create(business_user=self.business, reviewer=customer, rating=rating, description='Ok')
+            for rating in [1, 2, 5]
+        ]
+        self.single = Review.objects.create(business_user=self.business, reviewer=other, rating=4, description='Gut')
+
+    def migrate_forward(self):
+        self.apps.get_model('market', 'Review').objects.all().delete()
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migration_reports_duplicates(self):
+        with self.assertRaisesMessage(CommandError, 'business user %s, reviewer %s: 3 reviews' % self.pair):
+            MigrationExecutor(connection).migrate(self.after)
+        self.assertEqual(self.apps.get_model('market', 'Review').objects.count(), 4)
+
+    def test_remove_duplicates(self):
+        out = StringIO()
+        call_command('remove_duplicate_reviews', stdout=out)
+        self.assertIn('2 reviews would be deleted', out.getvalue())
+        Review = self.apps.get_model('market', 'Review')
+        self.assertEqual(Review.objects.count(), 4)
+
+        call_command('remove_duplicate_reviews', '--delete', stdout=StringIO())
+        self.assertEqual(set(Review.objects.values_list('pk', flat=True)), {self.reviews[-1].pk, self.single.pk})
+        MigrationExecutor(connection).migrate(self.after)
+
+
+class BaselineDuplicateReviewsTest(DuplicateReviewsTest):
+    """
+    The cleanup before the first migrate, without the stats table of 0005.
+    """
+    before = [('market', '0004_alter_marketuser_working_hours_and_more')]
+
+    def test_remove_duplicates(self):
+        self.assertNotIn('market_businessstats', connection.introspection.table_names())
+        super().test_remove_duplicates()
@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
+from rest_framework.test import APIClient
+
+from market.metrics import BUCKETS
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import offer_list_cache
+from market.timing import install_query_timing
+
+
+def parse(response):
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line.startswith('#'):
+            continue
+        series, value = line.rsplit(' ', 1)
+        samples[series] = float(value)
+    return samples
+
+
+SCRAPER = {'Authorization': 'Bearer secret'}
+
+
+def scrape():
+    response = APIClient().get(reverse('metrics'), headers=SCRAPER)
+    return response, parse(response)
+
+
+def series(name, **labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}="{value}"' for label, value in labels.items()) + '}'
+
+
+@override_settings(METRICS=True, METRICS_TOKEN='secret')
+class MetricsTest(TestCase):
+    def setUp(self):
+        # the async test runs its queries on the connection of this thread, opened before the middleware
+        install_query_timing()
+        offer_list_cache.clear()
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        offer = Offer.objects.create(user=business, title='Logo', description='Paket', min_price=100, min_delivery_time=5)
+        OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=2, delivery_time_in_days=5, price=100, features=['Logo'], offer_type='basic'
+        )
+        self.offers = dict(route='offers-list', method='GET', status='2xx')
+
+    def test_request_metrics(self):
+        response, before = scrape()
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        APIClient().get(reverse('offers-list'))
+        APIClient().get(reverse('offers-list'))
+        APIClient().get('/api/nothing-here/')
+        _, after = scrape()
+
+        def delta(name, **labels):
+            return after[series(name, **labels)] - before.get(series(name, **labels), 0)
+
+        self.assertEqual(delta('market_http_requests_total', **self.offers), 2)
+        self.assertEqual(delta('market_http_request_duration_seconds_count', **self.offers), 2)
+        self.assertEqual(delta('market_http_request_duration_seconds_bucket', **self.offers, le='+Inf'), 2)
+        self.assertGreater(delta('market_http_request_duration_seconds_sum', **self.offers), 0)
+        # validators, count, offers, details - the second request is served from the cache
+        self.assertEqual(delta('market_db_queries_total', **self.offers), 4)
+        self.assertEqual(delta('market_http_requests_total', route='unmatched', method='GET', status='4xx'), 1)
+        self.assertEqual(delta('market_cache_hits_total', cache='offer_list'), 1)
+        # the scrape itself
+        self.assertEqual(after['market_http_requests_in_flight'], 1)
+
+        buckets = [after[series('market_http_request_duration_seconds_bucket', **self.offers, le=bound)] for bound in BUCKETS]
+        self.assertEqual(buckets, sorted(buckets))
+
+    @override_settings(ASYNC_READ_URLCONF='main.asgi_urls')
+    async def test_async_views(self):
+        client = AsyncClient()
+        before = parse(await client.get(reverse('metrics'), headers=SCRAPER))
+        await client.get(reverse('offers-list'))
+        after = parse(await client.get(reverse('metrics'), headers=SCRAPER))
+        queries = series('market_db_queries_total', **self.offers)
+        # run in worker threads
+        self.assertEqual(after[queries] - before.get(queries, 0), 4)
+
+    def test_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            _, before = scrape()
+            self.assertTrue(os.path.exists(os.path.join(directory, f'{os.getpid()}.json')))
+
+            buckets = [0] * (len(BUCKETS) + 1)
+            buckets[2] = 3
+            worker = {
+                'requests': [['offers-list', 'GET', '2xx', buckets, 0.06, 12]],
+                'in_flight': 2,
+                'caches': {'token': {'hits': 5, 'misses': 1, 'evictions': 0, 'invalidations': 0, 'loads': 0, 'coalesced': 0, 'size': 4}},
+            }
+            # a running worker and one that exited, its process id is not in use
+            for pid in [os.getppid(), 2 ** 22 + 1]:
+                with open(os.path.join(directory, f'{pid}.json'), 'w') as file:
+                    json.dump(worker, file)
+            _, after = scrape()
+
+        def delta(name, **labels):
+            return after[series(name, **labels)] - before.get(series(name, **labels), 0)
+
+        self.assertEqual(delta('market_http_request_duration_seconds_bucket', **self.offers, le='0.025'), 6)
+        self.assertEqual(delta('market_db_queries_total', **self.offers), 24)
+        self.assertEqual(after['market_http_requests_in_flight'], 1 + 2)
+        self.assertEqual(delta('market_cache_hits_total', cache='token'), 10)
+        self.assertEqual(delta('market_cache_entries', cache='token'), 4)
+
+    def test_token(self):
+        self.assertEqual(APIClient().get(reverse('metrics')).status_code, HTTP_401_UNAUTHORIZED)
+        response = APIClient().get(reverse('metrics'), headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+        self.assertEqual(scrape()[0].status_code, HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_admins_only_without_token(self):
+        self.assertEqual(APIClient().get(reverse('metrics'), headers={'Authorization': 'Bearer '}).status_code, HTTP_401_UNAUTHORIZED)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='customer', password='pass'))
+        self.assertEqual(client.get(reverse('metrics')).status_code, HTTP_403_FORBIDDEN)
+        client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+        self.assertEqual(client.get(reverse('metrics')).status_code, HTTP_200_OK)
+
+    @override_settings(METRICS=False)
+    def test_disabled(self):
+        _, before = scrape()
+        APIClient().get(reverse('offers-list'))
+        _, after = scrape()
+        requests = series('market_http_requests_total', **self.offers)
+        self.assertEqual(after.get(requests, 0), before.get(requests, 0))
@@ -0,0 +1,115 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
+
+from market.models import MarketUser, Offer, OfferDetail
+
+
+def offer_payload(title, prices=(50, 100, 150)):
+    return {
+        'title': title,
+        'description': 'Paket',
+        'details': [
+            {'title': t, 'revisions': 1, 'delivery_time_in_days': 10 - i, 'price': p, 'features': [], 'offer_type': t}
+            for i, (t, p) in enumerate(zip(['basic', 'standard', 'premium'], prices))
+        ]
+    }
+
+
+class OfferCreateTest(APITestCase):
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.client.force_authenticate(user=self.business.user)
+
+    def test_invalid_detail_writes_nothing(self):
+        data = offer_payload('Paket')
+        data['details'][2]['price'] = 'teuer'
+        response = self.client.post(reverse('offers-list'), data, format='json')
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(Offer.objects.count(), 0)
+        self.assertEqual(OfferDetail.objects.count(), 0)
+
+    def test_min_values(self):
+        response = self.client.post(reverse('offers-list'), offer_payload('Paket', prices=(80, 40, 120)), format='json')
+        offer = Offer.objects.get(pk=response.data['id'])
+        self.assertEqual((offer.min_price, offer.min_delivery_time), (40, 8))
+
+
+class OfferBatchTest(APITestCase):
+    url = reverse('offers-batch')
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.client.force_authenticate(user=self.business.user)
+
+    def test_create_many_with_constant_queries(self):
+        # savepoint, offer insert, detail inserts (two batches - SQLite parameter limit), release
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, [offer_payload(f'Paket {i}') for i in range(50)], format='json')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['created'], 50)
+        self.assertEqual(Offer.objects.count(), 50)
+        self.assertEqual(OfferDetail.objects.count(), 150)
+        self.assertEqual(Offer.objects.filter(min_price=50, min_delivery_time=8).count(), 50)
+
+    def test_per_item_errors(self):
+        broken = offer_payload('Kaputt')
+        broken['details'] = broken['details'][:2]
+        response = self.client.post(self.url, [offer_payload('Gut'), broken, 'nonsense'], format='json')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], 2)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'error', 'error'])
+        self.assertIn('details', response.data['results'][1]['errors'])
+        self.assertEqual(Offer.objects.count(), 1)
+
+    def test_upsert(self):
+        created = self.client.post(self.url, [offer_payload('Alt')], format='json').data['results'][0]['id']
+        other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='business')
+        foreign = Offer.objects.create(user=other, title='Fremd', description='Fremd')
+
+        items = [
+            {'id': created, 'title': 'Neu', 'details': [{'offer_type': 'basic', 'price': 20}]},
+            {'id': foreign.pk, 'title': 'Gekapert'},
+            offer_payload('Zusatz'),
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'error', 'created'])
+
+        offer = Offer.objects.get(pk=created)
+        self.assertEqual((offer.title, offer.min_price), ('Neu', 20))
+        self.assertEqual(offer.details.get(offer_type='basic').price, 20)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.title, 'Fremd')
+
+    def test_repeated_ids(self):
+        created = self.client.post(self.url, [offer_payload('Alt')], format='json').data['results'][0]['id']
+        items = [
+            # rejected, the second item is the fixed version
+            {'id': created, 'title': 'Kaputt', 'details': [{'offer_type': 'basic', 'price': 'teuer'}]},
+            {'id': created, 'title': 'Neu', 'details': [{'offer_type': 'basic', 'price': 20}]},
+            {'id': created, 'title': 'Doppelt'},
+            {'id': True, 'title': 'Wahr'},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['error', 'updated', 'error', 'error'])
+        self.assertIn('price', str(results[0]['errors']))
+        self.assertIn('more than once', str(results[2]['errors']))
+        self.assertIn('valid integer', str(results[3]['errors']))
+
+        offer = Offer.objects.get(pk=created)
+        self.assertEqual((offer.title, offer.min_price), ('Neu', 20))
+
+    def test_all_invalid(self):
+        response = self.client.post(self.url, [{'title': 'ohne details'}], format='json')
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_customer_forbidden(self):
+        customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        self.client.force_authenticate(user=customer.user)
+        response = self.client.post(self.url, [offer_payload('Paket')], format='json')
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from market.constants import OFFER_DELIVERY_FACETS, OFFER_PRICE_FACETS
+from market.models import MarketUser, Offer
+from market.offer_list import facet_ranges, offer_list_cache
+from market.tests.test_query_plans import QueryPlanMixin
+
+
+class OfferFacetsTest(QueryPlanMixin, APITestCase):
+
+    def setUp(self):
+        offer_list_cache.clear()
+        self.businesses = [
+            MarketUser.objects.create(user=User.objects.create_user(username=f'business{i}', password='pass'), type='business')
+            for i in range(3)
+        ]
+        for i in range(12):
+            Offer.objects.create(
+                user=self.businesses[i % 3 if i < 9 else 0], title='Logo Design' if i % 2 else 'Animation', description='Paket',
+                min_price=None if i == 11 else 40 * i, min_delivery_time=i * 3,
+            )
+
+    def expected(self, offers):
+        def counts(field, bounds):
+            return [
+                {'from': low, 'to': high, 'count': sum(
+                    1 for offer in offers
+                    if getattr(offer, field) is not None and getattr(offer, field) >= low and (high is None or getattr(offer, field) < high)
+                )}
+                for low, high in facet_ranges(bounds)
+            ]
+
+        creators = {}
+        for offer in offers:
+            creators[offer.user_id] = creators.get(offer.user_id, 0) + 1
+        return {
+            'min_price': counts('min_price', OFFER_PRICE_FACETS),
+            'min_delivery_time': counts('min_delivery_time', OFFER_DELIVERY_FACETS),
+            'creator_id': [
+                {'creator_id': creator_id, 'count': count}
+                for creator_id, count in sorted(creators.items(), key=lambda item: (-item[1], item[0]))
+            ],
+        }
+
+    def test_counts_of_the_filtered_offers(self):
+        cases = [
+            ({}, Offer.objects.all()),
+            ({'min_price': 100}, Offer.objects.filter(min_price__gte=100)),
+            ({'max_delivery_time': 12, 'creator_id': self.businesses[0].pk}, Offer.objects.filter(min_delivery_time__lte=12, user=self.businesses[0])),
+            ({'search': 'logo'}, Offer.objects.filter(title__startswith='Logo')),
+        ]
+        for params, offers in cases:
+            response = self.client.get(reverse('offers-list'), {**params, 'facets': 1, 'page_size': 2})
+            self.assertEqual(response.data['facets'], self.expected(list(offers)), params)
+            self.assertEqual(response.data['count'], offers.count(), params)
+            self.assertEqual(len(response.data['results']), 2, params)
+
+    def test_one_query(self):
+        with CaptureQueriesContext(connection) as plain:
+            response = self.client.get(reverse('offers-list'))
+        self.assertNotIn('facets', response.data)
+        with CaptureQueriesContext(connection) as faceted:
+            response = self.client.get(reverse('offers-list'), {'facets': 'true'})
+        self.assertIn('facets', response.data)
+        self.assertEqual(len(faceted), len(plain) + 1)
+
+    def test_uses_covering_index(self):
+        for params in [{}, {'creator_id': self.businesses[1].pk}]:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('offers-list'), {**params, 'facets': 1})
+            sql = next(query['sql'] for query in ctx.captured_queries if 'GROUP BY' in query['sql'])
+            plan = self.explain(sql)
+            self.assertTrue(any('COVERING INDEX offer_facets_idx' in step for step in plan), plan)
+
+    @override_settings(ASYNC_READ_URLCONF='main.asgi_urls')
+    async def test_async_view(self):
+        response = await AsyncClient().get(reverse('offers-list'), {'facets': 1, 'min_price': 100})
+        offers = [offer async for offer in Offer.objects.filter(min_price__gte=100)]
+        self.assertEqual(response.json()['facets'], self.expected(offers))
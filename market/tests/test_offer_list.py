@@ -0,0 +1,54 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import offer_list_values, serialize_offer_list
+from market.serializers import OfferListSerializer
+
+
+class OfferListFastPathTest(APITestCase):
+
+    def setUp(self):
+        self.marketuser = MarketUser.objects.create(
+            user=User.objects.create_user(username='business', password='pass'), type='business'
+        )
+        for i in range(6):
+            offer = Offer.objects.create(
+                user=self.marketuser, title=f'Logo Design {i}', description='Beschreibung äöü "quoted"',
+                image=f'offer-images/bild {i}.png' if i % 2 else None,
+                min_price=None if i == 5 else 10 * i, min_delivery_time=i,
+            )
+            # the last offer has no details
+            for offer_type in ['basic', 'standard', 'premium'][:3 if i < 5 else 0]:
+                OfferDetail.objects.create(
+                    offer=offer, title=offer_type, revisions=1, delivery_time_in_days=3,
+                    price='19.90', features=['Logo'], offer_type=offer_type
+                )
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def serializer_output(self, queryset):
+        return OfferListSerializer(queryset, many=True, context={'request': None}).data
+
+    def test_same_bytes_as_serializer(self):
+        queryset = Offer.objects.order_by('id')
+        fast = serialize_offer_list(offer_list_values(queryset))
+        self.assertEqual(self.render(fast), self.render(self.serializer_output(queryset)))
+
+    def test_endpoint_same_bytes_as_serializer(self):
+        for params in [{}, {'cursor': ''}, {'search': 'logo'}, {'min_price': 20, 'page_size': 2}]:
+            response = self.client.get(reverse('offers-list'), params)
+            ids = [item['id'] for item in response.data['results']]
+            self.assertTrue(ids, params)
+            offers = sorted(Offer.objects.filter(pk__in=ids), key=lambda offer: ids.index(offer.pk))
+            self.assertEqual(
+                self.render(response.data['results']),
+                self.render(self.serializer_output(offers)),
+                params,
+            )
+
+    def test_empty(self):
+        self.assertEqual(serialize_offer_list(offer_list_values(Offer.objects.none())), [])
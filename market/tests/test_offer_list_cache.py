@@ -0,0 +1,101 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
+
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import offer_list_cache
+
+
+def create_offer(marketuser, title):
+    offer = Offer.objects.create(user=marketuser, title=title, description='Paket', min_price=100, min_delivery_time=5)
+    for offer_type, price in [('basic', 100), ('standard', 200), ('premium', 300)]:
+        OfferDetail.objects.create(
+            offer=offer, title=offer_type, revisions=2, delivery_time_in_days=5,
+            price=price, features=['Logo'], offer_type=offer_type
+        )
+    return offer
+
+
+class OfferListCacheTest(APITestCase):
+    url = reverse('offers-list')
+
+    def setUp(self):
+        offer_list_cache.clear()
+        self.user = User.objects.create_user(username='business', password='pass')
+        self.marketuser = MarketUser.objects.create(user=self.user, type='business')
+        self.offers = [create_offer(self.marketuser, f'Logo {i}') for i in range(3)]
+
+    def assertCached(self, first, second):
+        response = self.client.get(self.url + first)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url + second)
+        self.assertEqual(cached.status_code, HTTP_200_OK)
+        self.assertEqual(cached.content, response.content)
+
+    def test_repeated_anonymous_request(self):
+        self.assertCached('?search=logo&page_size=2', '?search=logo&page_size=2')
+
+    def test_query_string_is_normalized(self):
+        self.assertCached('?min_price=50&page_size=2', '?page_size=2&min_price=50&utm_source=mail')
+
+    def test_other_params_are_different_entries(self):
+        self.client.get(self.url, {'page_size': 2})
+        response = self.client.get(self.url, {'page_size': 2, 'page': 2})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_authenticated_requests_are_not_cached(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.url)
+        # validators, count, offers, details
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_writes_invalidate(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'title': 'Neues Paket',
+            'description': 'Beschreibung',
+            'details': [
+                {'title': t, 'revisions': 1, 'delivery_time_in_days': 3, 'price': 50, 'features': [], 'offer_type': t}
+                for t in ['basic', 'standard', 'premium']
+            ]
+        }
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, HTTP_201_CREATED)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).data['count'], 4)
+
+        offer = self.offers[0]
+        self.client.force_authenticate(user=self.user)
+        detail_url = reverse('offers-detail', kwargs={'pk': offer.pk})
+        self.client.patch(detail_url, {'title': 'Umbenannt'}, format='json')
+        self.client.force_authenticate(user=None)
+        titles = [item['title'] for item in self.client.get(self.url).data['results']]
+        self.assertIn('Umbenannt', titles)
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.delete(detail_url).status_code, HTTP_204_NO_CONTENT)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).data['count'], 3)
+
+    def test_batch_import_invalidates(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('offers-batch'), [{'id': self.offers[1].pk, 'title': 'Per Import'}], format='json')
+        self.client.force_authenticate(user=None)
+        titles = [item['title'] for item in self.client.get(self.url).data['results']]
+        self.assertIn('Per Import', titles)
+
+    def test_hit_ratio_metrics(self):
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        before = offer_list_cache.stats()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.force_authenticate(user=admin)
+        stats = self.client.get(reverse('cache-stats')).data['offer_list_cache']
+        self.assertEqual(stats['hits'] - before['hits'], 2)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertIsNotNone(stats['hit_ratio'])
+        self.assertIn('version', stats)
@@ -0,0 +1,72 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED
+
+from market.models import MarketUser, Offer, OfferDetail
+from market.tests.utils import QueryBudgetMixin
+
+
+def create_offer(marketuser, title='Grafikdesign'):
+    offer = Offer.objects.create(user=marketuser, title=title, description='Paket', min_price=100, min_delivery_time=5)
+    for offer_type, price in [('basic', 100), ('standard', 200), ('premium', 300)]:
+        OfferDetail.objects.create(
+            offer=offer, title=offer_type, revisions=2, delivery_time_in_days=5,
+            price=price, features=['Logo'], offer_type=offer_type
+        )
+    return offer
+
+
+class OfferQueryBudgetTest(QueryBudgetMixin, APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='business', password='pass')
+        self.marketuser = MarketUser.objects.create(user=self.user, type='business')
+        self.offers = [create_offer(self.marketuser, f'Offer {i}') for i in range(25)]
+
+    def test_list_budget_independent_of_page_size(self):
+        url = reverse('offers-list')
+        # validators, count, offers, details
+        with self.assertQueryBudget(4):
+            response = self.client.get(url, {'page_size': 5})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        with self.assertQueryBudget(4):
+            response = self.client.get(url, {'page_size': 1000})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(len(response.data['results'][0]['details']), 3)
+
+    def test_retrieve_budget(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('offers-detail', kwargs={'pk': self.offers[0].pk})
+        # offer, details
+        with self.assertQueryBudget(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_create_budget(self):
+        self.client.force_authenticate(user=self.user)
+        data = {
+            'title': 'Neues Paket',
+            'description': 'Beschreibung',
+            'details': [
+                {'title': t, 'revisions': 1, 'delivery_time_in_days': d, 'price': p, 'features': [], 'offer_type': t}
+                for t, d, p in [('basic', 7, 50), ('standard', 5, 100), ('premium', 3, 150)]
+            ]
+        }
+        # offer insert, one insert for all details, response details - in one transaction
+        with self.assertQueryBudget(3):
+            response = self.client.post(reverse('offers-list'), data, format='json')
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(len(response.data['details']), 3)
+
+    def test_partial_update_returns_fresh_details(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('offers-detail', kwargs={'pk': self.offers[0].pk})
+        data = {'title': 'Neuer Titel', 'details': [{'offer_type': 'basic', 'price': 80}]}
+        # savepoint, offer, details, detail update, offer update, release, response details
+        with self.assertQueryBudget(7):
+            response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        basic = next(d for d in response.data['details'] if d['offer_type'] == 'basic')
+        self.assertEqual(basic['price'], '80.00')
@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+
+from market.models import MarketUser, Offer
+
+
+class OfferSearchTest(APITestCase):
+    url = reverse('offers-list')
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='business')
+        self.logo = self.create_offer(self.business, 'Logo Design', 'Ein modernes Logo', 50, 3)
+        self.website = self.create_offer(self.business, 'Website', 'Webdesign mit Logo im Footer', 500, 14)
+        self.video = self.create_offer(self.other, 'Videoschnitt', 'Schnitt und Animation', 200, 7)
+
+    def create_offer(self, user, title, description, price, delivery):
+        return Offer.objects.create(user=user, title=title, description=description, min_price=price, min_delivery_time=delivery)
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_ranked_by_relevance(self):
+        # title hits rank above description hits
+        self.assertEqual(self.search(search='logo'), [self.logo.pk, self.website.pk])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search(search='anim'), [self.video.pk])
+        self.assertEqual(self.search(search='Web'), [self.website.pk])
+        self.assertEqual(self.search(search='design'), [self.logo.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search(search='logo footer'), [self.website.pk])
+        self.assertEqual(self.search(search='logo animation'), [])
+
+    def test_short_terms_and_operators(self):
+        self.assertEqual(self.search(search='e'), [self.logo.pk])
+        self.assertEqual(self.search(search='"logo OR'), [])
+
+    def test_composes_with_filters_and_pagination(self):
+        self.assertEqual(self.search(search='logo', min_price=100), [self.website.pk])
+        self.assertEqual(self.search(search='design', creator_id=self.business.pk, max_delivery_time=5), [self.logo.pk])
+        response = self.client.get(self.url, {'search': 'logo', 'page_size': 1, 'page': 2})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.website.pk])
+
+    def test_cursor(self):
+        # relevance has no keyset
+        response = self.client.get(self.url, {'search': 'logo', 'cursor': ''})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'search': 'logo', 'ordering': 'min_price', 'cursor': '', 'page_size': 1})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.logo.pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], [self.website.pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_index_follows_writes(self):
+        self.logo.title = 'Illustration'
+        self.logo.description = 'Zeichnung'
+        self.logo.save()
+        self.assertEqual(self.search(search='logo'), [self.website.pk])
+        self.assertEqual(self.search(search='zeichnung'), [self.logo.pk])
+
+        Offer.objects.filter(pk=self.video.pk).update(title='Podcast')
+        self.assertEqual(self.search(search='podcast'), [self.video.pk])
+
+        self.website.delete()
+        self.assertEqual(self.search(search='footer'), [])
+
+    def test_rebuild_command(self):
+        call_command('rebuild_offer_search', stdout=StringIO())
+        call_command('rebuild_offer_search', '--check', stdout=StringIO())
+        self.assertEqual(self.search(search='logo'), [self.logo.pk, self.website.pk])
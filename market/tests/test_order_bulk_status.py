@@ -0,0 +1,73 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
+
+from market.models import MarketUser, Offer, OfferDetail, Order
+from market.stats import find_drift
+
+
+class OrderBulkStatusTest(APITestCase):
+    url = reverse('orders-bulk-status')
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.other = MarketUser.objects.create(user=User.objects.create_user(username='other', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        self.orders = [self.create_order(self.business) for _ in range(5)]
+        self.foreign = self.create_order(self.other)
+        self.orders[0].status = 'completed'
+        self.orders[0].save()
+        self.client.force_authenticate(user=self.business.user)
+
+    def create_order(self, business):
+        offer = Offer.objects.create(user=business, title='Paket', description='Paket')
+        detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=1, delivery_time_in_days=3, price=50, features=[], offer_type='basic'
+        )
+        return Order.objects.create(offerdetail=detail, customer_user=self.customer, business_user=business, status='in_progress')
+
+    def test_bulk_complete(self):
+        ids = [order.pk for order in self.orders] + [self.foreign.pk, 9999]
+        # savepoint, ownership select, update, stats update, release
+        with self.assertNumQueries(5):
+            response = self.client.patch(self.url, {'ids': ids, 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 4)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['unchanged', 'updated', 'updated', 'updated', 'updated', 'not_found', 'not_found'])
+
+        self.assertEqual(Order.objects.filter(business_user=self.business, status='completed').count(), 5)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, 'in_progress')
+        self.assertEqual(find_drift(), {})
+
+        count = self.client.get(reverse('business-completed-order-count', kwargs={'pk': self.business.pk}))
+        self.assertEqual(count.data['completed_order_count'], 5)
+
+    def test_invalid_payload(self):
+        response = self.client.patch(self.url, {'ids': [], 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        response = self.client.patch(self.url, {'ids': [1], 'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_customer_forbidden(self):
+        self.client.force_authenticate(user=self.customer.user)
+        response = self.client.patch(self.url, {'ids': [self.orders[1].pk], 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+
+    def test_bulk_reopen(self):
+        ids = [order.pk for order in self.orders]
+        self.client.patch(self.url, {'ids': ids, 'status': 'completed'}, format='json')
+        # the stored value and the key of ORDER_STATUS both mean in progress
+        for status in ['in_progress', 'inprogress']:
+            response = self.client.patch(self.url, {'ids': ids[:2], 'status': status}, format='json')
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(Order.objects.filter(business_user=self.business, status='in_progress').count(), 2)
+        self.assertEqual(find_drift(), {})
+
+        count = self.client.get(reverse('business-order-count', kwargs={'pk': self.business.pk}))
+        self.assertEqual(count.data['order_count'], 2)
+        count = self.client.get(reverse('business-completed-order-count', kwargs={'pk': self.business.pk}))
+        self.assertEqual(count.data['completed_order_count'], 3)
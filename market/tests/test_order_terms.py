@@ -0,0 +1,50 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED
+
+from market.models import MarketUser, Offer, OfferDetail
+
+
+class OrderTermsTest(APITestCase):
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        offer = Offer.objects.create(user=self.business, title='Paket', description='Paket')
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title='Logo Basic', revisions=2, delivery_time_in_days=5, price=150, features=['Logo'], offer_type='basic'
+        )
+        self.client.force_authenticate(user=self.customer.user)
+
+    def test_terms_copied_and_stable(self):
+        response = self.client.post(reverse('orders-list'), {'offer_detail_id': self.detail.pk}, format='json')
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        expected = {
+            'title': 'Logo Basic',
+            'revisions': 2,
+            'delivery_time_in_days': 5,
+            'price': '150.00',
+            'features': ['Logo'],
+            'offer_type': 'basic',
+        }
+        for key, value in expected.items():
+            self.assertEqual(response.data[key], value)
+
+        self.detail.price = 999
+        self.detail.title = 'Teurer'
+        self.detail.save()
+
+        # validators and a single table read
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('orders-list'))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data[0]['price'], '150.00')
+        self.assertEqual(response.data[0]['title'], 'Logo Basic')
+
+    def test_terms_read_only(self):
+        order_id = self.client.post(reverse('orders-list'), {'offer_detail_id': self.detail.pk}, format='json').data['id']
+        response = self.client.patch(reverse('orders-detail', kwargs={'pk': order_id}), {'price': 1, 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data['price'], '150.00')
+        self.assertEqual(response.data['status'], 'completed')
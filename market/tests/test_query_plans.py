@@ -0,0 +1,91 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+
+
+class QueryPlanMixin:
+    """
+    Runs EXPLAIN QUERY PLAN on the queries of a request - every table has to be read through an index.
+    The test database is not ANALYZEd, so SQLite plans as if the tables were large.
+    """
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def table_queries(self, captured, table):
+        queries = [
+            query['sql'] for query in captured
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+        ]
+        if not queries:
+            self.fail(f'No query on {table} captured')
+        return queries
+
+    def assertIndexedRequest(self, url, params, table, index=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        # validator aggregates run before the list query itself
+        plans = [self.explain(sql) for sql in self.table_queries(ctx.captured_queries, table)]
+        for plan in plans:
+            for step in plan:
+                if step.startswith('SCAN') and 'VIRTUAL TABLE' not in step:
+                    self.assertIn('USING', step, f'Full scan in plan: {plan}')
+        plan = plans[-1]
+        if index:
+            self.assertTrue(any(index in step for step in plan), f'{index} not used: {plan}')
+        return plan
+
+
+class QueryPlanTest(QueryPlanMixin, APITestCase):
+
+    def setUp(self):
+        self.business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        self.customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        offer = Offer.objects.create(user=self.business, title='Paket', description='Paket', min_price=10, min_delivery_time=3)
+        detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=1, delivery_time_in_days=3, price=10, features=[], offer_type='basic'
+        )
+        Order.objects.create(offerdetail=detail, customer_user=self.customer, business_user=self.business, status='in_progress')
+        Review.objects.create(business_user=self.business, reviewer=self.customer, rating=5, description='gut')
+        self.client.force_authenticate(user=self.customer.user)
+
+    def test_offer_filters(self):
+        self.assertIndexedRequest(reverse('offers-list'), {'min_price': 5}, 'market_offer', 'offer_min_price_idx')
+        self.assertIndexedRequest(reverse('offers-list'), {'max_delivery_time': 5}, 'market_offer', 'offer_min_delivery_idx')
+        self.assertIndexedRequest(reverse('offers-list'), {'cursor': ''}, 'market_offer', 'offer_updated_id_idx')
+
+    def test_offer_ordering(self):
+        indexes = {'updated_at': 'offer_updated_id_idx', 'min_price': 'offer_min_price_idx', 'min_delivery_time': 'offer_min_delivery_idx'}
+        for field, index in indexes.items():
+            for ordering in [field, f'-{field}']:
+                for params in [{'ordering': ordering}, {'ordering': ordering, 'cursor': ''}]:
+                    # SQLite indexes end with the rowid - the id tiebreaker needs no sort either
+                    plan = self.assertIndexedRequest(reverse('offers-list'), params, 'market_offer', index)
+                    self.assertFalse(any('TEMP B-TREE' in step for step in plan), f'{params}: {plan}')
+
+    def test_orders(self):
+        self.assertIndexedRequest(reverse('orders-list'), {}, 'market_order')
+
+    def test_order_counts(self):
+        self.assertIndexedRequest(reverse('business-order-count', kwargs={'pk': self.business.pk}), {}, 'market_marketuser')
+        self.assertIndexedRequest(reverse('business-completed-order-count', kwargs={'pk': self.business.pk}), {}, 'market_marketuser')
+
+    def test_reviews(self):
+        url = reverse('reviews-list')
+        self.assertIndexedRequest(url, {'business_user_id': self.business.pk, 'ordering': 'rating'}, 'market_review', 'review_business_rating_idx')
+        self.assertIndexedRequest(url, {'business_user_id': self.business.pk, 'ordering': 'updated_at'}, 'market_review', 'review_business_updated_idx')
+        self.assertIndexedRequest(url, {'reviewer_id': self.customer.pk, 'ordering': 'rating'}, 'market_review', 'review_reviewer_rating_idx')
+        self.assertIndexedRequest(url, {'reviewer_id': self.customer.pk, 'ordering': 'updated_at'}, 'market_review', 'review_reviewer_updated_idx')
+        self.assertIndexedRequest(url, {'business_user_id': self.business.pk, 'reviewer_id': self.customer.pk}, 'market_review', '(business_user_id=? AND reviewer_id=?)')
+
+    def test_duplicate_review_rejected_by_constraint(self):
+        response = self.client.post(reverse('reviews-list'), {'business_user': self.business.pk, 'rating': 4, 'description': 'nochmal'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Review.objects.count(), 1)
@@ -0,0 +1,96 @@
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED
+from rest_framework.test import APIClient
+
+from market.authentication import token_cache
+from market.models import MarketUser, Offer, OfferDetail
+from market.offer_list import offer_list_cache
+from market.replica import PIN_COOKIE, pinned_clients, replica_reads
+
+
+@override_settings(READ_REPLICA='replica')
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        pinned_clients.clear()
+        token_cache.clear()
+        offer_list_cache.clear()
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        offer = Offer.objects.create(user=business, title='Logo', description='Paket', min_price=100, min_delivery_time=5)
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=2, delivery_time_in_days=5, price=100, features=['Logo'], offer_type='basic'
+        )
+        self.token = Token.objects.create(user=customer.user).key
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        return client
+
+    def tables(self, alias, request):
+        with CaptureQueriesContext(connections[alias]) as ctx:
+            response = request()
+        return response, {query['sql'].split(' FROM "')[1].split('"')[0] for query in ctx.captured_queries if ' FROM "' in query['sql']}
+
+    def test_reads_go_to_replica(self):
+        client = self.client_for(self.token)
+        with CaptureQueriesContext(connections['default']) as primary:
+            response, replica_tables = self.tables('replica', lambda: client.get(reverse('orders-list')))
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertIn('market_order', replica_tables)
+        # tokens and users are not market models
+        self.assertTrue(any('authtoken_token' in query['sql'] for query in primary.captured_queries))
+        self.assertFalse(any('market_order' in query['sql'] for query in primary.captured_queries))
+
+    def test_client_reads_its_writes_from_primary(self):
+        client = self.client_for(self.token)
+        response = client.post(reverse('orders-list'), {'offer_detail_id': self.detail.pk}, format='json')
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        # a client without the cookie, pinned through its token
+        response, replica_tables = self.tables('replica', lambda: self.client_for(self.token).get(reverse('orders-list')))
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(replica_tables, set())
+
+        pinned_clients.clear()
+        # the cookie alone pins as well
+        _, replica_tables = self.tables('replica', lambda: client.get(reverse('orders-list')))
+        self.assertEqual(replica_tables, set())
+
+    def test_login_pins_the_new_token(self):
+        Token.objects.all().delete()
+        response = APIClient().post(reverse('login'), {'username': 'customer', 'password': 'pass'}, format='json')
+        _, replica_tables = self.tables('replica', lambda: self.client_for(response.data['token']).get(reverse('orders-list')))
+        self.assertEqual(replica_tables, set())
+
+    def test_anonymous_offer_list_fills_cache_from_primary(self):
+        _, replica_tables = self.tables('replica', lambda: APIClient().get(reverse('offers-list')))
+        self.assertEqual(replica_tables, set())
+
+    @override_settings(OFFER_LIST_REPLICA_LAG_TOLERANT=True)
+    def test_lag_tolerant_offer_list(self):
+        _, replica_tables = self.tables('replica', lambda: APIClient().get(reverse('offers-list')))
+        self.assertIn('market_offer', replica_tables)
+
+    def test_transactions_and_writes_use_primary(self):
+        with replica_reads():
+            self.assertEqual(Offer.objects.all().db, 'replica')
+            with transaction.atomic():
+                self.assertEqual(Offer.objects.all().db, 'default')
+            self.assertEqual(Offer.objects.select_for_update().db, 'default')
+            self.assertEqual(User.objects.all().db, 'default')
+
+    @override_settings(READ_REPLICA=None)
+    def test_without_replica(self):
+        with replica_reads():
+            self.assertEqual(Offer.objects.all().db, 'default')
+        response = self.client_for(self.token).post(reverse('orders-list'), {'offer_detail_id': self.detail.pk}, format='json')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,113 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from market.authentication import MarketTokenAuthentication
+from market.models import MarketUser, Offer, OfferDetail, Order, Review
+
+
+class RequestQueryCountTest(APITestCase):
+    """
+    Pins the queries per request with token authentication and a warm token cache -
+    user and MarketUser come from the cache without any query.
+    """
+
+    def setUp(self):
+        self.business = self.create_marketuser('business', 'business')
+        self.customer = self.create_marketuser('customer', 'customer')
+        self.offer = Offer.objects.create(user=self.business, title='Paket', description='Paket', min_price=10, min_delivery_time=3)
+        self.details = [
+            OfferDetail.objects.create(
+                offer=self.offer, title=t, revisions=1, delivery_time_in_days=3, price=10, features=[], offer_type=t
+            )
+            for t in ['basic', 'standard', 'premium']
+        ]
+        self.order = Order.objects.create(
+            offerdetail=self.details[0], customer_user=self.customer, business_user=self.business, status='in_progress'
+        )
+        self.review = Review.objects.create(business_user=self.business, reviewer=self.customer, rating=4, description='gut')
+
+    def create_marketuser(self, username, type):
+        user = User.objects.create_user(username=username, password='pass')
+        return MarketUser.objects.create(user=user, type=type)
+
+    def login(self, marketuser):
+        token = Token.objects.create(user=marketuser.user)
+        MarketTokenAuthentication().authenticate_credentials(token.key)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def assertQueries(self, count, method, url, data=None):
+        with self.assertNumQueries(count):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400, response.data)
+        return response
+
+    def test_profile(self):
+        self.login(self.customer)
+        url = reverse('profile-detail', kwargs={'pk': self.customer.pk})
+        # profile
+        self.assertQueries(1, 'get', url)
+        # profile, profile update, user update
+        self.assertQueries(3, 'patch', url, {'location': 'Wien', 'email': 'neu@mail.de'})
+
+    def test_profile_lists(self):
+        self.login(self.customer)
+        # profiles with their users
+        self.assertQueries(1, 'get', reverse('customer-list'))
+        self.assertQueries(1, 'get', reverse('business-list'))
+
+    def test_offers_as_business(self):
+        self.login(self.business)
+        # offer, details
+        self.assertQueries(2, 'get', reverse('offers-detail', kwargs={'pk': self.offer.pk}))
+        # savepoint, offer, details, detail update, offer update, release, response details
+        self.assertQueries(7, 'patch', reverse('offers-detail', kwargs={'pk': self.offer.pk}), {'title': 'Neu', 'details': [{'offer_type': 'basic', 'revisions': 3}]})
+        data = {
+            'title': 'Paket 2',
+            'description': 'Paket',
+            'details': [
+                {'title': t, 'revisions': 1, 'delivery_time_in_days': 3, 'price': 10, 'features': [], 'offer_type': t}
+                for t in ['basic', 'standard', 'premium']
+            ]
+        }
+        # offer insert, one insert for all details, response details - in one transaction
+        self.assertQueries(3, 'post', reverse('offers-list'), data)
+
+    def test_offer_detail(self):
+        self.login(self.customer)
+        # detail
+        self.assertQueries(1, 'get', reverse('offerdetail', kwargs={'pk': self.details[0].pk}))
+
+    def test_orders(self):
+        self.login(self.customer)
+        # validators, orders
+        self.assertQueries(2, 'get', reverse('orders-list'))
+        # detail with offer, order insert, stats update
+        self.assertQueries(3, 'post', reverse('orders-list'), {'offer_detail_id': self.details[1].pk})
+
+    def test_order_status(self):
+        self.login(self.business)
+        # savepoint, locked order, previous state, update, stats update, release
+        self.assertQueries(6, 'patch', reverse('orders-detail', kwargs={'pk': self.order.pk}), {'status': 'completed'})
+
+    def test_order_counts(self):
+        self.login(self.customer)
+        # stats row
+        self.assertQueries(1, 'get', reverse('business-order-count', kwargs={'pk': self.business.pk}))
+        self.assertQueries(1, 'get', reverse('business-completed-order-count', kwargs={'pk': self.business.pk}))
+
+    def test_reviews(self):
+        self.login(self.customer)
+        # validators, reviews
+        self.assertQueries(2, 'get', reverse('reviews-list'), {'business_user_id': self.business.pk})
+        # review, previous state, update, stats update
+        self.assertQueries(4, 'patch', reverse('reviews-detail', kwargs={'pk': self.review.pk}), {'rating': 5})
+        # review, delete, stats update
+        self.assertQueries(3, 'delete', reverse('reviews-detail', kwargs={'pk': self.review.pk}))
+
+    def test_base_info(self):
+        # stats totals, business profiles, offers
+        self.assertQueries(3, 'get', reverse('base-info'))
+        # cached
+        self.assertQueries(0, 'get', reverse('base-info'))
@@ -0,0 +1,66 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from market.models import MarketUser, Offer, OfferDetail, Order
+from market.offer_list import offer_list_cache
+from market.timing import install
+
+
+def server_timing(response):
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        # the async test runs its queries on the connection of this thread, opened before the middleware
+        install()
+        offer_list_cache.clear()
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        customer = MarketUser.objects.create(user=User.objects.create_user(username='customer', password='pass'), type='customer')
+        offer = Offer.objects.create(user=business, title='Logo', description='Paket', min_price=100, min_delivery_time=5)
+        detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=2, delivery_time_in_days=5, price=100, features=['Logo'], offer_type='basic'
+        )
+        Order.objects.create(offerdetail=detail, customer_user=customer, business_user=business, status='in_progress')
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=customer.user).key}'}
+
+    def test_header_and_log_line(self):
+        with self.assertLogs('market.timing', 'INFO') as logs:
+            response = APIClient().get(reverse('orders-list'), headers=self.headers)
+
+        metrics = server_timing(response)
+        self.assertEqual(metrics['view']['desc'], '"orders-list"')
+        for section in ['db', 'serializer', 'auth', 'permissions', 'total']:
+            self.assertGreater(float(metrics[section]['dur']), 0, section)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['view'], line['method'], line['status']), ('orders-list', 'GET', 200))
+        # token, validators, orders
+        self.assertEqual(line['queries'], 3)
+        self.assertEqual(metrics['db']['desc'], '"3 queries"')
+        self.assertLessEqual(line['db_ms'], line['total_ms'])
+
+    @override_settings(ASYNC_READ_URLCONF='main.asgi_urls')
+    async def test_async_views(self):
+        with self.assertLogs('market.timing', 'INFO') as logs:
+            response = await AsyncClient().get(reverse('offers-list'))
+        self.assertEqual(server_timing(response)['view']['desc'], '"offers-list"')
+        line = json.loads(logs.records[0].getMessage())
+        # validators, count, offers, details - run in worker threads
+        self.assertEqual(line['queries'], 4)
+        self.assertGreater(line['serializer_ms'], 0)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        response = APIClient().get(reverse('base-info'))
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from market.models import MarketUser, Offer, OfferDetail
+from market.slow_queries import explained, fingerprint, install, log_files, normalize
+
+
+class NormalizeTest(TestCase):
+    def test_literals_and_lists(self):
+        self.assertEqual(
+            normalize('SELECT *  FROM "t"\n WHERE "a" = %s AND "b" IN (%s, %s, %s) AND "c" = \'x\' LIMIT 21'),
+            'SELECT * FROM "t" WHERE "a" = ? AND "b" IN (...) AND "c" = ? LIMIT ?',
+        )
+        self.assertEqual(normalize('SELECT 1 FROM "t" WHERE "b" IN (%s)'), normalize('SELECT 2 FROM "t" WHERE "b" IN (%s, %s)'))
+        self.assertEqual(
+            normalize('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            normalize('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s), (%s, %s)'),
+        )
+        # table names with digits are kept
+        self.assertIn('"market_t1"', normalize('SELECT * FROM "market_t1"'))
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        # the test connection is open before the middleware
+        install()
+        business = MarketUser.objects.create(user=User.objects.create_user(username='business', password='pass'), type='business')
+        offer = Offer.objects.create(user=business, title='Logo', description='Paket', min_price=100, min_delivery_time=5)
+        self.detail = OfferDetail.objects.create(
+            offer=offer, title='basic', revisions=2, delivery_time_in_days=5, price=100, features=['Logo'], offer_type='basic'
+        )
+        explained.clear()
+
+    def get_detail(self):
+        with self.assertLogs('market.slow_queries', 'WARNING') as logs:
+            APIClient().get(reverse('offerdetail', kwargs={'pk': self.detail.pk}))
+        return logs.output, [json.loads(record.getMessage()) for record in logs.records]
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_records(self):
+        _, records = self.get_detail()
+        detail_query = next(record for record in records if 'FROM "market_offerdetail"' in record['statement'])
+        self.assertEqual(detail_query['view'], 'offerdetail')
+        self.assertEqual(detail_query['fingerprint'], fingerprint(detail_query['statement']))
+        self.assertIn(self.detail.pk, detail_query['params'])
+        self.assertTrue(any('market_offerdetail' in step for step in detail_query['plan']))
+
+        # the same queries again - only their fingerprints
+        _, repeated = self.get_detail()
+        self.assertEqual({record['fingerprint'] for record in repeated}, {record['fingerprint'] for record in records})
+        self.assertFalse(any('plan' in record for record in repeated))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_secrets_not_logged(self):
+        with self.assertLogs('market.slow_queries', 'WARNING') as logs:
+            User.objects.create_user(username='customer', password='secret')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertIn('"auth_user"', record['statement'])
+        self.assertEqual(record['params'], '[redacted]')
+
+    def test_disabled(self):
+        with self.assertNoLogs('market.slow_queries'):
+            APIClient().get(reverse('offerdetail', kwargs={'pk': self.detail.pk}))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_report(self):
+        lines, _ = self.get_detail()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow_queries.log')
+            # the first request rotated out to a backup
+            with open(f'{path}.1', 'w') as file:
+                file.writelines(line.split(':', 2)[2] + '\n' for line in lines)
+            with open(path, 'w') as file:
+                file.writelines(line.split(':', 2)[2] + '\n' for line in self.get_detail()[0])
+            self.assertEqual(log_files(path), [f'{path}.1', path])
+
+            out = StringIO()
+            call_command('slow_query_report', log=path, plans=True, stdout=out)
+        output = out.getvalue()
+        self.assertIn('offerdetail', output)
+        self.assertIn('FROM "market_offerdetail"', output)
+        self.assertIn('plan: ', output)
+        self.assertNotIn('rotated out', output)
+        # every fingerprint ran twice
+        rows = [line.split() for line in output.splitlines()[1:] if line.split()[0].replace('.', '').isdigit()]
+        self.assertTrue(rows)
+        self.assertTrue(all(row[1] == '2' for row in rows))
+        totals = [float(row[0]) for row in rows]
+        self.assertEqual(totals, sorted(totals, reverse=True))
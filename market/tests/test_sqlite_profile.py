@@ -0,0 +1,36 @@
+import copy
+import os
+import tempfile
+
+from django.conf import settings
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase
+
+
+class SQLiteProductionProfileTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {**copy.deepcopy(settings.DATABASES['default']), **copy.deepcopy(settings.SQLITE_PRODUCTION)}
+        settings_dict['NAME'] = os.path.join(directory.name, 'production.sqlite3')
+        self.connection = DatabaseWrapper(settings_dict, alias='production')
+        self.addCleanup(self.connection.close)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+        self.assertEqual(self.pragma('cache_size'), -65536)
+        self.assertEqual(self.pragma('mmap_size'), 268435456)
+        # MEMORY
+        self.assertEqual(self.pragma('temp_store'), 2)
+
+    def test_immediate_transactions(self):
+        self.connection.ensure_connection()
+        self.assertEqual(self.connection.transaction_mode, 'IMMEDIATE')
@@ -0,0 +1,130 @@
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
+
+from market.authentication import invalidate_user_tokens, token_cache
+from market.cache import LRUTTLCache
+from market.models import MarketUser
+
+
+class TokenCacheTest(APITestCase):
+    url = reverse('customer-list')
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='customer', password='pass')
+        self.marketuser = MarketUser.objects.create(user=self.user, type='customer')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        self.client.get(self.url)
+        # only the customer list itself
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_cached_marketuser_is_used(self):
+        self.client.get(self.url)
+        # offer creation is restricted to business users - decided from the cached MarketUser
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('offers-list'), {}, format='json')
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+
+    def test_token_deletion(self):
+        self.client.get(self.url)
+        self.token.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_token_rotation(self):
+        self.client.get(self.url)
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+        self.assertEqual(self.client.get(self.url).status_code, HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new_token.key}')
+        self.assertEqual(self.client.get(self.url).status_code, HTTP_200_OK)
+
+    def test_user_deactivation(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_type_change(self):
+        self.client.get(self.url)
+        self.marketuser.type = 'business'
+        self.marketuser.save()
+        data = {
+            'title': 'Paket',
+            'description': 'Paket',
+            'details': [
+                {'title': t, 'revisions': 1, 'delivery_time_in_days': 3, 'price': 10, 'features': [], 'offer_type': t}
+                for t in ['basic', 'standard', 'premium']
+            ]
+        }
+        response = self.client.post(reverse('offers-list'), data, format='json')
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+
+    def test_invalidation_while_loading(self):
+        calls = []
+
+        def deactivate(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if not calls:
+                calls.append(sql)
+                # another request deactivates the user while the token row loads
+                User.objects.filter(pk=self.user.pk).update(is_active=False)
+                invalidate_user_tokens(self.user.pk)
+            return result
+
+        with connection.execute_wrapper(deactivate):
+            self.assertEqual(self.client.get(self.url).status_code, HTTP_200_OK)
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get(self.url).status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_stats_endpoint(self):
+        before = token_cache.stats()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.data['token_cache']['hits'] - before['hits'], 1)
+        self.assertEqual(response.data['token_cache']['misses'] - before['misses'], 1)
+
+
+class LRUTTLCacheTest(APITestCase):
+
+    def test_lru_eviction(self):
+        cache = LRUTTLCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_set_after_invalidation(self):
+        cache = LRUTTLCache()
+        generation = cache.generation()
+        cache.delete('other')
+        cache.set('a', 1, generation=generation)
+        self.assertEqual(cache.get('a'), None)
+        cache.set('a', 1, generation=cache.generation())
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_ttl(self):
+        now = [0]
+        cache = LRUTTLCache(ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        now[0] = 9
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 10
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.stats()['size'], 0)
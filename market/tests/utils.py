@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Adds assertQueryBudget - fails if a block runs more queries than allowed
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{queries}')
@@ -0,0 +1,150 @@
+"""
+Per request timings for ServerTimingMiddleware and MetricsMiddleware -
+database, serializer, authentication and permission time. The sections are
+measured where the work happens and added to the timings of the current
+request, found through a ContextVar so that async views and their worker
+threads report as well.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_current = ContextVar('request_timings', default=None)
+
+SECTIONS = ['db', 'serializer', 'auth', 'permissions']
+
+_NO_DURATIONS = dict.fromkeys(SECTIONS, 0.0)
+
+
+class RequestTimings:
+    __slots__ = ('start', 'queries', 'durations', 'active')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.durations = _NO_DURATIONS.copy()
+        # sections running right now - a nested run is not counted twice
+        self.active = set()
+
+    def add(self, section, seconds):
+        self.durations[section] += seconds
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+class collect:
+    """
+    Collects the timings of the code in this block, returns the RequestTimings.
+    A nested block shares the timings of the outer one. A class, not a
+    generator - it runs on every request.
+    """
+    __slots__ = ('token',)
+
+    def __enter__(self):
+        timings = _current.get()
+        if timings is not None:
+            self.token = None
+            return timings
+        timings = RequestTimings()
+        self.token = _current.set(timings)
+        return timings
+
+    def __exit__(self, *exc_info):
+        if self.token is not None:
+            _current.reset(self.token)
+
+
+@contextmanager
+def timed(section):
+    timings = _current.get()
+    if timings is None or section in timings.active:
+        yield
+        return
+    timings.active.add(section)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(section, time.perf_counter() - start)
+        timings.active.discard(section)
+
+
+def timed_method(section, method):
+    def wrapper(*args, **kwargs):
+        with timed(section):
+            return method(*args, **kwargs)
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - start)
+
+
+def add_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+_thread = threading.local()
+
+
+def instrument_connections():
+    """
+    Adds the query timing to the open connections of this thread, once per
+    thread - connections opened later get it from the connection_created signal.
+    Only needed for connections opened before install_query_timing().
+    """
+    if getattr(_thread, 'instrumented', False):
+        return
+    for connection in connections.all(initialized_only=True):
+        add_query_wrapper(connection)
+    _thread.instrumented = True
+
+
+def install_query_timing():
+    """
+    Hooks the query count and time into every database connection. Idempotent.
+    """
+    instrument_connections()
+    connection_created.connect(add_query_wrapper, dispatch_uid='market.timing')
+
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def install():
+    """
+    Hooks the timings into every database connection and into DRF - serializer
+    data, authentication and the permission checks of all views. Idempotent,
+    called by the middleware once it is enabled.
+    """
+    global _installed
+    install_query_timing()
+    with _install_lock:
+        if _installed:
+            return
+        from rest_framework import serializers
+        from rest_framework.request import Request
+        from rest_framework.views import APIView
+
+        data = serializers.BaseSerializer.data
+        serializers.BaseSerializer.data = property(timed_method('serializer', data.fget))
+        Request._authenticate = timed_method('auth', Request._authenticate)
+        APIView.check_permissions = timed_method('permissions', APIView.check_permissions)
+        APIView.check_object_permissions = timed_method('permissions', APIView.check_object_permissions)
+        _installed = True
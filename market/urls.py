@@ -31,9 +31,16 @@ urlpatterns = [
     path('order-count/<int:pk>/', BusinessOrderCount.as_view(), name='business-order-count'),
     path('completed-order-count/<int:pk>/', BusinessCompletedOrderCount.as_view(), name='business-completed-order-count'),
 
+    # Review Stats
+    path('review-stats/', ReviewStatsView.as_view(), name='review-stats'),
+
     # Base Info
     path('base-info/', BaseInfoView.as_view(), name='base-info'),
 
+    # Monitoring
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+
     # DRF Auth /login /register
     path('api-auth/', include('rest_framework.urls'))
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from market.models import MarketUser
+
+
+def get_marketuser(request):
+    """
+    Returns the MarketUser of the request user or None.
+    The lookup is cached on the user object, repeated calls in one request are free.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return None
+    try:
+        return user.marketuser
+    except MarketUser.DoesNotExist:
+        return None
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else None
@@ -1,25 +1,39 @@
 import pdb
+from contextlib import nullcontext
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
 from rest_framework.generics import RetrieveUpdateAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.exceptions import NotFound, PermissionDenied, NotAcceptable, ParseError, AuthenticationFailed
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.views import APIView
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 
-from django.db.models import Q, Avg
-
-from market.pagination import CustomPagination
-from market.filters import OfferFilter
-from market.permissions import IsCustomer, isOwnerOr405, IsBusiness, isOfferOwner
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import Q, prefetch_related_objects
+
+from market.pagination import OfferPagination, OrderPagination, ReviewPagination
+from market.filters import OfferFilter, OfferOrderingFilter, OfferSearchFilter
+from market.permissions import IsCustomer, isOwnerOr405, IsBusiness, isOfferOwner, IsMetricsScraper
+from market.authentication import token_cache
+from market.base_info import base_info_cache, get_base_info
+from market.conditional import check_conditions, instance_validators, query_key, queryset_validators, set_validators
+from market.offer_list import offer_facets, offer_list_cache, offer_list_cache_key, offer_list_cache_stats, offer_list_values, serialize_offer_list, wants_facets, with_facets
+from market.constants import REVIEW_STATS_MAX_IDS
+from market.metrics import CONTENT_TYPE, render, totals
+from market.offers import DETAIL_COUNT, MAX_BATCH_SIZE, build_offer, create_offers, import_offers, validate_new_details
+from market.replica import offer_list_reads, pinned_clients
+from market.stats import apply_delta, merge_deltas, order_deltas, rating_summaries
+from market.utils import get_marketuser
 from market.models import MarketUser, Offer, OfferDetail, Order, Review
-from market.serializers import MarketUserRegisterSerializer, MarketUserShortSerializer, MarketUserSerializer, OfferDetailSerializer, OfferWriteSerializer, OfferReadSerializer, OfferListSerializer, OrderSerializer, ReviewSerializer, ReviewWriteSerializer, OfferReadAfterWriteSerializer
+from market.serializers import OrderBulkStatusSerializer, MarketUserRegisterSerializer, MarketUserShortSerializer, MarketUserSerializer, OfferDetailSerializer, OfferWriteSerializer, OfferReadSerializer, OfferListSerializer, OrderSerializer, ReviewSerializer, ReviewWriteSerializer, OfferReadAfterWriteSerializer
 
 
 class RegisterView(APIView):
@@ -75,7 +89,7 @@ class ProfileDetailView(RetrieveUpdateAPIView):
 
     def get_queryset(self):
         pk = self.kwargs.get('pk')
-        queryset = MarketUser.objects.filter(pk=pk)
+        queryset = MarketUser.objects.select_related('user').filter(pk=pk)
         return queryset
     
     def get(self, request, *args, **kwargs):
@@ -83,12 +97,18 @@ class ProfileDetailView(RetrieveUpdateAPIView):
 
         if market_userid is not None:
             try:
-                marketuser = MarketUser.objects.get(pk=market_userid)
+                marketuser = MarketUser.objects.select_related('user').get(pk=market_userid)
             except MarketUser.DoesNotExist:
                 raise NotFound('User dont exist', code=HTTP_404_NOT_FOUND)
-        
+
+        # the profile also shows username and email of the user
+        etag, last_modified = instance_validators(marketuser, marketuser.user.username, marketuser.user.email)
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
         data = self.get_serializer(instance=marketuser)
-        return Response(data.data, status=HTTP_200_OK)
+        return set_validators(Response(data.data, status=HTTP_200_OK), etag, last_modified)
 
 
 class CustomerListView(ListAPIView):
@@ -96,7 +116,7 @@ class CustomerListView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return MarketUser.objects.filter(type='customer')
+        return MarketUser.objects.select_related('user').filter(type='customer')
     
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
@@ -111,7 +131,7 @@ class BusinessListView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return MarketUser.objects.filter(type='business')
+        return MarketUser.objects.select_related('user').filter(type='business')
     
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
@@ -123,12 +143,13 @@ class BusinessListView(ListAPIView):
 
 class OfferViewset(ModelViewSet):
     # serializer_class = OfferReadSerializer
-    queryset = Offer.objects.all()
+    queryset = Offer.objects.select_related('user__user').prefetch_related('details')
     filterset_class = OfferFilter
-    ordering_fields = ['updated_at', 'min_price']
-    filter_backends = [SearchFilter, DjangoFilterBackend]
+    ordering_fields = ['updated_at', 'min_price', 'min_delivery_time']
+    ordering = ['-updated_at']
+    filter_backends = [OfferSearchFilter, DjangoFilterBackend, OfferOrderingFilter]
     search_fields = ['title', 'description']
-    pagination_class = CustomPagination
+    pagination_class = OfferPagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'partial_update']:
@@ -144,7 +165,7 @@ class OfferViewset(ModelViewSet):
             return [AllowAny()]
         if self.action in ['retrieve']:
             return [IsAuthenticated()]
-        if self.action in ['create']:
+        if self.action in ['create', 'batch']:
             return [IsAuthenticated(), IsBusiness()]
         return [IsAuthenticated(), IsBusiness(), isOfferOwner()]
     
@@ -156,60 +177,128 @@ class OfferViewset(ModelViewSet):
             context['request'] = None #disable absolute urls
         return context
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # details are loaded after the conditional headers are checked
+            return queryset.prefetch_related(None)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Anonymous responses are served from the offer list cache, the
+        validators are cached with them. A miss fills the cache from the
+        primary, see market.replica.offer_list_reads.
+        """
+        cache_key = offer_list_cache_key(request)
+        cached = offer_list_cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            data, etag, last_modified = cached
+            response = check_conditions(request, etag, last_modified) or Response(data)
+            return set_validators(response, etag, last_modified)
+
+        with offer_list_reads() if cache_key is not None else nullcontext():
+            queryset = self.filter_queryset(self.get_queryset())
+            etag, last_modified = queryset_validators(queryset, query_key(request))
+            not_modified = check_conditions(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            response = self.list_offers(queryset)
+        if cache_key is not None:
+            offer_list_cache.set(cache_key, (response.data, etag, last_modified))
+        return set_validators(response, etag, last_modified)
+
+    def list_offers(self, queryset):
+        """
+        Read only fast path - same output as OfferListSerializer, built from values() rows.
+        With ?facets=1 the page comes with the counts per price and delivery time range
+        and per creator of all filtered offers, see market.offer_list.offer_facets_query.
+        """
+        facets = offer_facets(queryset) if wants_facets(self.request) else None
+        queryset = offer_list_values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = self.get_paginated_response(serialize_offer_list(page)).data
+        else:
+            data = serialize_offer_list(queryset)
+        if facets is not None:
+            data = with_facets(data, facets)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        offer = self.get_object()
+        etag, last_modified = instance_validators(offer)
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        prefetch_related_objects([offer], 'details')
+        serializer = self.get_serializer(offer)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
     def create(self, request, *args, **kwargs):
-        marketuser = MarketUser.objects.get(user=self.request.user)
+        marketuser = get_marketuser(request)
         details = request.data.pop('details', None)
-        
+
         # Abort early if details not ok
-        if len(details) != 3:
+        if not isinstance(details, list) or len(details) != DETAIL_COUNT:
             raise ParseError('Details must be a list with 3 items.')
-        
+
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid() is False:
             raise ParseError('Offer Data is wrong.')
 
-        # get min_price from details
-        minn_price = int(min([item["price"] for item in details]))
-        # get min_delivery_time from details
-        minn_delivery_time = int(min([item["delivery_time_in_days"] for item in details]))
-        
-        serializer.save(
-            user=marketuser,
-            min_price=minn_price,
-            min_delivery_time=minn_delivery_time
-            )
-        
-        #handle details - validate and save them to the instance
-        if details is not None:
-            for detail in details:
-                detailserializer = OfferDetailSerializer(data=detail)
-                detailserializer.is_valid(raise_exception=True)
-                detailserializer.save(offer=serializer.instance)
+        # validate all details before anything is written
+        details_data = validate_new_details(details)
+
+        # offer and details in one transaction - one insert for the offer, one for the details
+        offer, offer_details = build_offer(marketuser, serializer.validated_data, details_data)
+        create_offers([(offer, offer_details)])
 
         # get new serializer and send this data back
-        res_serializer = OfferReadAfterWriteSerializer(serializer.instance)
+        res_serializer = OfferReadAfterWriteSerializer(offer)
         return Response(res_serializer.data, status=HTTP_201_CREATED)
-    
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request, *args, **kwargs):
+        """
+        Creates offers (items without id) or updates own offers (items with id)
+        in one request. Answers with one result per item.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ParseError('Expected a non empty list of offers.')
+        if len(items) > MAX_BATCH_SIZE:
+            raise ParseError(f'At most {MAX_BATCH_SIZE} offers per request.')
+
+        results = import_offers(get_marketuser(request), items)
+        written = [result for result in results if result['status'] != 'error']
+        response = {
+            "created": sum(1 for result in written if result['status'] == 'created'),
+            "updated": sum(1 for result in written if result['status'] == 'updated'),
+            "errors": len(results) - len(written),
+            "results": results,
+        }
+        return Response(response, status=HTTP_200_OK if written else HTTP_400_BAD_REQUEST)
+
+    @transaction.atomic
     def partial_update(self, request, *args, **kwargs):
-        marketuser = MarketUser.objects.get(user=self.request.user)
+        marketuser = get_marketuser(request)
         details = request.data.pop('details', None)
-        serializer = self.get_serializer(instance=self.get_object(), data=request.data, partial=True)
+        offer = self.get_object()
+
+        # If-Match - optimistic concurrency, 412 if the offer changed since the client read it
+        failed = check_conditions(request, *instance_validators(offer))
+        if failed is not None:
+            return failed
+
+        serializer = self.get_serializer(instance=offer, data=request.data, partial=True)
 
         #handle details - validate and save them to the instance
         if details is not None:
-            offer_types = []
-            for detail in details:
-                if 'offer_type' in detail:
-                    offer_types.append(detail['offer_type'])
-            
-            # get the offer - filter the respective details which needs an update
-            offer = self.get_object()
-            offer_details = OfferDetail.objects.filter(
-                Q(offer=offer) & Q(offer_type__in = offer_types)
-            )
+            # details are prefetched with the offer - map them by offer_type
+            type_map = {d.offer_type: d for d in offer.details.all()}
 
             # loop the patch list
-            type_map = {d.offer_type: d for d in offer_details}
             for patchdetail in details:
                 instance = type_map.get(patchdetail['offer_type'])
                 detailserializer = OfferDetailSerializer(instance, data=patchdetail, partial=True)
@@ -220,9 +309,14 @@ class OfferViewset(ModelViewSet):
         # proceed with the offer
         serializer.is_valid(raise_exception=True)
         serializer.save(user=marketuser)
+
+        # details changed after the prefetch - drop the stale cache
+        if getattr(offer, '_prefetched_objects_cache', None):
+            offer._prefetched_objects_cache = {}
+
         # get new serializer and send this data back
         res_serializer = OfferReadAfterWriteSerializer(serializer.instance)
-        return Response(res_serializer.data, status=HTTP_200_OK)
+        return set_validators(Response(res_serializer.data, status=HTTP_200_OK), *instance_validators(offer))
 
 
 class OfferDetailView(RetrieveAPIView):
@@ -235,16 +329,32 @@ class OrderViewset(ModelViewSet):
     queryset = Order.objects.all()
     http_method_names = ['get', 'post', 'patch', 'delete']
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderPagination
 
     def get_queryset(self):
-        try:
-            marketuser = MarketUser.objects.get(user=self.request.user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(self.request)
+        if marketuser is None:
             return Order.objects.none()
         return Order.objects.filter(
             Q(customer_user=marketuser) | Q(business_user=marketuser)
         )
 
+    def list(self, request, *args, **kwargs):
+        # the list depends on the requesting user
+        etag, last_modified = queryset_validators(self.get_queryset(), request.user.pk, query_key(request))
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        order = self.get_object()
+        etag, last_modified = instance_validators(order)
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(self.get_serializer(order).data), etag, last_modified)
+
     def create(self, request, *args, **kwargs):
         detailid = request.data.get("offer_detail_id", None)
 
@@ -254,23 +364,22 @@ class OrderViewset(ModelViewSet):
             raise ValueError("The id provided must be an integer.")
 
         try:
-            offerdetail = OfferDetail.objects.get(id=detailid)
+            offerdetail = OfferDetail.objects.select_related('offer').get(id=detailid)
         except OfferDetail.DoesNotExist:
             raise NotFound('Offerdetail not found.')
 
-        try:
-            marketuser = MarketUser.objects.get(user=request.user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(request)
+        if marketuser is None:
             raise NotFound('User not found.')
 
         if marketuser.type != "customer":
-            return PermissionDenied('Only Customers are allowed to create Orders.')
+            raise PermissionDenied('Only Customers are allowed to create Orders.')
 
 
         order = Order.objects.create(
             offerdetail = offerdetail,
             customer_user=marketuser,
-            business_user=offerdetail.offer.user,
+            business_user_id=offerdetail.offer.user_id,
             status="in_progress"
         )
 
@@ -286,21 +395,64 @@ class OrderViewset(ModelViewSet):
             except ValueError:
                 raise ParseError('Order pk must be an int')
 
-        try:
-            order = Order.objects.get(id=order_id)
-        except Order.DoesNotExist:
-            raise NotFound('Order not found.')
-
-        try:
-            marketuser = MarketUser.objects.get(user=request.user)
-        except MarketUser.DoesNotExist:
+        marketuser = get_marketuser(request)
+        if marketuser is None:
             raise NotFound('User not found.')
 
-        serializer = self.get_serializer(order, data=request.data, partial=True)
+        with transaction.atomic():
+            try:
+                order = Order.objects.select_for_update().get(id=order_id)
+            except Order.DoesNotExist:
+                raise NotFound('Order not found.')
+
+            # If-Match - optimistic concurrency, 412 if the order changed since the client read it
+            failed = check_conditions(request, *instance_validators(order))
+            if failed is not None:
+                return failed
+
+            serializer = self.get_serializer(order, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        return set_validators(Response(serializer.data, status=HTTP_200_OK), *instance_validators(order))
+
+    @action(detail=False, methods=['patch'], url_path='bulk-status', permission_classes=[IsAuthenticated, IsBusiness])
+    def bulk_status(self, request, *args, **kwargs):
+        """
+        Sets the status of many orders of the requesting business user at once.
+        Answers with one result per id: updated, unchanged or not_found.
+        """
+        serializer = OrderBulkStatusSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        return Response(serializer.data, status=HTTP_200_OK)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        status = serializer.validated_data['status']
+        marketuser = get_marketuser(request)
+
+        with transaction.atomic():
+            # ownership and current status in one query
+            current = dict(
+                Order.objects.select_for_update()
+                .filter(pk__in=ids, business_user=marketuser)
+                .values_list('id', 'status')
+            )
+            changed = [pk for pk, old_status in current.items() if old_status != status]
+            if changed:
+                Order.objects.filter(pk__in=changed).update(status=status, updated_at=timezone.now())
+                # queryset updates send no signals - move the counters here
+                apply_delta(marketuser.pk, **merge_deltas(
+                    *[order_deltas(current[pk], -1) for pk in changed],
+                    order_deltas(status, len(changed)),
+                ))
+
+        results = []
+        for pk in ids:
+            if pk not in current:
+                results.append({"id": pk, "status": "not_found"})
+            elif pk in changed:
+                results.append({"id": pk, "status": "updated"})
+            else:
+                results.append({"id": pk, "status": "unchanged"})
+        return Response({"updated": len(changed), "results": results}, status=HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
         order_id = self.kwargs.get('pk')
@@ -320,12 +472,12 @@ class BusinessOrderCount(APIView):
     def get(self, request, *args, **kwargs):
         business_user_id = kwargs.get('pk')
 
-        try:
-            business_user = MarketUser.objects.get(pk=business_user_id)
-        except MarketUser.DoesNotExist:
+        # single row lookup - None if the user has no stats row yet
+        counts = MarketUser.objects.filter(pk=business_user_id).values_list('stats__orders_in_progress', flat=True)
+        if not counts:
             return Response({"error": "No user found with this id."}, status=HTTP_404_NOT_FOUND)
 
-        orders_count = Order.objects.filter(Q(status="in_progress") & Q(business_user__pk=business_user_id)).count()
+        orders_count = counts[0] or 0
         return Response({"order_count": orders_count}, status=HTTP_200_OK)
 
 
@@ -335,18 +487,19 @@ class BusinessCompletedOrderCount(APIView):
     def get(self, request, *args, **kwargs):
         business_user_id = kwargs.get('pk')
 
-        try:
-            business_user = MarketUser.objects.get(pk=business_user_id)
-        except MarketUser.DoesNotExist:
+        # single row lookup - None if the user has no stats row yet
+        counts = MarketUser.objects.filter(pk=business_user_id).values_list('stats__orders_completed', flat=True)
+        if not counts:
             return Response({"error": "No business user found with this id."}, status=HTTP_404_NOT_FOUND)
 
-        orders_count = Order.objects.filter(Q(status="completed") & Q(business_user__pk=business_user_id)).count()
+        orders_count = counts[0] or 0
         return Response({"completed_order_count": orders_count}, status=HTTP_200_OK)
 
 
 class ReviewViewset(ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ReviewPagination
 
     def get_queryset(self):
         business_user_id = self.request.query_params.get('business_user_id')
@@ -366,6 +519,21 @@ class ReviewViewset(ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = queryset_validators(self.get_queryset(), query_key(request))
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        review = self.get_object()
+        etag, last_modified = instance_validators(review)
+        not_modified = check_conditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(self.get_serializer(review).data), etag, last_modified)
+
 
     def get_serializer_class(self):
         if (self.action in ['create', 'update', 'partial_update']):
@@ -373,9 +541,8 @@ class ReviewViewset(ModelViewSet):
         return ReviewSerializer
 
     def create(self, request, *args, **kwargs):
-        try:
-            reviewer = MarketUser.objects.get(user=request.user)
-        except MarketUser.DoesNotExist:
+        reviewer = get_marketuser(request)
+        if reviewer is None:
             raise ParseError('No customer account found with this id.')
 
         if reviewer.type != 'customer':
@@ -386,14 +553,16 @@ class ReviewViewset(ModelViewSet):
         except MarketUser.DoesNotExist:
             raise ParseError('No business account found with this id.')
 
-        reviews = Review.objects.filter(business_user=business_user.pk, reviewer=reviewer.pk)
-        if len(reviews) >= 1:
-            raise PermissionDenied("You already made a review on this user. Delete or patch this one.")
-
         data = request.data.copy()
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        review = serializer.save(reviewer=reviewer)
+
+        # one review per business user - enforced by the unique constraint
+        try:
+            with transaction.atomic():
+                review = serializer.save(reviewer=reviewer)
+        except IntegrityError:
+            raise PermissionDenied("You already made a review on this user. Delete or patch this one.")
 
         full_review = ReviewSerializer(review).data
 
@@ -409,16 +578,11 @@ class ReviewViewset(ModelViewSet):
             except Review.DoesNotExist:
                 raise ParseError('Review not found')
         
-        try:
-            request_marketuser = MarketUser.objects.get(user=self.request.user)
-        except MarketUser.DoesNotExist:
+        request_marketuser = get_marketuser(request)
+        if request_marketuser is None:
             raise ParseError('Profile not found.')
         
-        review_user = review.reviewer
-        if not review_user:
-            raise NotFound('Reviewer not found', code=HTTP_400_BAD_REQUEST)
-        
-        if request_marketuser != review_user:
+        if review.reviewer_id != request_marketuser.pk:
             raise PermissionDenied('Only Creators can update the review', code=HTTP_403_FORBIDDEN)
         
         # checks passed - update/patch the instance
@@ -437,9 +601,9 @@ class ReviewViewset(ModelViewSet):
         except Review.DoesNotExist:
             raise NotFound('Review not found', code=HTTP_400_BAD_REQUEST)
         
-        request_marketuser = MarketUser.objects.get(pk=self.request.user.pk)
+        request_marketuser = get_marketuser(request)
 
-        if review.reviewer != request_marketuser:
+        if request_marketuser is None or review.reviewer_id != request_marketuser.pk:
             raise PermissionDenied('Only Creator can perform this action', code=HTTP_403_FORBIDDEN)
         
         review.delete()
@@ -447,15 +611,48 @@ class ReviewViewset(ModelViewSet):
         return Response('Review deleted', status=HTTP_204_NO_CONTENT)
 
 
+class ReviewStatsView(APIView):
+    """
+    Review count, average rating and 1-5 star histogram per business user,
+    ?business_user_ids=1,2,3 - served from the stats table, not the reviews.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        try:
+            ids = [int(pk) for pk in request.query_params.get('business_user_ids', '').split(',') if pk.strip()]
+        except ValueError:
+            raise ParseError('business_user_ids must be a comma separated list of ids.')
+        if not ids:
+            raise ParseError('business_user_ids is required.')
+        if len(ids) > REVIEW_STATS_MAX_IDS:
+            raise ParseError(f'At most {REVIEW_STATS_MAX_IDS} business_user_ids per request.')
+        return Response(rating_summaries(ids), status=HTTP_200_OK)
+
+
 class BaseInfoView(APIView):
 
     def get(self, request, format=None):
-        review_count = Review.objects.count()
-        average_rating = Review.objects.aggregate(Avg('rating'))['rating__avg']
-        business_profile_count = MarketUser.objects.filter(type='business').count()
-        offer_count = Offer.objects.count()
+        return Response(get_base_info(), status=HTTP_200_OK)
 
-        data_dict = {k: locals()[k] for k in ["review_count", "average_rating", "business_profile_count", "offer_count"]}
-        return Response(data_dict, status=HTTP_200_OK)
 
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
+    def get(self, request, format=None):
+        return Response({
+            "token_cache": token_cache.stats(),
+            "offer_list_cache": offer_list_cache_stats(),
+            "base_info_cache": base_info_cache.stats(),
+            "replica_pins": pinned_clients.stats(),
+        }, status=HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+    Prometheus metrics of all worker processes, see market.metrics.
+    """
+    permission_classes = [IsMetricsScraper]
+
+    def get(self, request, format=None):
+        return HttpResponse(render(totals()), content_type=CONTENT_TYPE)